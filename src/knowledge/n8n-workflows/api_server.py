@@ -6,7 +6,7 @@ High-performance API with sub-100ms response times.
 
 from fastapi import FastAPI, HTTPException, Query, BackgroundTasks, Request
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, FileResponse, JSONResponse
+from fastapi.responses import HTMLResponse, FileResponse, JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
 from pydantic import BaseModel, field_validator
@@ -16,11 +16,14 @@ import os
 import re
 import urllib.parse
 from pathlib import Path
-import uvicorn
 import time
-from collections import defaultdict
 
 from workflow_db import WorkflowDatabase
+from request_metrics import RequestMetricsMiddleware
+from metrics_exporter import CONTENT_TYPE, register_collector, render_metrics
+from rate_limiter import RateLimitMiddleware, create_rate_limiter
+from shared_cache import cache
+import sqlite_tracing
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -29,13 +32,29 @@ app = FastAPI(
     version="2.0.0",
 )
 
-# Security: Rate limiting storage
-rate_limit_storage = defaultdict(list)
+# Security: Rate limiting (RATE_LIMIT_BACKEND=sqlite shares limits across workers)
 MAX_REQUESTS_PER_MINUTE = 60  # Configure as needed
+MAX_REINDEX_PER_MINUTE = 5
+rate_limiter = create_rate_limiter()
+rate_limiter.set_limit("workflow_files", MAX_REQUESTS_PER_MINUTE)
+rate_limiter.set_limit("reindex", MAX_REINDEX_PER_MINUTE)
+
+# Rate-limited routes and the limit scope they count against
+RATE_LIMITED_ROUTES = {
+    ("GET", "/api/workflows/{filename}"): "workflow_files",
+    ("GET", "/api/workflows/{filename}/download"): "workflow_files",
+    ("GET", "/api/workflows/{filename}/diagram"): "workflow_files",
+    ("POST", "/api/reindex"): "reindex",
+}
 
 # Add middleware for performance
 app.add_middleware(GZipMiddleware, minimum_size=1000)
 
+# Inside CORS so 429 responses still carry the CORS headers
+app.add_middleware(
+    RateLimitMiddleware, limiter=rate_limiter, routes=RATE_LIMITED_ROUTES
+)
+
 # Security: Configure CORS properly - restrict origins in production
 # For local development, you can use localhost
 # For production, replace with your actual domain
@@ -55,26 +74,79 @@ app.add_middleware(
     allow_headers=["Content-Type", "Authorization"],  # Security fix: Restrict headers
 )
 
-# Initialize database
-db = WorkflowDatabase()
+# Added last so it is outermost: times the full request and counts compressed bytes
+app.add_middleware(RequestMetricsMiddleware)
+
+# Initialize database (WORKFLOW_DB_READONLY=1 in multi-worker mode: no DDL).
+# Schema creation is deferred to warmup() so importing this module stays cheap.
+db = WorkflowDatabase(initialize=False)
+
+# Filled by warmup(): in multi-worker mode this runs in the master before
+# forking, so workers inherit the snapshot and caches copy-on-write
+warmup_state: Dict[str, Any] = {
+    "ready": False,
+    "stats": None,
+    "warmed_bytes": 0,
+    "duration_ms": None,
+}
+
+# Seconds live database stats are served from the shared cache
+STATS_CACHE_SECONDS = 30
+
+# Parsed context/*.json files keyed by path, invalidated on mtime change
+_context_cache: Dict[str, tuple] = {}
+
+
+def load_context_json(path: str) -> Any:
+    """Load a context JSON file once per modification."""
+    mtime = os.stat(path).st_mtime
+    cached = _context_cache.get(path)
+    if cached is None or cached[0] != mtime:
+        with open(path, "r", encoding="utf-8") as f:
+            cached = _context_cache[path] = (mtime, json.load(f))
+    return cached[1]
+
+
+def current_stats() -> Dict[str, Any]:
+    """Database stats; a read-only index never changes, so serve the warm snapshot."""
+    if db.read_only and warmup_state["stats"] is not None:
+        return warmup_state["stats"]
+    return cache.get_or_set("workflows:stats", STATS_CACHE_SECONDS, db.get_stats)
+
+
+def warmup():
+    """Load the index pages, stats snapshot and context caches; idempotent."""
+    if warmup_state["ready"]:
+        return
+    started = time.perf_counter()
+    db.ensure_schema()
+    warmup_state["warmed_bytes"] = db.warm()
+    warmup_state["stats"] = db.get_stats()
+    for name in ("unique_categories.json", "search_categories.json"):
+        path = Path("context") / name
+        if path.exists():
+            load_context_json(str(path))
+    warmup_state["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    warmup_state["ready"] = True
+
+
+def collect_rate_limiter_metrics(writer):
+    """Expose rate limiter state at scrape time."""
+    stats = rate_limiter.stats()
+    writer.gauge(
+        "rate_limiter_tracked_keys",
+        "Client/scope keys tracked by the rate limiter",
+        stats["tracked_keys"],
+    )
+    writer.counter(
+        "rate_limiter_evictions_total", "Idle rate limiter keys evicted", stats["evictions"]
+    )
+    writer.counter(
+        "rate_limiter_rejected_total", "Requests rejected by the rate limiter", stats["rejected"]
+    )
 
 
-# Security: Helper function for rate limiting
-def check_rate_limit(client_ip: str) -> bool:
-    """Check if client has exceeded rate limit."""
-    current_time = time.time()
-    # Clean old entries
-    rate_limit_storage[client_ip] = [
-        timestamp
-        for timestamp in rate_limit_storage[client_ip]
-        if current_time - timestamp < 60
-    ]
-    # Check rate limit
-    if len(rate_limit_storage[client_ip]) >= MAX_REQUESTS_PER_MINUTE:
-        return False
-    # Add current request
-    rate_limit_storage[client_ip].append(current_time)
-    return True
+register_collector(collect_rate_limiter_metrics)
 
 
 # Security: Helper function to validate and sanitize filenames
@@ -139,9 +211,10 @@ def validate_filename(filename: str) -> bool:
 # Startup function to verify database
 @app.on_event("startup")
 async def startup_event():
-    """Verify database connectivity on startup."""
+    """Verify database connectivity and warm caches (a no-op if preloaded)."""
     try:
-        stats = db.get_stats()
+        warmup()
+        stats = warmup_state["stats"]
         if stats["total"] == 0:
             print("⚠️  Warning: No workflows found in database. Run indexing first.")
         else:
@@ -225,11 +298,31 @@ async def health_check():
     return {"status": "healthy", "message": "N8N Workflow API is running"}
 
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness probe: 503 until the index and caches are warm."""
+    if not warmup_state["ready"]:
+        return JSONResponse(status_code=503, content={"status": "warming_up"})
+    return {
+        "status": "ready",
+        "pid": os.getpid(),
+        "read_only": db.read_only,
+        "warmed_bytes": warmup_state["warmed_bytes"],
+        "warmup_ms": warmup_state["duration_ms"],
+    }
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics endpoint."""
+    return PlainTextResponse(render_metrics(), media_type=CONTENT_TYPE)
+
+
 @app.get("/api/stats", response_model=StatsResponse)
 async def get_stats():
     """Get workflow database statistics."""
     try:
-        stats = db.get_stats()
+        stats = current_stats()
         return StatsResponse(**stats)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching stats: {str(e)}")
@@ -243,6 +336,11 @@ async def search_workflows(
     active_only: bool = Query(False, description="Show only active workflows"),
     page: int = Query(1, ge=1, description="Page number"),
     per_page: int = Query(20, ge=1, le=100, description="Items per page"),
+    mode: str = Query(
+        "lexical",
+        pattern="^(lexical|semantic|hybrid)$",
+        description="Ranking: lexical (full-text), semantic (embeddings) or hybrid",
+    ),
 ):
     """Search and filter workflows with pagination."""
     try:
@@ -255,6 +353,7 @@ async def search_workflows(
             active_only=active_only,
             limit=per_page,
             offset=offset,
+            mode=mode,
         )
 
         # Convert to Pydantic models with error handling
@@ -297,6 +396,8 @@ async def search_workflows(
                 "trigger": trigger,
                 "complexity": complexity,
                 "active_only": active_only,
+                # Semantic/hybrid fall back to lexical without a vectors file
+                "mode": db.search_mode(mode),
             },
         )
     except Exception as e:
@@ -306,7 +407,7 @@ async def search_workflows(
 
 
 @app.get("/api/workflows/{filename}")
-async def get_workflow_detail(filename: str, request: Request):
+async def get_workflow_detail(filename: str):
     """Get detailed workflow information including raw JSON."""
     try:
         # Security: Validate filename to prevent path traversal
@@ -314,13 +415,6 @@ async def get_workflow_detail(filename: str, request: Request):
             print(f"Security: Blocked path traversal attempt for filename: {filename}")
             raise HTTPException(status_code=400, detail="Invalid filename format")
 
-        # Security: Rate limiting
-        client_ip = request.client.host if request.client else "unknown"
-        if not check_rate_limit(client_ip):
-            raise HTTPException(
-                status_code=429, detail="Rate limit exceeded. Please try again later."
-            )
-
         # Get workflow metadata from database
         workflows, _ = db.search_workflows(f'filename:"{filename}"', limit=1)
         if not workflows:
@@ -368,7 +462,7 @@ async def get_workflow_detail(filename: str, request: Request):
 
 
 @app.get("/api/workflows/{filename}/download")
-async def download_workflow(filename: str, request: Request):
+async def download_workflow(filename: str):
     """Download workflow JSON file with security validation."""
     try:
         # Security: Validate filename to prevent path traversal
@@ -376,13 +470,6 @@ async def download_workflow(filename: str, request: Request):
             print(f"Security: Blocked path traversal attempt for filename: {filename}")
             raise HTTPException(status_code=400, detail="Invalid filename format")
 
-        # Security: Rate limiting
-        client_ip = request.client.host if request.client else "unknown"
-        if not check_rate_limit(client_ip):
-            raise HTTPException(
-                status_code=429, detail="Rate limit exceeded. Please try again later."
-            )
-
         # Only search within the workflows directory
         workflows_path = Path("workflows").resolve()  # Get absolute path
 
@@ -433,7 +520,7 @@ async def download_workflow(filename: str, request: Request):
 
 
 @app.get("/api/workflows/{filename}/diagram")
-async def get_workflow_diagram(filename: str, request: Request):
+async def get_workflow_diagram(filename: str):
     """Get Mermaid diagram code for workflow visualization."""
     try:
         # Security: Validate filename to prevent path traversal
@@ -441,13 +528,6 @@ async def get_workflow_diagram(filename: str, request: Request):
             print(f"Security: Blocked path traversal attempt for filename: {filename}")
             raise HTTPException(status_code=400, detail="Invalid filename format")
 
-        # Security: Rate limiting
-        client_ip = request.client.host if request.client else "unknown"
-        if not check_rate_limit(client_ip):
-            raise HTTPException(
-                status_code=429, detail="Rate limit exceeded. Please try again later."
-            )
-
         # Only search within the workflows directory
         workflows_path = Path("workflows").resolve()
 
@@ -570,6 +650,23 @@ def generate_mermaid_diagram(nodes: List[Dict], connections: Dict) -> str:
     return "\n".join(mermaid_code)
 
 
+def require_admin_token(admin_token: Optional[str], request: Request, action: str):
+    """Reject the request unless it carries ADMIN_TOKEN (endpoint disabled without one)."""
+    expected_token = os.environ.get("ADMIN_TOKEN", None)
+
+    if not expected_token:
+        # If no token is configured, disable the endpoint for security
+        raise HTTPException(
+            status_code=503,
+            detail=f"{action} endpoint is disabled. Set ADMIN_TOKEN environment variable to enable.",
+        )
+
+    if admin_token != expected_token:
+        client_ip = request.client.host if request.client else "unknown"
+        print(f"Security: Unauthorized {action.lower()} attempt from {client_ip}")
+        raise HTTPException(status_code=401, detail="Invalid authentication token")
+
+
 @app.post("/api/reindex")
 async def reindex_workflows(
     background_tasks: BackgroundTasks,
@@ -578,33 +675,23 @@ async def reindex_workflows(
     admin_token: Optional[str] = Query(None, description="Admin authentication token"),
 ):
     """Trigger workflow reindexing in the background (requires authentication)."""
-    # Security: Rate limiting
     client_ip = request.client.host if request.client else "unknown"
-    if not check_rate_limit(client_ip):
-        raise HTTPException(
-            status_code=429, detail="Rate limit exceeded. Please try again later."
-        )
 
     # Security: Basic authentication check
     # In production, use proper authentication (JWT, OAuth, etc.)
     # For now, check for environment variable or disable endpoint
+    require_admin_token(admin_token, request, "Reindexing")
 
-    expected_token = os.environ.get("ADMIN_TOKEN", None)
-
-    if not expected_token:
-        # If no token is configured, disable the endpoint for security
+    if db.read_only:
         raise HTTPException(
-            status_code=503,
-            detail="Reindexing endpoint is disabled. Set ADMIN_TOKEN environment variable to enable.",
+            status_code=409,
+            detail="Index is read-only in multi-worker mode. Restart with run.py --reindex.",
         )
 
-    if admin_token != expected_token:
-        print(f"Security: Unauthorized reindex attempt from {client_ip}")
-        raise HTTPException(status_code=401, detail="Invalid authentication token")
-
     def run_indexing():
         try:
             db.index_all_workflows(force_reindex=force)
+            cache.invalidate("workflows:")
             print(f"Reindexing completed successfully (requested by {client_ip})")
         except Exception as e:
             print(f"Error during reindexing: {e}")
@@ -613,11 +700,36 @@ async def reindex_workflows(
     return {"message": "Reindexing started in background", "requested_by": client_ip}
 
 
+@app.get("/api/admin/slow-queries")
+async def get_slow_queries(
+    request: Request,
+    limit: int = Query(50, ge=1, le=500),
+    sort: str = Query("total_ms"),
+    admin_token: Optional[str] = Query(None, description="Admin authentication token"),
+):
+    """SQL fingerprint statistics and recent slow queries of this process (requires authentication)."""
+    require_admin_token(admin_token, request, "Slow-query log")
+    if sort not in sqlite_tracing.REPORT_SORT_KEYS:
+        raise HTTPException(status_code=400, detail="Invalid sort key")
+    return sqlite_tracing.query_log.report(limit=limit, sort=sort)
+
+
+@app.post("/api/admin/slow-queries/reset")
+async def reset_slow_queries(
+    request: Request,
+    admin_token: Optional[str] = Query(None, description="Admin authentication token"),
+):
+    """Clear this process's slow-query log (requires authentication)."""
+    require_admin_token(admin_token, request, "Slow-query log")
+    sqlite_tracing.query_log.reset()
+    return {"message": "Slow-query log cleared"}
+
+
 @app.get("/api/integrations")
 async def get_integrations():
     """Get list of all unique integrations."""
     try:
-        stats = db.get_stats()
+        stats = current_stats()
         # For now, return basic info. Could be enhanced to return detailed integration stats
         return {"integrations": [], "count": stats["unique_integrations"]}
     except Exception as e:
@@ -633,15 +745,13 @@ async def get_categories():
         # Try to load from the generated unique categories file
         categories_file = Path("context/unique_categories.json")
         if categories_file.exists():
-            with open(categories_file, "r", encoding="utf-8") as f:
-                categories = json.load(f)
+            categories = load_context_json(str(categories_file))
             return {"categories": categories}
         else:
             # Fallback: extract categories from search_categories.json
             search_categories_file = Path("context/search_categories.json")
             if search_categories_file.exists():
-                with open(search_categories_file, "r", encoding="utf-8") as f:
-                    search_data = json.load(f)
+                search_data = load_context_json(str(search_categories_file))
 
                 unique_categories = set()
                 for item in search_data:
@@ -671,8 +781,7 @@ async def get_category_mappings():
         if not search_categories_file.exists():
             return {"mappings": {}}
 
-        with open(search_categories_file, "r", encoding="utf-8") as f:
-            search_data = json.load(f)
+        search_data = load_context_json(str(search_categories_file))
 
         # Convert to a simple filename -> category mapping
         mappings = {}
@@ -778,6 +887,7 @@ def run_server(host: str = "127.0.0.1", port: int = 8000, reload: bool = False):
 
     # Debug: Check database connectivity
     try:
+        db.ensure_schema()
         stats = db.get_stats()
         print(f"✅ Database connected: {stats['total']} workflows found")
         if stats["total"] == 0:
@@ -808,6 +918,8 @@ def run_server(host: str = "127.0.0.1", port: int = 8000, reload: bool = False):
     print(f"🌐 Server will be available at: http://{host}:{port}")
     print(f"📁 Static files at: http://{host}:{port}/static/")
 
+    import uvicorn
+
     uvicorn.run(
         "api_server:app",
         host=host,
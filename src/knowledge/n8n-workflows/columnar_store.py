@@ -0,0 +1,466 @@
+#!/usr/bin/env python3
+"""
+Columnar Store
+In-memory, column-oriented copy of the workflow catalog for ad-hoc
+aggregations: numeric measures as typed arrays, low-cardinality attributes
+dictionary-encoded, and integrations/tags as CSR arrays (row offsets into one
+flat array of value codes). Filters, group-bys and aggregates run vectorized
+with numpy, or as plain loops over the same arrays without it.
+"""
+
+import array
+import json
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+
+import sqlite_tracing
+from lazy_imports import LazyModule
+from workflow_db import index_generation
+
+np = LazyModule("numpy")
+
+# Dictionary-encoded single-valued columns
+DIMENSIONS = ("trigger_type", "complexity", "active")
+
+# Numeric columns that can be filtered by range and aggregated
+MEASURES = ("node_count", "views", "downloads", "rating")
+
+# Multi-valued columns; grouping by one counts each workflow once per value
+MULTI_VALUED = ("integrations", "tags")
+
+AGGREGATES = ("sum", "avg", "min", "max")
+
+# Metric names of the original analytics request, mapped to aggregates
+METRIC_ALIASES = {
+    "views": "sum:views",
+    "downloads": "sum:downloads",
+    "ratings": "avg:rating",
+}
+
+# The catalog is reloaded after each index generation, and at least this
+# often so the view/download/rating measures catch up with counter writes
+CATALOG_MAX_AGE_SECONDS = 300
+
+# Seconds between index generation checks, made in a background thread
+CATALOG_POLL_SECONDS = 5
+
+MAX_GROUPS = 1000
+
+CATALOG_SQL = """
+    SELECT w.id, w.trigger_type, w.complexity, w.active, w.node_count,
+           w.integrations, w.tags, {stats}
+    FROM workflows w {join}
+    ORDER BY w.id
+"""
+
+
+def _int_array(typecode: str, values: Sequence[int] = ()):
+    if np.available:
+        return np.asarray(values, dtype={"i": np.int32, "q": np.int64, "H": np.uint16}[typecode])
+    return array.array(typecode, values)
+
+
+def _tag_name(tag: Any) -> str:
+    # Tags are stored as names or as n8n tag objects
+    if isinstance(tag, dict):
+        return tag.get("name", str(tag.get("id", "tag")))
+    return str(tag)
+
+
+class _Encoder:
+    """Assigns dense integer codes to values in first-seen order."""
+
+    def __init__(self):
+        self.codes: Dict[Any, int] = {}
+        self.values: List[Any] = []
+
+    def encode(self, value: Any) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class ColumnarCatalog:
+    """Workflow catalog as columns; see query() for the request format."""
+
+    def __init__(
+        self,
+        ids: Sequence[int],
+        dimensions: Dict[str, Tuple[Any, List[Any]]],
+        measures: Dict[str, Any],
+        multi_valued: Dict[str, Tuple[Any, Any, List[Any]]],
+    ):
+        self.ids = ids
+        self.rows = len(ids)
+        self.dimensions = dimensions  # name -> (codes, values)
+        self.measures = measures  # name -> values
+        self.multi_valued = multi_valued  # name -> (offsets, codes, values)
+        # Row of every flat entry, so CSR columns filter and group without loops
+        self.entry_rows = {}
+        for name, (offsets, codes, _) in multi_valued.items():
+            if np.available:
+                self.entry_rows[name] = np.repeat(
+                    np.arange(self.rows, dtype=np.int32), np.diff(offsets)
+                )
+            else:
+                self.entry_rows[name] = array.array(
+                    "i", (row for row in range(self.rows) for _ in range(offsets[row], offsets[row + 1]))
+                )
+        self.loaded_at = time.time()
+
+    @classmethod
+    def load(cls, conn: sqlite3.Connection) -> "ColumnarCatalog":
+        """Read the catalog in one pass, decoding each JSON column once."""
+        has_stats = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'workflow_stats'"
+        ).fetchone()
+        sql = CATALOG_SQL.format(
+            stats="s.total_views, s.total_downloads, s.average_rating" if has_stats else "0, 0, 0",
+            join="LEFT JOIN workflow_stats s ON s.workflow_id = w.filename" if has_stats else "",
+        )
+
+        ids: List[int] = []
+        encoders = {name: _Encoder() for name in DIMENSIONS + MULTI_VALUED}
+        dimension_codes = {name: [] for name in DIMENSIONS}
+        measure_values = {name: [] for name in MEASURES}
+        offsets = {name: [0] for name in MULTI_VALUED}
+        entry_codes = {name: [] for name in MULTI_VALUED}
+
+        for row in conn.execute(sql):
+            wid, trigger_type, complexity, active, node_count, integrations, tags, views, downloads, rating = row
+            ids.append(wid)
+            for name, value in (
+                ("trigger_type", trigger_type or "Unknown"),
+                ("complexity", complexity or "unknown"),
+                ("active", bool(active)),
+            ):
+                dimension_codes[name].append(encoders[name].encode(value))
+            for name, value in zip(MEASURES, (node_count, views, downloads, rating)):
+                measure_values[name].append(value or 0)
+            for name, values in (
+                ("integrations", json.loads(integrations or "[]")),
+                ("tags", [_tag_name(tag) for tag in json.loads(tags or "[]")]),
+            ):
+                encoder = encoders[name]
+                entry_codes[name].extend({encoder.encode(v) for v in values})
+                offsets[name].append(len(entry_codes[name]))
+
+        if np.available:
+            measures = {
+                name: np.asarray(values, dtype=np.float32 if name == "rating" else np.int64)
+                for name, values in measure_values.items()
+            }
+        else:
+            measures = {
+                name: array.array("d" if name == "rating" else "q", values)
+                for name, values in measure_values.items()
+            }
+        return cls(
+            ids=_int_array("q", ids),
+            dimensions={
+                name: (_int_array("H", dimension_codes[name]), encoders[name].values)
+                for name in DIMENSIONS
+            },
+            measures=measures,
+            multi_valued={
+                name: (_int_array("q", offsets[name]), _int_array("i", entry_codes[name]), encoders[name].values)
+                for name in MULTI_VALUED
+            },
+        )
+
+    def columns(self) -> Dict[str, Any]:
+        """Column names and, for encoded columns, their cardinality."""
+        return {
+            "rows": self.rows,
+            "dimensions": {name: len(values) for name, (_, values) in self.dimensions.items()},
+            "measures": list(self.measures),
+            "multi_valued": {name: len(values) for name, (_, _, values) in self.multi_valued.items()},
+        }
+
+    # --- request parsing --------------------------------------------------
+
+    def _parse_metrics(self, metrics: Sequence[str]) -> List[Tuple[str, str, Optional[str]]]:
+        """("label", aggregate, measure) per metric; "count" or "<agg>:<measure>"."""
+        parsed = []
+        for metric in metrics or ["count"]:
+            spec = METRIC_ALIASES.get(metric, metric)
+            if spec == "count":
+                parsed.append((metric, "count", None))
+                continue
+            aggregate, _, measure = spec.partition(":")
+            if aggregate not in AGGREGATES or measure not in self.measures:
+                raise ValueError(
+                    f"Unknown metric '{metric}': use count or <{'|'.join(AGGREGATES)}>:"
+                    f"<{'|'.join(self.measures)}>"
+                )
+            parsed.append((metric, aggregate, measure))
+        return parsed
+
+    @staticmethod
+    def _as_list(value: Any) -> List[Any]:
+        return list(value) if isinstance(value, (list, tuple, set)) else [value]
+
+    # --- numpy path --------------------------------------------------------
+
+    def _mask_numpy(self, filters: Dict[str, Any]):
+        mask = np.ones(self.rows, dtype=bool)
+        for column, condition in filters.items():
+            if column in self.dimensions:
+                codes, values = self.dimensions[column]
+                wanted = [i for i, v in enumerate(values) if v in self._as_list(condition)]
+                mask &= np.isin(codes, wanted)
+            elif column in self.measures:
+                values = self.measures[column]
+                if isinstance(condition, dict):
+                    if condition.get("min") is not None:
+                        mask &= values >= condition["min"]
+                    if condition.get("max") is not None:
+                        mask &= values <= condition["max"]
+                else:
+                    mask &= values == condition
+            elif column in self.multi_valued:
+                _, codes, values = self.multi_valued[column]
+                wanted = [i for i, v in enumerate(values) if v in self._as_list(condition)]
+                has_any = np.zeros(self.rows, dtype=bool)
+                has_any[self.entry_rows[column][np.isin(codes, wanted)]] = True
+                mask &= has_any
+            else:
+                raise ValueError(f"Unknown filter column '{column}'")
+        return mask
+
+    def _aggregate_numpy(self, mask, group_by: List[str], metrics) -> List[Dict[str, Any]]:
+        rows = np.flatnonzero(mask)
+        keys = np.zeros(len(rows), dtype=np.int64)
+        decoders = []
+        for column in group_by:
+            if column in self.dimensions:
+                codes, values = self.dimensions[column]
+                column_codes = codes[rows].astype(np.int64)
+            else:
+                # Explode: one (row, value) pair per entry of the kept rows
+                _, codes, values = self.multi_valued[column]
+                entry_rows = self.entry_rows[column]
+                keep = mask[entry_rows]
+                index = np.searchsorted(rows, entry_rows[keep])
+                rows, keys = entry_rows[keep], keys[index]
+                column_codes = codes[keep].astype(np.int64)
+            keys = keys * len(values) + column_codes
+            decoders.append((column, values))
+
+        groups, inverse = np.unique(keys, return_inverse=True)
+        counts = np.bincount(inverse, minlength=len(groups))
+        results: Dict[str, Any] = {}
+        for label, aggregate, measure in metrics:
+            if aggregate == "count":
+                results[label] = counts
+                continue
+            values = self.measures[measure][rows].astype(np.float64)
+            if aggregate in ("sum", "avg"):
+                sums = np.bincount(inverse, weights=values, minlength=len(groups))
+                results[label] = sums if aggregate == "sum" else sums / np.maximum(counts, 1)
+            else:
+                extreme = np.full(len(groups), np.inf if aggregate == "min" else -np.inf)
+                (np.minimum if aggregate == "min" else np.maximum).at(extreme, inverse, values)
+                results[label] = extreme
+        return self._format(groups.tolist(), decoders, {k: v.tolist() for k, v in results.items()})
+
+    # --- fallback path -----------------------------------------------------
+
+    def _mask_python(self, filters: Dict[str, Any]) -> List[bool]:
+        mask = [True] * self.rows
+        for column, condition in filters.items():
+            if column in self.dimensions:
+                codes, values = self.dimensions[column]
+                wanted = {i for i, v in enumerate(values) if v in self._as_list(condition)}
+                keep = [code in wanted for code in codes]
+            elif column in self.measures:
+                values = self.measures[column]
+                if isinstance(condition, dict):
+                    low, high = condition.get("min"), condition.get("max")
+                    keep = [
+                        (low is None or v >= low) and (high is None or v <= high) for v in values
+                    ]
+                else:
+                    keep = [v == condition for v in values]
+            elif column in self.multi_valued:
+                offsets, codes, values = self.multi_valued[column]
+                wanted = {i for i, v in enumerate(values) if v in self._as_list(condition)}
+                keep = [
+                    any(codes[e] in wanted for e in range(offsets[r], offsets[r + 1]))
+                    for r in range(self.rows)
+                ]
+            else:
+                raise ValueError(f"Unknown filter column '{column}'")
+            mask = [m and k for m, k in zip(mask, keep)]
+        return mask
+
+    def _aggregate_python(self, mask: List[bool], group_by: List[str], metrics) -> List[Dict[str, Any]]:
+        pairs = [(row, 0) for row in range(self.rows) if mask[row]]
+        decoders = []
+        for column in group_by:
+            if column in self.dimensions:
+                codes, values = self.dimensions[column]
+                pairs = [(row, key * len(values) + codes[row]) for row, key in pairs]
+            else:
+                offsets, codes, values = self.multi_valued[column]
+                pairs = [
+                    (row, key * len(values) + codes[e])
+                    for row, key in pairs
+                    for e in range(offsets[row], offsets[row + 1])
+                ]
+            decoders.append((column, values))
+
+        members: Dict[int, List[int]] = defaultdict(list)
+        for row, key in pairs:
+            members[key].append(row)
+        groups = sorted(members)
+        results: Dict[str, List[Any]] = {}
+        for label, aggregate, measure in metrics:
+            if aggregate == "count":
+                results[label] = [len(members[g]) for g in groups]
+                continue
+            column = self.measures[measure]
+            per_group = [[column[row] for row in members[g]] for g in groups]
+            if aggregate == "sum":
+                results[label] = [float(sum(v)) for v in per_group]
+            elif aggregate == "avg":
+                results[label] = [sum(v) / len(v) for v in per_group]
+            else:
+                results[label] = [float((min if aggregate == "min" else max)(v)) for v in per_group]
+        return self._format(groups, decoders, results)
+
+    # --- shared ------------------------------------------------------------
+
+    @staticmethod
+    def _format(groups: List[int], decoders, results: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+        formatted = []
+        for i, key in enumerate(groups):
+            group = {}
+            for column, values in reversed(decoders):
+                key, code = divmod(key, len(values))
+                group[column] = values[code]
+            entry = {"group": dict(reversed(list(group.items())))}
+            for label, values in results.items():
+                value = values[i]
+                entry[label] = int(value) if label == "count" else round(float(value), 3)
+            formatted.append(entry)
+        return formatted
+
+    def query(
+        self,
+        filters: Optional[Dict[str, Any]] = None,
+        group_by: Optional[List[str]] = None,
+        metrics: Optional[List[str]] = None,
+        limit: int = 100,
+    ) -> Dict[str, Any]:
+        """Filter, group and aggregate the catalog.
+
+        filters maps a column to a value or list of values (dimensions and
+        multi-valued columns match any of them) or, for measures, a
+        {"min": ..., "max": ...} range. group_by lists dimensions and at most
+        one multi-valued column. metrics are "count" or "<agg>:<measure>";
+        groups are ordered by the first metric, descending.
+        """
+        started = time.perf_counter()
+        filters, group_by = filters or {}, group_by or []
+        parsed = self._parse_metrics(metrics)
+        for column in group_by:
+            if column not in self.dimensions and column not in self.multi_valued:
+                raise ValueError(f"Cannot group by '{column}'")
+        if sum(column in self.multi_valued for column in group_by) > 1:
+            raise ValueError("Group by at most one multi-valued column")
+
+        if np.available:
+            mask = self._mask_numpy(filters)
+            matched = int(mask.sum())
+            groups = self._aggregate_numpy(mask, group_by, parsed) if matched else []
+        else:
+            mask = self._mask_python(filters)
+            matched = sum(mask)
+            groups = self._aggregate_python(mask, group_by, parsed) if matched else []
+
+        first = parsed[0][0]
+        groups.sort(key=lambda g: g[first], reverse=True)
+        return {
+            "matched": matched,
+            "total_groups": len(groups),
+            "groups": groups[: min(limit, MAX_GROUPS)],
+            "backend": "numpy" if np.available else "python",
+            "query_ms": round((time.perf_counter() - started) * 1000, 3),
+        }
+
+
+class CatalogCache:
+    """Columnar catalog of one database, reloaded per index generation.
+
+    Queries are served from the loaded catalog; only the first one waits for
+    a load. At most once per poll interval a background thread reads the
+    index generation and, when it moved or the copy has aged out, loads a
+    new catalog and swaps it in while the old one keeps being served.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        max_age: float = CATALOG_MAX_AGE_SECONDS,
+        poll_seconds: float = CATALOG_POLL_SECONDS,
+    ):
+        self.db_path = db_path
+        self.max_age = max_age
+        self.poll_seconds = poll_seconds
+        self.catalog: Optional[ColumnarCatalog] = None
+        self.generation: Optional[int] = None
+        self.checked_at = 0.0
+        self.load_ms: Optional[float] = None
+        self.reloads = 0
+        self.last_error: Optional[str] = None
+        self._lock = threading.Lock()  # one load at a time
+        self._state_lock = threading.Lock()
+        self._reloader: Optional[threading.Thread] = None
+
+    def _refresh(self):
+        with self._lock:
+            conn = sqlite_tracing.connect(self.db_path)
+            try:
+                generation = index_generation(conn)
+                self.checked_at = time.monotonic()
+                if (
+                    self.catalog is not None
+                    and generation == self.generation
+                    and time.time() - self.catalog.loaded_at < self.max_age
+                ):
+                    return
+                started = time.perf_counter()
+                catalog = ColumnarCatalog.load(conn)
+            finally:
+                conn.close()
+            self.catalog, self.generation = catalog, generation
+            self.load_ms = round((time.perf_counter() - started) * 1000, 1)
+            self.reloads += 1
+
+    def _reload(self):
+        try:
+            self._refresh()
+            self.last_error = None
+        except sqlite3.Error as e:
+            # Keep serving the catalog we have; the next poll retries
+            self.last_error = str(e)
+            print(f"❌ Columnar catalog reload failed: {e}")
+
+    def get(self) -> ColumnarCatalog:
+        if self.catalog is None:
+            self._refresh()
+        elif time.monotonic() - self.checked_at >= self.poll_seconds:
+            with self._state_lock:
+                if self._reloader is None or not self._reloader.is_alive():
+                    self.checked_at = time.monotonic()
+                    self._reloader = threading.Thread(
+                        target=self._reload, name="columnar-catalog", daemon=True
+                    )
+                    self._reloader.start()
+        return self.catalog
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Unified API Gateway
+Serves every API app from one process: the documentation API plus the
+enhanced, analytics, AI, monitoring, user and integration apps, sharing one
+SQLite connection pool, one cache and one metrics registry. Sub-apps are
+imported and started on their first request.
+"""
+
+import asyncio
+import importlib
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from starlette.responses import JSONResponse
+
+# Sub-apps live in src/ and import each other by module name
+sys.path.append(str(Path(__file__).parent / "src"))
+
+import sqlite_tracing
+from request_metrics import RequestMetricsMiddleware
+from shared_cache import cache
+
+# Sub-apps to load at startup instead of on first request ("all" or names)
+PRELOAD = os.environ.get("GATEWAY_PRELOAD", "")
+
+
+class LazyApp:
+    """ASGI app imported, built and started on its first request.
+
+    Requests whose path starts with one of `prefixes` are routed here as-is
+    (the sub-app's routes already carry them). A `mount` prefix is stripped
+    and moved to root_path instead, for apps whose routes would clash.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        module: str,
+        factory: Union[str, Callable[[Any], Any]],
+        prefixes: Tuple[str, ...] = (),
+        mount: Optional[str] = None,
+    ):
+        self.name = name
+        self.module = module
+        self.factory = factory
+        self.prefixes = prefixes + ((mount,) if mount else ())
+        self.mount = mount
+        self.app = None
+        self.load_ms: Optional[float] = None
+        self.error: Optional[str] = None
+        self._lock: Optional[asyncio.Lock] = None
+
+    def matches(self, path: str) -> bool:
+        return any(path == p or path.startswith(p + "/") for p in self.prefixes)
+
+    def _build(self):
+        module = importlib.import_module(self.module)
+        if isinstance(self.factory, str):
+            return getattr(module, self.factory)
+        return self.factory(module)
+
+    async def load(self):
+        """Import and start the sub-app once; concurrent first requests wait."""
+        if self.app is not None:
+            return self.app
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self.app is None:
+                started = time.perf_counter()
+                # Imports and app construction may touch the database: keep
+                # them off the event loop
+                app = await asyncio.to_thread(self._build)
+                await app.router.startup()
+                self.load_ms = round((time.perf_counter() - started) * 1000, 1)
+                self.error = None
+                self.app = app
+                print(f"✅ Gateway: loaded {self.name} in {self.load_ms}ms")
+        return self.app
+
+    async def shutdown(self):
+        if self.app is not None:
+            await self.app.router.shutdown()
+
+    async def __call__(self, scope, receive, send):
+        try:
+            app = await self.load()
+        except Exception as e:
+            self.error = str(e)
+            print(f"❌ Gateway: failed to load {self.name}: {e}")
+            if scope["type"] == "http":
+                response = JSONResponse(
+                    {"detail": f"Service '{self.name}' is unavailable"}, status_code=503
+                )
+                await response(scope, receive, send)
+            return
+        if self.mount:
+            # Updated in place, like Starlette's Mount, so the outer metrics
+            # middleware sees the final route
+            scope["root_path"] = scope.get("root_path", "") + self.mount
+            scope["path"] = scope["path"][len(self.mount):] or "/"
+        await app(scope, receive, send)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "prefixes": list(self.prefixes) or ["/"],
+            "loaded": self.app is not None,
+            "load_ms": self.load_ms,
+            "error": self.error,
+        }
+
+
+# Routed by path prefix in order; the documentation API serves everything else
+SUB_APPS: List[LazyApp] = [
+    LazyApp("enhanced", "enhanced_api", lambda m: m.EnhancedAPI().app, mount="/enhanced"),
+    LazyApp("analytics", "analytics_engine", "analytics_app", ("/analytics",)),
+    LazyApp("ai", "ai_assistant", "ai_app", ("/chat",)),
+    LazyApp("monitor", "performance_monitor", "monitor_app", ("/monitor",)),
+    LazyApp("users", "user_management", "user_app", ("/auth", "/users", "/admin")),
+    LazyApp("integrations", "integration_hub", "integration_app", ("/integrations", "/webhooks")),
+]
+DEFAULT_APP = LazyApp("api", "api_server", "app")
+
+
+class Gateway:
+    """Pure ASGI router over lazily started sub-apps with shared lifespan."""
+
+    def __init__(self, apps: List[LazyApp], default: LazyApp):
+        self.apps = apps
+        self.default = default
+
+    def route(self, path: str) -> LazyApp:
+        for app in self.apps:
+            if app.matches(path):
+                return app
+        return self.default
+
+    def all_apps(self) -> List[LazyApp]:
+        return self.apps + [self.default]
+
+    async def startup(self):
+        sqlite_tracing.connection_pool.enabled = True
+        names = {n.strip() for n in PRELOAD.split(",") if n.strip()}
+        for app in self.all_apps():
+            if "all" in names or app.name in names:
+                await app.load()
+
+    async def shutdown(self):
+        for app in self.all_apps():
+            try:
+                await app.shutdown()
+            except Exception as e:
+                print(f"Gateway: error shutting down {app.name}: {e}")
+        sqlite_tracing.connection_pool.enabled = False
+        sqlite_tracing.connection_pool.close_all()
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    await self.startup()
+                except Exception as e:
+                    await send({"type": "lifespan.startup.failed", "message": str(e)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.shutdown()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "apps": {app.name: app.status() for app in self.all_apps()},
+            "connection_pool": sqlite_tracing.connection_pool.stats(),
+            "cache": cache.stats(),
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] == "http" and scope["path"] == "/gateway/status":
+            await JSONResponse(self.status())(scope, receive, send)
+            return
+        await self.route(scope["path"])(scope, receive, send)
+
+
+gateway = Gateway(SUB_APPS, DEFAULT_APP)
+
+# One request metrics middleware for every sub-app (theirs step aside)
+app = RequestMetricsMiddleware(gateway)
+
+
+def run_gateway(host: str = "127.0.0.1", port: int = 8000):
+    """Run every API app in one uvicorn process."""
+    import uvicorn
+
+    os.environ.setdefault("WORKFLOW_DB_PATH", "database/workflows.db")
+    print(f"🌐 Gateway at http://{host}:{port} (status: /gateway/status)")
+    uvicorn.run("gateway:app", host=host, port=port, log_level="info")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="N8N Workflows Unified API Gateway")
+    parser.add_argument("--host", default="127.0.0.1", help="Host to bind to")
+    parser.add_argument("--port", type=int, default=8000, help="Port to bind to")
+    args = parser.parse_args()
+
+    run_gateway(host=args.host, port=args.port)
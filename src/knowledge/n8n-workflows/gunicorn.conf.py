@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Gunicorn Configuration
+Multi-worker serving: the app is preloaded and warmed in the master, then
+forked into uvicorn workers that share the index pages copy-on-write and
+open the workflow database read-only.
+
+    gunicorn -c gunicorn.conf.py api_server:app
+"""
+
+import gc
+import multiprocessing
+import os
+
+# Workers never run DDL or reindex; run.py builds the index before forking
+os.environ.setdefault("WORKFLOW_DB_PATH", "database/workflows.db")
+os.environ.setdefault("WORKFLOW_DB_READONLY", "1")
+# Per-process limiter state would multiply limits by the worker count
+os.environ.setdefault("RATE_LIMIT_BACKEND", "sqlite")
+
+bind = os.environ.get("BIND", "127.0.0.1:8000")
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = 60
+graceful_timeout = 30
+keepalive = 5
+
+
+def when_ready(server):
+    """Warm the preloaded app in the master so workers fork with it ready."""
+    import api_server
+
+    api_server.warmup()
+    # Keep the cyclic GC from touching (and so copying) inherited objects
+    gc.freeze()
+    state = api_server.warmup_state
+    server.log.info(
+        "Warmed %s workflows (%d bytes) in %sms before forking %d workers",
+        state["stats"]["total"],
+        state["warmed_bytes"],
+        state["duration_ms"],
+        server.num_workers,
+    )
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Latency Histogram
+HDR-style log-linear histogram with fixed memory and bounded relative error,
+used for request latency tracking and load-test reporting.
+"""
+
+from array import array
+from typing import Dict, Any, Iterable
+
+# 2**SUB_BUCKET_BITS linear sub-buckets per power of two (~1.6% relative error)
+SUB_BUCKET_BITS = 6
+SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+
+# Highest trackable value in microseconds (about one hour); larger values clamp
+MAX_TRACKABLE_US = 1 << 32
+
+
+def _bucket_index(value: int) -> int:
+    """Map a non-negative integer value to its bucket index."""
+    if value < SUB_BUCKET_COUNT:
+        return value
+    shift = value.bit_length() - 1 - SUB_BUCKET_BITS
+    mantissa = value >> shift
+    return (shift + 1) * SUB_BUCKET_COUNT + (mantissa - SUB_BUCKET_COUNT)
+
+
+def _bucket_bounds(index: int) -> tuple:
+    """Return the (lowest, highest) value that maps to a bucket index."""
+    if index < SUB_BUCKET_COUNT:
+        return index, index
+    shift = index // SUB_BUCKET_COUNT - 1
+    mantissa = SUB_BUCKET_COUNT + index % SUB_BUCKET_COUNT
+    return mantissa << shift, ((mantissa + 1) << shift) - 1
+
+
+BUCKET_COUNT = _bucket_index(MAX_TRACKABLE_US) + 1
+
+
+class LatencyHistogram:
+    """Fixed-size latency histogram recording durations in microseconds."""
+
+    __slots__ = ("counts", "count", "total_us", "min_us", "max_us")
+
+    def __init__(self):
+        self.counts = array("Q", bytes(8 * BUCKET_COUNT))
+        self.reset()
+
+    def reset(self):
+        """Clear all recorded values."""
+        for i in range(BUCKET_COUNT):
+            self.counts[i] = 0
+        self.count = 0
+        self.total_us = 0
+        self.min_us = 0
+        self.max_us = 0
+
+    def record(self, seconds: float):
+        """Record one duration given in seconds."""
+        self.record_us(int(seconds * 1_000_000))
+
+    def record_us(self, value: int):
+        """Record one duration given in microseconds."""
+        value = min(max(value, 0), MAX_TRACKABLE_US)
+        self.counts[_bucket_index(value)] += 1
+        if self.count == 0 or value < self.min_us:
+            self.min_us = value
+        if value > self.max_us:
+            self.max_us = value
+        self.count += 1
+        self.total_us += value
+
+    def merge(self, other: "LatencyHistogram"):
+        """Add all values recorded in another histogram."""
+        if other.count == 0:
+            return
+        for i, n in enumerate(other.counts):
+            if n:
+                self.counts[i] += n
+        self.min_us = other.min_us if self.count == 0 else min(self.min_us, other.min_us)
+        self.max_us = max(self.max_us, other.max_us)
+        self.count += other.count
+        self.total_us += other.total_us
+
+    def percentile_us(self, percentile: float) -> int:
+        """Value (µs) at or below which `percentile` percent of samples fall."""
+        if self.count == 0:
+            return 0
+        target = max(1, int(round(self.count * percentile / 100.0)))
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n:
+                seen += n
+                if seen >= target:
+                    low, high = _bucket_bounds(i)
+                    return min((low + high) // 2, self.max_us)
+        return self.max_us
+
+    def percentile_ms(self, percentile: float) -> float:
+        return round(self.percentile_us(percentile) / 1000.0, 3)
+
+    def mean_ms(self) -> float:
+        return round(self.total_us / self.count / 1000.0, 3) if self.count else 0.0
+
+    def buckets(self) -> Iterable[tuple]:
+        """Yield (upper_bound_us, count) for every non-empty bucket."""
+        for i, n in enumerate(self.counts):
+            if n:
+                yield _bucket_bounds(i)[1], n
+
+    def summary(self) -> Dict[str, Any]:
+        """Summary with the standard latency percentiles in milliseconds."""
+        return {
+            "count": self.count,
+            "mean_ms": self.mean_ms(),
+            "min_ms": round(self.min_us / 1000.0, 3),
+            "p50_ms": self.percentile_ms(50),
+            "p95_ms": self.percentile_ms(95),
+            "p99_ms": self.percentile_ms(99),
+            "p999_ms": self.percentile_ms(99.9),
+            "max_ms": round(self.max_us / 1000.0, 3),
+        }
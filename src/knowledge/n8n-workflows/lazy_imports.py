@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Lazy Imports
+Module stand-ins that defer importing heavy optional dependencies (psutil,
+jwt, httpx...) until first use, keeping app import and cold start fast.
+"""
+
+import importlib
+import importlib.util
+import threading
+from types import ModuleType
+from typing import Optional
+
+
+class LazyModule:
+    """Imports `name` on first attribute access and forwards to it.
+
+    Use as a drop-in for a module-level import: `httpx = LazyModule("httpx")`.
+    Attribute lookups in annotations or default arguments happen at
+    definition time and would defeat the deferral, so keep those as strings.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module: Optional[ModuleType] = None
+        self._available: Optional[bool] = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> ModuleType:
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return self._module
+
+    @property
+    def loaded(self) -> bool:
+        return self._module is not None
+
+    @property
+    def available(self) -> bool:
+        """Whether the module is installed, found without importing it."""
+        if self._available is None:
+            self._available = self._module is not None or importlib.util.find_spec(self._name) is not None
+        return self._available
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
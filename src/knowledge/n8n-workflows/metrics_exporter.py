@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Metrics Exporter
+Prometheus text-format exporter for request latency, SQLite query timings,
+indexer counters and other internals. Recording is a counter bump or a
+histogram increment; all formatting happens at scrape time.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import sqlite_tracing
+from latency_histogram import LatencyHistogram
+from request_metrics import UNMATCHED_ROUTE, RequestMetrics, request_metrics
+from shared_cache import cache
+
+# PlainTextResponse appends the charset
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+# Prometheus histogram bucket upper bounds, in seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class TimingRegistry:
+    """Labelled latency histograms, e.g. SQLite query timings by query kind."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.histograms: Dict[str, LatencyHistogram] = {}
+
+    def record(self, label: str, seconds: float):
+        with self._lock:
+            histogram = self.histograms.get(label)
+            if histogram is None:
+                histogram = self.histograms[label] = LatencyHistogram()
+            histogram.record(seconds)
+
+    @contextmanager
+    def time(self, label: str) -> Iterator[None]:
+        """Time the enclosed block under `label`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(label, time.perf_counter() - start)
+
+    def bucket_snapshot(self) -> List[Tuple[str, List[int], int, float]]:
+        """(label, cumulative bucket counts, count, sum in seconds) per label."""
+        with self._lock:
+            return [
+                (label, *_cumulative_buckets(histogram))
+                for label, histogram in self.histograms.items()
+            ]
+
+
+class CounterSet:
+    """Named numeric counters and gauges."""
+
+    def __init__(self, **initial: float):
+        self._lock = threading.Lock()
+        self.values: Dict[str, float] = dict(initial)
+
+    def inc(self, name: str, amount: float = 1):
+        with self._lock:
+            self.values[name] = self.values.get(name, 0) + amount
+
+    def set(self, name: str, value: float):
+        with self._lock:
+            self.values[name] = value
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self.values)
+
+
+def _cumulative_buckets(histogram: LatencyHistogram) -> Tuple[List[int], int, float]:
+    """Fold an HDR histogram into cumulative LATENCY_BUCKETS counts."""
+    counts = [0] * len(LATENCY_BUCKETS)
+    for upper_us, n in histogram.buckets():
+        seconds = upper_us / 1_000_000
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                counts[i] += n
+                break
+    running = 0
+    for i, n in enumerate(counts):
+        running += n
+        counts[i] = running
+    return counts, histogram.count, histogram.total_us / 1_000_000
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items()) + "}"
+
+
+def _number(value: float) -> str:
+    if isinstance(value, float) and not value.is_integer():
+        return repr(round(value, 6))
+    return str(int(value))
+
+
+class MetricsWriter:
+    """Accumulates Prometheus text exposition lines, grouped by metric family."""
+
+    def __init__(self):
+        self.families: Dict[str, List[str]] = {}
+
+    def _family(self, name: str, kind: str, help_text: str) -> List[str]:
+        lines = self.families.get(name)
+        if lines is None:
+            lines = self.families[name] = [
+                f"# HELP {name} {help_text}",
+                f"# TYPE {name} {kind}",
+            ]
+        return lines
+
+    def counter(self, name: str, help_text: str, value: float, **labels: str):
+        self._family(name, "counter", help_text).append(
+            f"{name}{_labels(labels)} {_number(value)}"
+        )
+
+    def gauge(self, name: str, help_text: str, value: float, **labels: str):
+        self._family(name, "gauge", help_text).append(
+            f"{name}{_labels(labels)} {_number(value)}"
+        )
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        buckets: List[int],
+        count: int,
+        total: float,
+        **labels: str,
+    ):
+        lines = self._family(name, "histogram", help_text)
+        for bound, cumulative in zip(LATENCY_BUCKETS, buckets):
+            lines.append(f"{name}_bucket{_labels({**labels, 'le': repr(bound)})} {cumulative}")
+        lines.append(f"{name}_bucket{_labels({**labels, 'le': '+Inf'})} {count}")
+        lines.append(f"{name}_sum{_labels(labels)} {_number(total)}")
+        lines.append(f"{name}_count{_labels(labels)} {count}")
+
+    def render(self) -> str:
+        return "".join(line + "\n" for lines in self.families.values() for line in lines)
+
+
+# SQLite query timings by kind (fts, list, category, stats, detail)
+query_timings = TimingRegistry()
+
+# Indexer counters, updated at the end of every index run
+indexer_counters = CounterSet(
+    runs=0, processed=0, skipped=0, errors=0, files_hashed=0,
+    duration_seconds=0.0, last_duration_seconds=0.0,
+)
+
+# Database connection counters
+connection_counters = CounterSet(opened=0)
+
+# Extra collectors registered by apps (rate limiter, caches, pools...)
+_collectors: List[Callable[[MetricsWriter], None]] = []
+
+
+def register_collector(collector: Callable[[MetricsWriter], None]):
+    """Register a callable that writes additional metrics at scrape time."""
+    if collector not in _collectors:
+        _collectors.append(collector)
+
+
+def _write_requests(writer: MetricsWriter, metrics: RequestMetrics):
+    writer.gauge(
+        "http_requests_in_flight", "Requests currently being served", metrics.in_flight
+    )
+    for route, entry in metrics.export_snapshot(_cumulative_buckets):
+        method, _, path = route.partition(" ")
+        labels = {"method": method, "route": path} if path else {
+            "method": "", "route": UNMATCHED_ROUTE
+        }
+        for status, n in entry["status_codes"].items():
+            writer.counter(
+                "http_requests_total", "HTTP requests served", n, **labels, status=str(status)
+            )
+        writer.counter(
+            "http_response_bytes_total", "HTTP response body bytes sent",
+            entry["bytes_out"], **labels,
+        )
+        writer.histogram(
+            "http_request_duration_seconds", "HTTP request latency",
+            *entry["histogram"], **labels,
+        )
+
+
+def render_metrics(metrics: Optional[RequestMetrics] = None) -> str:
+    """Render every registered metric in the Prometheus text format."""
+    writer = MetricsWriter()
+    _write_requests(writer, metrics or request_metrics)
+
+    for kind, buckets, count, total in query_timings.bucket_snapshot():
+        writer.histogram(
+            "sqlite_query_duration_seconds", "SQLite query latency by query kind",
+            buckets, count, total, kind=kind,
+        )
+
+    indexer = indexer_counters.snapshot()
+    for name in ("runs", "processed", "skipped", "errors", "files_hashed"):
+        writer.counter(f"indexer_{name}_total", f"Indexer {name.replace('_', ' ')}", indexer[name])
+    writer.counter(
+        "indexer_duration_seconds_total", "Total indexer wall time", indexer["duration_seconds"]
+    )
+    writer.gauge(
+        "indexer_last_duration_seconds", "Wall time of the last index run",
+        indexer["last_duration_seconds"],
+    )
+
+    writer.counter(
+        "sqlite_connections_opened_total", "SQLite connections opened",
+        connection_counters.snapshot()["opened"],
+    )
+
+    log = sqlite_tracing.query_log
+    writer.counter("sqlite_statements_total", "SQLite statements executed", log.statements)
+    writer.counter(
+        "sqlite_slow_statements_total", "SQLite statements over the slow threshold",
+        log.slow_statements,
+    )
+
+    pool = sqlite_tracing.connection_pool.stats()
+    writer.counter(
+        "sqlite_pool_connections_opened_total", "Connections opened by the shared pool",
+        pool["opened"],
+    )
+    writer.counter(
+        "sqlite_pool_reuses_total", "Pooled connections handed out again", pool["reused"]
+    )
+    writer.gauge("sqlite_pool_idle_connections", "Idle pooled connections", pool["idle"])
+
+    cached = cache.stats()
+    writer.gauge("shared_cache_entries", "Entries in the shared cache", cached["entries"])
+    for name in ("hits", "misses", "evictions"):
+        writer.counter(f"shared_cache_{name}_total", f"Shared cache {name}", cached[name])
+
+    for collector in list(_collectors):
+        try:
+            collector(writer)
+        except Exception as e:
+            print(f"Metrics collector error: {e}")
+
+    return writer.render()
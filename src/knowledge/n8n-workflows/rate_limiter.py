@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Rate Limiter
+Sliding-window-counter rate limiting with O(1) state per client, idle
+eviction, an in-process or shared SQLite backend, and per-route ASGI
+middleware.
+"""
+
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+from starlette.routing import compile_path
+
+# In-process backend bounds: clients tracked before LRU eviction
+MAX_TRACKED_KEYS = 100_000
+
+# Shared backend: prune idle rows every this many hits
+SQLITE_PRUNE_EVERY = 1000
+
+# Shared backend: seconds to wait for the write lock before failing open
+SQLITE_BUSY_TIMEOUT = 0.25
+
+RATE_LIMIT_DETAIL = "Rate limit exceeded. Please try again later."
+
+
+def _slide(
+    state: Optional[List[float]], now: float, limit: int, window: float
+) -> Tuple[List[float], bool, float]:
+    """Apply one hit to [window_id, current, previous] state.
+
+    The request count over the last `window` seconds is estimated as the
+    previous fixed window's count weighted by its remaining overlap plus the
+    current window's count. Returns (new state, allowed, retry_after).
+    """
+    window_id = math.floor(now / window)
+    if state is None or state[0] < window_id - 1:
+        current, previous = 0, 0
+    elif state[0] == window_id - 1:
+        current, previous = 0, state[1]
+    else:
+        current, previous = state[1], state[2]
+
+    elapsed = (now % window) / window
+    estimated = previous * (1 - elapsed) + current
+    if estimated + 1 > limit:
+        retry_after = window - (now % window)
+        return [window_id, current, previous], False, retry_after
+    return [window_id, current + 1, previous], True, 0.0
+
+
+class MemoryBackend:
+    """Per-process sliding-window state in a bounded LRU map."""
+
+    # Hits only take an in-memory lock; safe to run on the event loop
+    blocking = False
+
+    def __init__(self, max_keys: int = MAX_TRACKED_KEYS):
+        self.max_keys = max_keys
+        self.states: "OrderedDict[str, List[float]]" = OrderedDict()
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def hit(self, key: str, limit: int, window: float) -> Tuple[bool, float]:
+        now = time.time()
+        with self._lock:
+            entry = self.states.get(key)
+            state, allowed, retry_after = _slide(entry, now, limit, window)
+            # State is dropped once two windows pass without a hit
+            self.states[key] = state + [now + 2 * window]
+            self.states.move_to_end(key)
+            self._evict(now)
+        return allowed, retry_after
+
+    def _evict(self, now: float):
+        # Least recently used keys sit at the front: drop expired ones, then overflow
+        while self.states:
+            key, state = next(iter(self.states.items()))
+            if state[3] >= now and len(self.states) <= self.max_keys:
+                break
+            del self.states[key]
+            self.evictions += 1
+
+    def size(self) -> int:
+        return len(self.states)
+
+
+class SQLiteBackend:
+    """Sliding-window state in a SQLite file shared by every worker on the host."""
+
+    # Hits wait on a file lock; the middleware runs them in the threadpool
+    blocking = True
+
+    def __init__(self, path: str):
+        self.path = path
+        self.evictions = 0
+        self._local = threading.local()
+        self._hits = 0
+        conn = self._connection()
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS rate_limits (
+                key TEXT PRIMARY KEY,
+                window_id INTEGER NOT NULL,
+                current INTEGER NOT NULL,
+                previous INTEGER NOT NULL,
+                expires REAL NOT NULL
+            ) WITHOUT ROWID
+            """
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        # A connection inherited across fork() must not be used by the child
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=SQLITE_BUSY_TIMEOUT, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # Limits are advisory: trade durability for latency
+            conn.execute("PRAGMA synchronous=OFF")
+            conn.execute("PRAGMA mmap_size=8388608")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def hit(self, key: str, limit: int, window: float) -> Tuple[bool, float]:
+        now = time.time()
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT window_id, current, previous FROM rate_limits WHERE key = ?",
+                (key,),
+            ).fetchone()
+            state, allowed, retry_after = _slide(
+                list(row) if row else None, now, limit, window
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO rate_limits VALUES (?, ?, ?, ?, ?)",
+                (key, *state, now + 2 * window),
+            )
+            self._hits += 1
+            if self._hits % SQLITE_PRUNE_EVERY == 0:
+                cursor = conn.execute("DELETE FROM rate_limits WHERE expires < ?", (now,))
+                self.evictions += cursor.rowcount
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return allowed, retry_after
+
+    def size(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM rate_limits").fetchone()[0]
+
+
+class RateLimiter:
+    """Named limits (scope -> requests per window) checked against a backend."""
+
+    def __init__(self, backend=None):
+        self.backend = backend or MemoryBackend()
+        self.enabled = True
+        self.rejected = 0
+        self.limits: Dict[str, Tuple[int, float]] = {}
+
+    def set_limit(self, scope: str, limit: int, window_seconds: float = 60):
+        self.limits[scope] = (limit, window_seconds)
+
+    def check(self, scope: str, client: str) -> Tuple[bool, float]:
+        """Count a hit for client in scope; returns (allowed, retry_after seconds)."""
+        if not self.enabled or scope not in self.limits:
+            return True, 0.0
+        limit, window = self.limits[scope]
+        try:
+            allowed, retry_after = self.backend.hit(f"{scope}:{client}", limit, window)
+        except sqlite3.Error as e:
+            # Fail open: a broken shared store must not take the API down
+            print(f"Rate limiter backend error: {e}")
+            return True, 0.0
+        if not allowed:
+            self.rejected += 1
+        return allowed, retry_after
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": type(self.backend).__name__,
+            "tracked_keys": self.backend.size(),
+            "evictions": self.backend.evictions,
+            "rejected": self.rejected,
+            "limits": {k: {"limit": l, "window_seconds": w} for k, (l, w) in self.limits.items()},
+        }
+
+
+def create_rate_limiter() -> RateLimiter:
+    """Limiter configured from RATE_LIMIT_BACKEND (memory|sqlite) and RATE_LIMIT_DB."""
+    if os.environ.get("RATE_LIMIT_BACKEND", "memory") == "sqlite":
+        path = os.environ.get("RATE_LIMIT_DB", "database/rate_limits.db")
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        return RateLimiter(SQLiteBackend(path))
+    return RateLimiter(MemoryBackend())
+
+
+class RateLimitMiddleware:
+    """Pure ASGI middleware applying limiter scopes to (method, route template) pairs."""
+
+    def __init__(self, app, limiter: RateLimiter, routes: Dict[Tuple[str, str], str]):
+        self.app = app
+        self.limiter = limiter
+        self.routes = [
+            (method, compile_path(path)[0], scope) for (method, path), scope in routes.items()
+        ]
+
+    def _scope_for(self, method: str, path: str) -> Optional[str]:
+        for route_method, pattern, scope in self.routes:
+            if route_method == method and pattern.match(path):
+                return scope
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.limiter.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        limit_scope = self._scope_for(scope["method"], scope["path"])
+        if limit_scope is not None:
+            client = scope.get("client")
+            client_ip = client[0] if client else "unknown"
+            if self.limiter.backend.blocking:
+                allowed, retry_after = await run_in_threadpool(
+                    self.limiter.check, limit_scope, client_ip
+                )
+            else:
+                allowed, retry_after = self.limiter.check(limit_scope, client_ip)
+            if not allowed:
+                body = json.dumps({"detail": RATE_LIMIT_DETAIL}).encode()
+                await send(
+                    {
+                        "type": "http.response.start",
+                        "status": 429,
+                        "headers": [
+                            (b"content-type", b"application/json"),
+                            (b"content-length", str(len(body)).encode()),
+                            (b"retry-after", str(math.ceil(retry_after)).encode()),
+                        ],
+                    }
+                )
+                await send({"type": "http.response.body", "body": body})
+                return
+
+        await self.app(scope, receive, send)
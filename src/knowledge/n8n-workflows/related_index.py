@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Related Workflows Index
+Feature sets (integrations, node types and node-type edges) per workflow,
+MinHash signatures and LSH banding to find candidate pairs in near-linear
+time, and exact Jaccard scoring of the candidates into top-k lists.
+"""
+
+import hashlib
+import heapq
+import random
+from collections import defaultdict
+from typing import Dict, Iterable, List, Any, Optional, Set, Tuple
+
+# MinHash signature length, split into LSH_BANDS bands of equal width.
+# 16 bands x 4 rows puts the 50% detection point near Jaccard 0.5.
+NUM_PERMUTATIONS = 64
+LSH_BANDS = 16
+
+# Related workflows stored per workflow, and the minimum Jaccard to keep one
+RELATED_TOP_K = 10
+MIN_SIMILARITY = 0.2
+
+# Members of an oversized LSH bucket are only compared with this many
+# neighbours, so hub buckets (e.g. "Webhook + HTTP Request") stay linear
+MAX_BUCKET_NEIGHBOURS = 24
+
+# Node types that say nothing about what a workflow does
+IGNORED_NODE_TYPES = {"stickynote", "noop"}
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def _node_type(node: Dict[str, Any]) -> str:
+    return str(node.get("type", "")).rsplit(".", 1)[-1].lower()
+
+
+def workflow_features(
+    integrations: Iterable[str], nodes: List[Dict], connections: Dict[str, Any]
+) -> List[str]:
+    """Sorted feature tokens: integrations, node types and node-type edges."""
+    features: Set[str] = {f"i:{name.lower()}" for name in integrations}
+    types_by_name = {}
+    for node in nodes:
+        if not isinstance(node, dict):
+            continue
+        node_type = _node_type(node)
+        if node_type and node_type not in IGNORED_NODE_TYPES:
+            features.add(f"n:{node_type}")
+            types_by_name[node.get("name")] = node_type
+
+    # Node-type shingles over the connection graph: "e:webhook>slack"
+    if isinstance(connections, dict):
+        for source, outputs in connections.items():
+            source_type = types_by_name.get(source)
+            if not source_type or not isinstance(outputs, dict):
+                continue
+            for branch in outputs.get("main", []) or []:
+                for link in branch or []:
+                    target_type = isinstance(link, dict) and types_by_name.get(link.get("node"))
+                    if target_type:
+                        features.add(f"e:{source_type}>{target_type}")
+    return sorted(features)
+
+
+class MinHasher:
+    """MinHash signatures with a per-token cache; tokens repeat across a corpus."""
+
+    def __init__(self, num_permutations: int = NUM_PERMUTATIONS, seed: int = 1):
+        rng = random.Random(seed)
+        self.permutations = [
+            (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+            for _ in range(num_permutations)
+        ]
+        self._token_cache: Dict[str, Tuple[int, ...]] = {}
+        self._empty = (_MAX_HASH,) * num_permutations
+
+    def _token_signature(self, token: str) -> Tuple[int, ...]:
+        cached = self._token_cache.get(token)
+        if cached is None:
+            x = int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), "big")
+            cached = self._token_cache[token] = tuple(
+                ((a * x + b) % _MERSENNE_PRIME) & _MAX_HASH for a, b in self.permutations
+            )
+        return cached
+
+    def signature(self, tokens: Iterable[str]) -> Tuple[int, ...]:
+        vectors = [self._token_signature(t) for t in tokens]
+        if not vectors:
+            return self._empty
+        if len(vectors) == 1:
+            return vectors[0]
+        return tuple(map(min, *vectors))
+
+
+def jaccard(a: frozenset, b: frozenset) -> float:
+    if not a or not b:
+        return 0.0
+    intersection = len(a & b)
+    return intersection / (len(a) + len(b) - intersection)
+
+
+def candidate_pairs(signatures: Dict[int, Tuple[int, ...]], bands: int = LSH_BANDS) -> Set[Tuple[int, int]]:
+    """Pairs of ids sharing at least one LSH band."""
+    rows = len(next(iter(signatures.values()))) // bands if signatures else 0
+    pairs: Set[Tuple[int, int]] = set()
+    for band in range(bands):
+        buckets: Dict[Tuple[int, ...], List[int]] = defaultdict(list)
+        lo, hi = band * rows, (band + 1) * rows
+        for workflow_id, signature in signatures.items():
+            buckets[signature[lo:hi]].append(workflow_id)
+        for members in buckets.values():
+            if len(members) < 2:
+                continue
+            members.sort()
+            # Small buckets: all pairs; large ones: a sliding neighbour window
+            window = min(len(members) - 1, MAX_BUCKET_NEIGHBOURS)
+            for i, a in enumerate(members):
+                for b in members[i + 1 : i + 1 + window]:
+                    pairs.add((a, b))
+    return pairs
+
+
+def build_related(
+    features: Dict[int, List[str]],
+    top_k: int = RELATED_TOP_K,
+    min_similarity: float = MIN_SIMILARITY,
+    hasher: Optional[MinHasher] = None,
+) -> Tuple[Dict[int, List[Tuple[float, int]]], Dict[str, int]]:
+    """Top-k (score, related id) per workflow id, best first, plus build counters."""
+    hasher = hasher or MinHasher()
+    sets = {wid: frozenset(tokens) for wid, tokens in features.items() if tokens}
+    signatures = {wid: hasher.signature(tokens) for wid, tokens in sets.items()}
+    pairs = candidate_pairs(signatures)
+
+    best: Dict[int, List[Tuple[float, int]]] = defaultdict(list)
+    kept = 0
+    for a, b in pairs:
+        score = jaccard(sets[a], sets[b])
+        if score < min_similarity:
+            continue
+        kept += 1
+        for source, target in ((a, b), (b, a)):
+            heap = best[source]
+            # Ties prefer the lower id so rebuilds are deterministic
+            entry = (score, -target)
+            if len(heap) < top_k:
+                heapq.heappush(heap, entry)
+            elif entry > heap[0]:
+                heapq.heapreplace(heap, entry)
+
+    related = {
+        wid: [(round(score, 4), -neg_id) for score, neg_id in sorted(heap, reverse=True)]
+        for wid, heap in best.items()
+    }
+    return related, {"workflows": len(sets), "candidate_pairs": len(pairs), "pairs_kept": kept}
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Request Metrics
+ASGI middleware and registry recording real per-route latency histograms,
+status codes, in-flight requests and bytes sent, with sliding-window views
+for monitoring and alerting.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from latency_histogram import LatencyHistogram
+
+# Sliding windows are built from fixed time slots: 12 x 5s = last 60 seconds
+SLOT_SECONDS = 5
+WINDOW_SLOTS = 12
+
+# Cap on distinct route labels; unmatched paths share one label
+MAX_ROUTES = 256
+UNMATCHED_ROUTE = "unmatched"
+
+# Scope flag set by the outermost middleware so nested apps don't double count
+TIMED_SCOPE_KEY = "request_metrics.timed"
+
+
+class _Slot:
+    """Counters and latency histogram for one time slot of one route."""
+
+    __slots__ = ("slot_id", "histogram", "requests", "errors", "client_errors", "bytes_out")
+
+    def __init__(self):
+        self.slot_id = -1
+        self.histogram = LatencyHistogram()
+        self.requests = 0
+        self.errors = 0
+        self.client_errors = 0
+        self.bytes_out = 0
+
+    def reset(self, slot_id: int):
+        self.slot_id = slot_id
+        self.histogram.reset()
+        self.requests = 0
+        self.errors = 0
+        self.client_errors = 0
+        self.bytes_out = 0
+
+
+class RouteMetrics:
+    """Lifetime totals plus a ring of time slots for one route."""
+
+    def __init__(self):
+        self.histogram = LatencyHistogram()
+        self.requests = 0
+        self.bytes_out = 0
+        self.status_codes: Dict[int, int] = {}
+        self.slots = [None] * WINDOW_SLOTS
+
+    def record(self, slot_id: int, status: int, seconds: float, bytes_out: int):
+        self.histogram.record(seconds)
+        self.requests += 1
+        self.bytes_out += bytes_out
+        self.status_codes[status] = self.status_codes.get(status, 0) + 1
+
+        index = slot_id % WINDOW_SLOTS
+        slot = self.slots[index]
+        if slot is None:
+            slot = self.slots[index] = _Slot()
+        if slot.slot_id != slot_id:
+            slot.reset(slot_id)
+        slot.histogram.record(seconds)
+        slot.requests += 1
+        slot.bytes_out += bytes_out
+        if status >= 500:
+            slot.errors += 1
+        elif status >= 400:
+            slot.client_errors += 1
+
+    def window_slots(self, current_slot: int, slots: int):
+        oldest = current_slot - slots
+        for slot in self.slots:
+            if slot is not None and oldest < slot.slot_id <= current_slot:
+                yield slot
+
+
+class RequestMetrics:
+    """Thread-safe registry of per-route request metrics."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.routes: Dict[str, RouteMetrics] = {}
+        self.in_flight = 0
+        self.started_at = time.time()
+
+    @staticmethod
+    def _slot_id(now: Optional[float] = None) -> int:
+        return int((now if now is not None else time.time()) // SLOT_SECONDS)
+
+    @staticmethod
+    def _slot_count(window_seconds: float) -> int:
+        return max(1, min(WINDOW_SLOTS, int(round(window_seconds / SLOT_SECONDS))))
+
+    def record(self, route: str, status: int, seconds: float, bytes_out: int = 0):
+        """Record one finished request."""
+        slot_id = self._slot_id()
+        with self._lock:
+            metrics = self.routes.get(route)
+            if metrics is None:
+                if len(self.routes) >= MAX_ROUTES:
+                    route = UNMATCHED_ROUTE
+                metrics = self.routes.setdefault(route, RouteMetrics())
+            metrics.record(slot_id, status, seconds, bytes_out)
+
+    def window_histogram(self, route: str, window_seconds: float) -> LatencyHistogram:
+        """Merged latency histogram of one route over the sliding window."""
+        merged = LatencyHistogram()
+        current = self._slot_id()
+        with self._lock:
+            metrics = self.routes.get(route)
+            if metrics is not None:
+                for slot in metrics.window_slots(current, self._slot_count(window_seconds)):
+                    merged.merge(slot.histogram)
+        return merged
+
+    def window_totals(self, window_seconds: float, prefix: str = "") -> Dict[str, Any]:
+        """Request, error and byte totals over the sliding window."""
+        current = self._slot_id()
+        slots = self._slot_count(window_seconds)
+        totals = {"requests": 0, "errors": 0, "client_errors": 0, "bytes_out": 0}
+        with self._lock:
+            for route, metrics in self.routes.items():
+                if prefix and prefix not in route:
+                    continue
+                for slot in metrics.window_slots(current, slots):
+                    totals["requests"] += slot.requests
+                    totals["errors"] += slot.errors
+                    totals["client_errors"] += slot.client_errors
+                    totals["bytes_out"] += slot.bytes_out
+        requests = totals["requests"]
+        totals["error_rate"] = round(totals["errors"] / requests * 100, 2) if requests else 0.0
+        totals["window_seconds"] = slots * SLOT_SECONDS
+        return totals
+
+    def export_snapshot(
+        self, fold: Callable[[LatencyHistogram], Any]
+    ) -> List[Tuple[str, Dict[str, Any]]]:
+        """Lifetime counters per route, with each histogram reduced by `fold` under the lock."""
+        with self._lock:
+            return [
+                (
+                    route,
+                    {
+                        "status_codes": dict(metrics.status_codes),
+                        "bytes_out": metrics.bytes_out,
+                        "histogram": fold(metrics.histogram),
+                    },
+                )
+                for route, metrics in self.routes.items()
+            ]
+
+    def route_names(self):
+        with self._lock:
+            return list(self.routes)
+
+    def snapshot(self, window_seconds: Optional[float] = None) -> Dict[str, Any]:
+        """JSON-serializable view of lifetime and (optionally) windowed metrics."""
+        routes = {}
+        with self._lock:
+            items = list(self.routes.items())
+        for route, metrics in items:
+            entry = {
+                "requests": metrics.requests,
+                "bytes_out": metrics.bytes_out,
+                "status_codes": {str(k): v for k, v in sorted(metrics.status_codes.items())},
+                "latency": metrics.histogram.summary(),
+            }
+            if window_seconds:
+                entry["window_latency"] = self.window_histogram(route, window_seconds).summary()
+            routes[route] = entry
+        return {
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "in_flight": self.in_flight,
+            "routes": routes,
+        }
+
+
+class RequestMetricsMiddleware:
+    """Pure ASGI middleware feeding a RequestMetrics registry."""
+
+    def __init__(self, app, metrics: Optional[RequestMetrics] = None):
+        self.app = app
+        self.metrics = metrics or request_metrics
+
+    async def __call__(self, scope, receive, send):
+        # Mounted apps keep their own middleware; only the outermost one records
+        if scope["type"] != "http" or scope.get(TIMED_SCOPE_KEY):
+            await self.app(scope, receive, send)
+            return
+        scope[TIMED_SCOPE_KEY] = True
+
+        status = 500
+        bytes_out = 0
+
+        async def send_wrapper(message):
+            nonlocal status, bytes_out
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                bytes_out += len(message.get("body", b""))
+            await send(message)
+
+        metrics = self.metrics
+        metrics.in_flight += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            metrics.in_flight -= 1
+            # Label by route template (set by the router) to keep cardinality bounded
+            route = scope.get("route")
+            path = getattr(route, "path", None)
+            label = (
+                f"{scope['method']} {scope.get('root_path', '')}{path}"
+                if path
+                else UNMATCHED_ROUTE
+            )
+            metrics.record(label, status, elapsed, bytes_out)
+
+
+# Process-wide registry shared by the API apps and the performance monitor
+request_metrics = RequestMetrics()
@@ -85,8 +85,56 @@ def setup_database(force_reindex: bool = False, skip_index: bool = False) -> str
     return db_path
 
 
-def start_server(host: str = "127.0.0.1", port: int = 8000, reload: bool = False):
-    """Start the FastAPI server."""
+def start_workers(host: str, port: int, workers: int, app: str = "api_server:app"):
+    """Replace this process with a preforking gunicorn master (see gunicorn.conf.py)."""
+    os.environ["WORKFLOW_DB_READONLY"] = "1"
+    os.environ.setdefault("RATE_LIMIT_BACKEND", "sqlite")
+    os.environ["WEB_CONCURRENCY"] = str(workers)
+
+    try:
+        import gunicorn  # noqa: F401
+    except ImportError:
+        # No fork-based server (e.g. Windows): uvicorn spawns workers that
+        # each warm up on startup instead of inheriting a warm master
+        print("⚠️  gunicorn not available, falling back to uvicorn workers")
+        import uvicorn
+
+        uvicorn.run(
+            app,
+            host=host,
+            port=port,
+            workers=workers,
+            log_level="info",
+            access_log=False,
+        )
+        return
+
+    print(f"🧵 Starting {workers} workers (readiness: http://{host}:{port}/ready)")
+    sys.stdout.flush()
+    os.execvp(
+        sys.executable,
+        [
+            sys.executable,
+            "-m",
+            "gunicorn",
+            "-c",
+            "gunicorn.conf.py",
+            "--bind",
+            f"{host}:{port}",
+            app,
+        ],
+    )
+
+
+def start_server(
+    host: str = "127.0.0.1",
+    port: int = 8000,
+    reload: bool = False,
+    workers: int = 1,
+    gateway: bool = False,
+):
+    """Start the FastAPI server (or the gateway serving every API app)."""
+    app = "gateway:app" if gateway else "api_server:app"
     print(f"🌐 Starting server at http://{host}:{port}")
     print(f"📊 API Documentation: http://{host}:{port}/docs")
     print(f"🔍 Workflow Search: http://{host}:{port}/api/workflows")
@@ -97,11 +145,15 @@ def start_server(host: str = "127.0.0.1", port: int = 8000, reload: bool = False
     # Configure database path
     os.environ["WORKFLOW_DB_PATH"] = "database/workflows.db"
 
+    if workers > 1 and not reload:
+        start_workers(host, port, workers, app)
+        return
+
     # Start uvicorn with better configuration
     import uvicorn
 
     uvicorn.run(
-        "api_server:app",
+        app,
         host=host,
         port=port,
         reload=reload,
@@ -123,6 +175,8 @@ Examples:
   python run.py --host 0.0.0.0     # Accept external connections
   python run.py --reindex          # Force database reindexing
   python run.py --dev              # Development mode with auto-reload
+  python run.py --workers 4        # Production mode with 4 preforked workers
+  python run.py --gateway          # Serve all API apps from one process
         """,
     )
 
@@ -138,6 +192,17 @@ Examples:
     parser.add_argument(
         "--dev", action="store_true", help="Development mode with auto-reload"
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.environ.get("WEB_CONCURRENCY", "1")),
+        help="Worker processes sharing a read-only index (default: 1, env WEB_CONCURRENCY)",
+    )
+    parser.add_argument(
+        "--gateway",
+        action="store_true",
+        help="Serve every API app (analytics, AI, monitor, users...) via the gateway",
+    )
     parser.add_argument(
         "--skip-index",
         action="store_true",
@@ -168,7 +233,13 @@ Examples:
 
     # Start server
     try:
-        start_server(host=args.host, port=args.port, reload=args.dev)
+        start_server(
+            host=args.host,
+            port=args.port,
+            reload=args.dev,
+            workers=args.workers,
+            gateway=args.gateway,
+        )
     except KeyboardInterrupt:
         print("\n👋 Server stopped!")
     except Exception as e:
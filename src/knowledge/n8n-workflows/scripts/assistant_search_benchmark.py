@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Assistant Search Benchmark
+Latency and recall of WorkflowAssistant.search_workflows_intelligent over a
+fixed query set, compared with the previous LIKE-scan retrieval, and the
+latency of in-session follow-up refinements. A workflow is relevant to a
+query when its name, description and integrations mention every expected
+term.
+"""
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Any, Set
+
+# Add the parent and src directories to path for imports
+ROOT = Path(__file__).parent.parent
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "src"))
+
+# (chat message, terms a relevant workflow must mention)
+QUERY_SET = [
+    ("Show me email automation workflows", ["mail"]),
+    ("Send a Slack message when a form is submitted", ["slack", "form"]),
+    ("Find AI-powered workflows with OpenAI", ["openai"]),
+    ("Telegram bot that answers questions", ["telegram"]),
+    ("Sync Google Sheets rows to Airtable", ["googlesheets", "airtable"]),
+    ("Weekly Google Analytics report", ["googleanalytics"]),
+    ("Post new RSS items to Discord", ["rss", "discord"]),
+    ("Save new emails as Notion pages", ["notion", "mail"]),
+    ("Backup workflows to GitHub", ["backup", "github"]),
+    ("Shopify order notifications", ["shopify"]),
+    ("Summarize YouTube videos", ["youtube"]),
+    ("Manual trigger to update HubSpot contacts", ["hubspot"]),
+]
+
+# (opening message, follow-up answered from the session's result set)
+REFINEMENT_SET = [
+    ("Show me Slack workflows", "only the scheduled ones"),
+    ("Find AI-powered workflows with OpenAI", "just the simple ones"),
+    ("Telegram bot that answers questions", "only webhook ones"),
+    ("Show me email automation workflows", "only active ones"),
+]
+
+# Fail when the new retrieval regresses past these
+MAX_P95_MS = 50.0
+MIN_MEAN_RECALL = 0.5
+MAX_REFINEMENT_P95_MS = 1.0
+
+
+def normalize(text: str) -> str:
+    return re.sub(r"[^a-z0-9]", "", text.lower())
+
+
+def relevant_ids(conn: sqlite3.Connection, terms: List[str]) -> Set[int]:
+    """Ids of workflows whose text mentions every term (the recall oracle)."""
+    normalized = [normalize(term) for term in terms]
+    relevant = set()
+    for wid, name, description, integrations in conn.execute(
+        "SELECT id, name, description, integrations FROM workflows"
+    ):
+        text = normalize(f"{name} {description} {integrations}")
+        if all(term in text for term in normalized):
+            relevant.add(wid)
+    return relevant
+
+
+def like_scan_search(assistant, query: str, limit: int) -> List[Dict]:
+    """The previous retrieval (keyword LIKE scan), parameterized so it runs."""
+    keywords = assistant.extract_keywords(query)
+    conn = assistant.get_db_connection()
+    try:
+        conditions = " OR ".join("name LIKE ? OR description LIKE ?" for _ in keywords) or "1=1"
+        params = [p for keyword in keywords for p in (f"%{keyword}%", f"%{keyword}%")]
+        rows = conn.execute(
+            f"SELECT * FROM workflows WHERE {conditions} "
+            "ORDER BY CASE WHEN active = 1 THEN 1 ELSE 2 END, node_count DESC LIMIT ?",
+            params + [limit],
+        ).fetchall()
+    finally:
+        conn.close()
+    return [dict(row) for row in rows]
+
+
+def evaluate(
+    search: Callable[[str, int], List[Dict]],
+    oracle: Dict[str, Set[int]],
+    k: int,
+    repeat: int,
+) -> Dict[str, Any]:
+    samples, recalls, per_query = [], [], {}
+    for query, _ in QUERY_SET:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            results = search(query, k)
+            samples.append(time.perf_counter() - start)
+        relevant = oracle[query]
+        hits = sum(1 for w in results if w["id"] in relevant)
+        recall = hits / min(k, len(relevant)) if relevant else 1.0
+        recalls.append(recall)
+        per_query[query] = {"hits": hits, "relevant": len(relevant), "recall": round(recall, 2)}
+
+    samples.sort()
+    return {
+        "p50_ms": round(statistics.median(samples) * 1000, 3),
+        "p95_ms": round(samples[int(0.95 * (len(samples) - 1))] * 1000, 3),
+        "mean_recall": round(statistics.mean(recalls), 3),
+        "queries": per_query,
+    }
+
+
+def evaluate_refinements(assistant, repeat: int) -> Dict[str, Any]:
+    """Latency of follow-up turns and how many were served from the session."""
+    samples, refined = [], 0
+    for i, (opening, follow_up) in enumerate(REFINEMENT_SET):
+        for run in range(repeat):
+            session_id = f"bench-{i}-{run}"
+            assistant.chat(opening, session_id)
+            start = time.perf_counter()
+            _, was_refined = assistant.chat(follow_up, session_id)
+            samples.append(time.perf_counter() - start)
+            refined += was_refined
+
+    samples.sort()
+    return {
+        "p50_ms": round(statistics.median(samples) * 1000, 3),
+        "p95_ms": round(samples[int(0.95 * (len(samples) - 1))] * 1000, 3),
+        "refined_ratio": round(refined / len(samples), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Assistant search latency and recall")
+    parser.add_argument(
+        "--db",
+        default=os.environ.get("WORKFLOW_DB_PATH", "database/workflows.db"),
+        help="Indexed workflow database",
+    )
+    parser.add_argument("--k", type=int, default=5, help="Results per query (recall@k)")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed runs per query")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    from ai_assistant import WorkflowAssistant
+
+    assistant = WorkflowAssistant(args.db)
+    conn = sqlite3.connect(args.db)
+    try:
+        oracle = {query: relevant_ids(conn, terms) for query, terms in QUERY_SET}
+    finally:
+        conn.close()
+
+    results = {
+        "fts": evaluate(assistant.search_workflows_intelligent, oracle, args.k, args.repeat),
+        "like_scan": evaluate(
+            lambda q, k: like_scan_search(assistant, q, k), oracle, args.k, args.repeat
+        ),
+        "refinement": evaluate_refinements(assistant, args.repeat),
+    }
+
+    print(f"\n🔎 Assistant search: {len(QUERY_SET)} queries, recall@{args.k}")
+    print("=" * 72)
+    for name in ("fts", "like_scan"):
+        r = results[name]
+        print(f"{name:<12}p50 {r['p50_ms']:>8}ms  p95 {r['p95_ms']:>8}ms  recall {r['mean_recall']}")
+    r = results["refinement"]
+    print(f"{'refinement':<12}p50 {r['p50_ms']:>8}ms  p95 {r['p95_ms']:>8}ms  served from session {r['refined_ratio']}")
+    print()
+    for query, _ in QUERY_SET:
+        fts, like = results["fts"]["queries"][query], results["like_scan"]["queries"][query]
+        print(f"{query[:44]:<46}fts {fts['recall']:<5} like {like['recall']:<5} ({fts['relevant']} relevant)")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Results written to {args.output}")
+
+    fts, refinement = results["fts"], results["refinement"]
+    if (
+        fts["p95_ms"] > MAX_P95_MS
+        or fts["mean_recall"] < MIN_MEAN_RECALL
+        or refinement["p95_ms"] > MAX_REFINEMENT_P95_MS
+    ):
+        print(
+            f"❌ Regression: p95 {fts['p95_ms']}ms (max {MAX_P95_MS}), "
+            f"recall {fts['mean_recall']} (min {MIN_MEAN_RECALL}), "
+            f"refinement p95 {refinement['p95_ms']}ms (max {MAX_REFINEMENT_P95_MS})"
+        )
+        sys.exit(1)
+    print("✅ Within latency and recall budget")
+
+
+if __name__ == "__main__":
+    main()
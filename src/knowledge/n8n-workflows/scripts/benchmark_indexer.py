@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Indexer Benchmark
+Measures full-reindex wall time for the row-by-row and bulk-load write paths,
+on the real workflow corpus and on a synthetic large corpus.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Any
+
+# Add the parent directory to path for imports
+sys.path.append(str(Path(__file__).parent.parent))
+sys.path.append(str(Path(__file__).parent))
+
+from workflow_db import WorkflowDatabase
+from synthetic_corpus import build_profile, generate_corpus
+
+
+def time_full_reindex(workflows_dir: str, bulk: bool) -> Dict[str, Any]:
+    """Index a directory into a fresh database and return timing information."""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = WorkflowDatabase(os.path.join(tmp, "bench.db"))
+        db.workflows_dir = workflows_dir
+
+        start = time.perf_counter()
+        stats = db.index_all_workflows(force_reindex=True, bulk=bulk)
+        elapsed = time.perf_counter() - start
+
+    return {
+        "mode": "bulk" if bulk else "row",
+        "processed": stats["processed"],
+        "errors": stats["errors"],
+        "seconds": round(elapsed, 3),
+        "workflows_per_second": round(stats["processed"] / elapsed, 1)
+        if elapsed
+        else 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the workflow indexer")
+    parser.add_argument(
+        "--workflows-dir", default="workflows", help="Real workflow corpus"
+    )
+    parser.add_argument(
+        "--synthetic-size",
+        type=int,
+        default=100_000,
+        help="Number of workflows in the synthetic corpus (0 to skip)",
+    )
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = {"corpus": [], "synthetic": []}
+
+    print(f"📊 Benchmarking full reindex of '{args.workflows_dir}'...")
+    for bulk in (False, True):
+        results["corpus"].append(time_full_reindex(args.workflows_dir, bulk))
+
+    if args.synthetic_size > 0:
+        with tempfile.TemporaryDirectory() as tmp:
+            print(f"🔄 Generating synthetic corpus of {args.synthetic_size} workflows...")
+            generate_corpus(tmp, args.synthetic_size, build_profile(args.workflows_dir))
+            for bulk in (False, True):
+                results["synthetic"].append(time_full_reindex(tmp, bulk))
+        for entry in results["synthetic"]:
+            entry["size"] = args.synthetic_size
+
+    print("\nResults:")
+    for corpus, runs in results.items():
+        for run in runs:
+            print(
+                f"  {corpus:<10} {run['mode']:<5} {run['processed']:>8} workflows "
+                f"in {run['seconds']:>8.3f}s ({run['workflows_per_second']}/s)"
+            )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
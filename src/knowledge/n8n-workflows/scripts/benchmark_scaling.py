@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Scaling Benchmark Suite
+Times indexing, incremental reindex, search, stats and the detail/diagram
+endpoints against synthetic corpora of increasing size. Runs fully offline
+and checks the results against regression thresholds.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Any
+
+# Add the parent directory to path for imports
+sys.path.append(str(Path(__file__).parent.parent))
+sys.path.append(str(Path(__file__).parent))
+
+from columnar_store import CatalogCache
+from workflow_db import WorkflowDatabase
+from synthetic_corpus import build_profile, generate_corpus, WorkflowGenerator
+
+DEFAULT_THRESHOLDS = Path(__file__).parent / "benchmark_thresholds.json"
+
+SEARCH_QUERIES = [
+    "slack",
+    "google sheets",
+    "openai",
+    "telegram",
+    "webhook",
+    "invoice",
+    "daily report",
+    "http*",
+]
+
+# Ad-hoc aggregations answered by the columnar catalog
+CUSTOM_QUERIES = [
+    {"group_by": ["trigger_type", "complexity"], "metrics": ["count", "avg:node_count"]},
+    {"group_by": ["integrations"], "filters": {"trigger_type": "Webhook"}},
+    {"group_by": ["complexity"], "filters": {"integrations": ["Slack", "Telegram"], "node_count": {"min": 5}}},
+    {"group_by": ["tags", "active"], "metrics": ["count", "max:node_count"]},
+]
+
+
+def latency_summary(samples: List[float]) -> Dict[str, float]:
+    """Summarize latency samples (seconds) as milliseconds."""
+    ordered = sorted(samples)
+
+    def pct(p: float) -> float:
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000
+
+    return {
+        "count": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+        "p50_ms": round(pct(0.50), 3),
+        "p95_ms": round(pct(0.95), 3),
+        "p99_ms": round(pct(0.99), 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+def measure(fn: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    """Call fn `repeat` times and summarize the latencies."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return latency_summary(samples)
+
+
+def touch_files(paths: List[str], generator: WorkflowGenerator) -> None:
+    """Rewrite files with new content so the incremental indexer picks them up."""
+    for i, path in enumerate(paths):
+        workflow = generator.generate(i)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(workflow, f, separators=(",", ":"))
+
+
+def bench_endpoints(
+    db: WorkflowDatabase, corpus_root: str, filenames: List[str], repeat: int
+) -> Dict[str, Any]:
+    """Time the detail and diagram endpoints of api_server in-process."""
+    try:
+        from fastapi.testclient import TestClient
+        import api_server
+    except ImportError as e:
+        return {"skipped": f"API dependencies not installed: {e}"}
+
+    api_server.db = db
+    api_server.rate_limiter.enabled = False
+    client = TestClient(api_server.app)
+
+    results = {}
+    previous_cwd = os.getcwd()
+    os.chdir(corpus_root)  # endpoints resolve files relative to ./workflows
+    try:
+        for name, suffix in (("detail", ""), ("diagram", "/diagram")):
+            samples = []
+            for i in range(repeat):
+                filename = filenames[i % len(filenames)]
+                start = time.perf_counter()
+                response = client.get(f"/api/workflows/{filename}{suffix}")
+                samples.append(time.perf_counter() - start)
+                if response.status_code != 200:
+                    raise RuntimeError(
+                        f"{name} endpoint returned {response.status_code} for {filename}"
+                    )
+            results[name] = latency_summary(samples)
+    finally:
+        os.chdir(previous_cwd)
+    return results
+
+
+def run_size(size: int, profile: Dict[str, Any], repeat: int) -> Dict[str, Any]:
+    """Run the full benchmark for one corpus size."""
+    result = {"size": size}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workflows_dir = os.path.join(tmp, "workflows")
+
+        start = time.perf_counter()
+        paths = generate_corpus(workflows_dir, size, profile)
+        result["generate_seconds"] = round(time.perf_counter() - start, 3)
+
+        db = WorkflowDatabase(os.path.join(tmp, "bench.db"))
+        db.workflows_dir = workflows_dir
+
+        start = time.perf_counter()
+        db.index_all_workflows(force_reindex=True)
+        result["index_seconds"] = round(time.perf_counter() - start, 3)
+
+        # Incremental reindex after 1% of the corpus changed
+        changed = paths[:: max(1, 100)]
+        touch_files(changed, WorkflowGenerator(profile, seed=size))
+        start = time.perf_counter()
+        stats = db.index_all_workflows()
+        result["incremental_reindex"] = {
+            "changed": len(changed),
+            "processed": stats["processed"],
+            "seconds": round(time.perf_counter() - start, 3),
+        }
+
+        queries = iter(SEARCH_QUERIES * repeat)
+        result["fts_search"] = measure(
+            lambda: db.search_workflows(next(queries), limit=20), repeat
+        )
+
+        categories = list(db.get_service_categories())
+        category_iter = iter(categories * repeat)
+        result["category_search"] = measure(
+            lambda: db.search_by_category(next(category_iter), limit=20), repeat
+        )
+
+        result["stats"] = measure(db.get_stats, max(3, repeat // 10))
+
+        start = time.perf_counter()
+        semantic_build = db.build_semantic_index()
+        result["semantic_build"] = {
+            "vocabulary": semantic_build["vocabulary"],
+            "seconds": round(time.perf_counter() - start, 3),
+        }
+        for mode in ("semantic", "hybrid"):
+            queries = iter(SEARCH_QUERIES * repeat)
+            result[f"{mode}_search"] = measure(
+                lambda: db.search_workflows(next(queries), limit=20, mode=mode), repeat
+            )
+
+        start = time.perf_counter()
+        related_build = db.build_related_index()
+        result["related_build"] = {
+            "candidate_pairs": related_build["candidate_pairs"],
+            "seconds": round(time.perf_counter() - start, 3),
+        }
+        related_iter = iter([os.path.basename(p) for p in paths] * repeat)
+        result["related"] = measure(lambda: db.get_related(next(related_iter)), repeat)
+
+        # Co-occurrence reads from the matrix the indexer keeps current
+        result["cooccurrence_pairs"] = measure(
+            lambda: db.integration_pairs(limit=10, order_by="lift", min_count=5), repeat
+        )
+        names = [pair["integrations"][0] for pair in db.integration_pairs(limit=20)]
+        name_iter = iter(names * repeat)
+        result["cooccurrence_used_with"] = measure(
+            lambda: db.frequently_used_with(next(name_iter), limit=10), repeat
+        )
+
+        start = time.perf_counter()
+        catalog = CatalogCache(db.db_path).get()
+        result["catalog_load_seconds"] = round(time.perf_counter() - start, 3)
+        custom_iter = iter(CUSTOM_QUERIES * repeat)
+        result["custom_analytics"] = measure(lambda: catalog.query(**next(custom_iter)), repeat)
+
+        sample = [os.path.basename(p) for p in paths[1 :: max(1, size // repeat)]]
+        result["endpoints"] = bench_endpoints(db, tmp, sample, repeat)
+
+    return result
+
+
+def flatten(result: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    """Flatten nested results into metric names like 'fts_search.p95_ms'."""
+    flat = {}
+    for key, value in result.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)):
+            flat[name] = value
+    return flat
+
+
+def check_thresholds(
+    results: Dict[str, Any], thresholds: Dict[str, Dict[str, float]]
+) -> List[str]:
+    """Return a list of threshold violations (metric values are upper bounds)."""
+    violations = []
+    for size, result in results["sizes"].items():
+        limits = thresholds.get(size, {})
+        flat = flatten(result)
+        for metric, limit in limits.items():
+            if metric in flat and flat[metric] > limit:
+                violations.append(f"{size}: {metric} = {flat[metric]} > {limit}")
+    return violations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scaling benchmark suite")
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[10_000],
+        help="Corpus sizes to benchmark (e.g. 10000 100000 1000000)",
+    )
+    parser.add_argument("--repeat", type=int, default=200, help="Queries per metric")
+    parser.add_argument("--source", default="workflows", help="Corpus to profile")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    parser.add_argument(
+        "--thresholds",
+        default=str(DEFAULT_THRESHOLDS),
+        help="JSON file of per-size metric upper bounds",
+    )
+    args = parser.parse_args()
+
+    profile = build_profile(args.source)
+    results = {
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "sizes": {},
+    }
+
+    for size in args.sizes:
+        print(f"📊 Benchmarking {size} workflows...")
+        results["sizes"][str(size)] = run_size(size, profile, args.repeat)
+        print(json.dumps(results["sizes"][str(size)], indent=2))
+
+    violations = []
+    if args.thresholds and os.path.exists(args.thresholds):
+        with open(args.thresholds, "r", encoding="utf-8") as f:
+            violations = check_thresholds(results, json.load(f))
+    results["violations"] = violations
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Results written to {args.output}")
+
+    if violations:
+        print("❌ Regression thresholds exceeded:")
+        for violation in violations:
+            print(f"  - {violation}")
+        sys.exit(1)
+    print("✅ All metrics within thresholds")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Chat Streaming Benchmark
+Starts the AI assistant under uvicorn and compares time-to-first-byte,
+time to the first workflows and total latency of the buffered /chat
+endpoint with the server-sent events variant /chat/stream.
+"""
+
+import argparse
+import http.client
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from typing import Dict, List, Any
+
+from startup_benchmark import ROOT, child_env, free_port
+
+CHAT_MESSAGES = [
+    "Show me email automation workflows",
+    "Find AI-powered workflows",
+    "Show me Slack integrations",
+    "I want to automate a daily report",
+    "Telegram bot that answers questions",
+    "Post new RSS items to Discord",
+]
+
+
+def wait_until_ready(port: int, timeout: float = 30):
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/chat/interface", timeout=1):
+                return
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.05)
+    raise TimeoutError(f"assistant did not start within {timeout}s")
+
+
+def timed_request(conn: http.client.HTTPConnection, path: str, message: str) -> Dict[str, float]:
+    """Seconds to the first body byte, to the first workflows and to the end."""
+    body = json.dumps({"message": message})
+    start = time.perf_counter()
+    conn.request("POST", path, body=body, headers={"Content-Type": "application/json"})
+    response = conn.getresponse()
+    if response.status != 200:
+        raise RuntimeError(f"{path} returned {response.status}")
+
+    first_byte = workflows_at = None
+    received = b""
+    while True:
+        chunk = response.read1(65536)
+        if not chunk:
+            break
+        now = time.perf_counter()
+        if first_byte is None:
+            first_byte = now
+        received += chunk
+        # The buffered endpoint delivers workflows with the whole body; the
+        # stream delivers them in its "workflows" event
+        event = received.find(b"event: workflows")
+        if workflows_at is None and event >= 0 and received.find(b"\n\n", event) >= 0:
+            workflows_at = now
+    end = time.perf_counter()
+    response.close()
+    if path == "/chat":
+        workflows_at = end
+    return {
+        "ttfb": first_byte - start,
+        "first_workflows": workflows_at - start,
+        "total": end - start,
+    }
+
+
+def summarize(samples: List[Dict[str, float]]) -> Dict[str, Any]:
+    result = {}
+    for key in ("ttfb", "first_workflows", "total"):
+        values = sorted(s[key] for s in samples)
+        result[key] = {
+            "p50_ms": round(statistics.median(values) * 1000, 3),
+            "p95_ms": round(values[int(0.95 * (len(values) - 1))] * 1000, 3),
+        }
+    return result
+
+
+def run(port: int, repeat: int) -> Dict[str, Any]:
+    results = {}
+    for path in ("/chat", "/chat/stream"):
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        try:
+            for message in CHAT_MESSAGES:  # warm up caches and the connection
+                timed_request(conn, path, message)
+            samples = [
+                timed_request(conn, path, message)
+                for _ in range(repeat)
+                for message in CHAT_MESSAGES
+            ]
+        finally:
+            conn.close()
+        results[path] = summarize(samples)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Buffered vs streamed chat latency")
+    parser.add_argument(
+        "--db",
+        default=os.environ.get("WORKFLOW_DB_PATH", "database/workflows.db"),
+        help="Workflow database the assistant is started against",
+    )
+    parser.add_argument("--repeat", type=int, default=10, help="Rounds over the message set")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "ai_assistant:ai_app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT,
+        env=child_env(os.path.abspath(args.db)),
+    )
+    try:
+        wait_until_ready(port)
+        results = run(port, args.repeat)
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+    print("\n💬 Chat latency (p50 / p95)")
+    print("=" * 72)
+    for path, r in results.items():
+        print(
+            f"{path:<14}ttfb {r['ttfb']['p50_ms']:>8} / {r['ttfb']['p95_ms']:<8}ms  "
+            f"workflows {r['first_workflows']['p50_ms']:>8} / {r['first_workflows']['p95_ms']:<8}ms  "
+            f"total {r['total']['p50_ms']:>8} / {r['total']['p95_ms']}ms"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Counter Write Benchmark
+Per-increment latency and throughput of workflow view counters written
+through (one transaction per view) versus the write-behind CounterBuffer,
+and the time readers wait for the database while views are recorded.
+"""
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any
+
+# Add the parent and src directories to path for imports
+ROOT = Path(__file__).parent.parent
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "src"))
+
+from community_features import CommunityFeatures, CounterBuffer
+
+# Workflows the simulated views are spread over
+WORKFLOW_IDS = [f"workflow-{i}.json" for i in range(500)]
+
+
+def reader_loop(db_path: str, stop: threading.Event, samples: list):
+    """Popular-workflows style reads running alongside the writers."""
+    conn = sqlite3.connect(db_path)
+    while not stop.is_set():
+        start = time.perf_counter()
+        conn.execute(
+            "SELECT workflow_id FROM workflow_stats "
+            "ORDER BY total_views + total_downloads DESC LIMIT 10"
+        ).fetchall()
+        samples.append(time.perf_counter() - start)
+    conn.close()
+
+
+def stored_views(db_path: str) -> int:
+    conn = sqlite3.connect(db_path)
+    total = conn.execute("SELECT COALESCE(SUM(total_views), 0) FROM workflow_stats").fetchone()[0]
+    conn.close()
+    return total
+
+
+def copy_database(source: str, target: str):
+    """Consistent copy including pages still in the source's WAL."""
+    src, dst = sqlite3.connect(source), sqlite3.connect(target)
+    src.backup(dst)
+    dst.close()
+    src.close()
+
+
+def run(db_path: str, views: int, flush_seconds: float) -> Dict[str, Any]:
+    community = CommunityFeatures(db_path)
+    # Copied databases may already hold counters: compare the increase
+    before = stored_views(db_path)
+    community.counters.close()
+    community.counters = CounterBuffer(db_path, flush_seconds=flush_seconds)
+
+    stop, reads = threading.Event(), []
+    reader = threading.Thread(target=reader_loop, args=(db_path, stop, reads))
+    reader.start()
+
+    rng = random.Random(7)
+    samples = []
+    started = time.perf_counter()
+    for _ in range(views):
+        workflow_id = rng.choice(WORKFLOW_IDS)
+        start = time.perf_counter()
+        community.increment_view(workflow_id)
+        samples.append(time.perf_counter() - start)
+    community.counters.close()
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    reader.join()
+    stored = stored_views(db_path) - before
+
+    samples.sort()
+    reads.sort()
+    return {
+        "views_per_second": round(views / elapsed),
+        "p50_us": round(statistics.median(samples) * 1e6, 1),
+        "p95_us": round(samples[int(0.95 * (len(samples) - 1))] * 1e6, 1),
+        "reader_p95_ms": round(reads[int(0.95 * (len(reads) - 1))] * 1000, 3) if reads else None,
+        "stored_views": stored,
+        "flushes": community.counters.flushes,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write-through vs write-behind view counters")
+    parser.add_argument(
+        "--db",
+        default=os.environ.get("WORKFLOW_DB_PATH", "database/workflows.db"),
+        help="Workflow database copied for each run",
+    )
+    parser.add_argument("--views", type=int, default=2000, help="Views recorded per run")
+    parser.add_argument("--flush-seconds", type=float, default=1.0, help="Write-behind flush interval")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, flush_seconds in (("write_through", 0), ("write_behind", args.flush_seconds)):
+            db_path = os.path.join(tmp, f"{name}.db")
+            copy_database(args.db, db_path)
+            results[name] = run(db_path, args.views, flush_seconds)
+
+    print(f"\n👁️  {args.views} views over {len(WORKFLOW_IDS)} workflows")
+    print("=" * 72)
+    for name, r in results.items():
+        print(
+            f"{name:<15}{r['views_per_second']:>9}/s  p50 {r['p50_us']:>8}µs  p95 {r['p95_us']:>8}µs  "
+            f"reader p95 {r['reader_p95_ms']}ms  stored {r['stored_views']}  flushes {r['flushes']}"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Results written to {args.output}")
+
+    if any(r["stored_views"] != args.views for r in results.values()):
+        print("❌ Lost increments")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+HTTP Load Testing Harness
+Drives api_server, enhanced_api, analytics_engine and ai_assistant in-process
+(or a running server) with configurable concurrency and request mixes, reports
+throughput and latency histograms, and fails on regressions against a baseline.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+# Add the parent and src directories to path for imports
+ROOT = Path(__file__).parent.parent
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "src"))
+
+import httpx
+
+from latency_histogram import LatencyHistogram
+
+SEARCH_QUERIES = ["slack", "google sheets", "openai", "telegram", "email", "webhook"]
+CHAT_MESSAGES = [
+    "Show me email automation workflows",
+    "Find AI-powered workflows",
+    "Show me Slack integrations",
+    "I want to automate a daily report",
+]
+
+# Request mixes: target -> list of (weight, method, path template, json body)
+MIXES = {
+    "search-heavy": {
+        "api_server": [
+            (70, "GET", "/api/workflows?q={query}", None),
+            (15, "GET", "/api/workflows/category/{category}", None),
+            (10, "GET", "/api/workflows?trigger=Webhook&page={page}", None),
+            (5, "GET", "/api/stats", None),
+        ],
+        "enhanced_api": [
+            (80, "GET", "/api/v2/workflows?search={query}", None),
+            (20, "GET", "/api/v2/workflows?trigger_type=Webhook&offset={offset}", None),
+        ],
+        "analytics_engine": [
+            (60, "GET", "/analytics/insights", None),
+            (40, "GET", "/analytics/overview", None),
+        ],
+        "ai_assistant": [(100, "POST", "/chat", {"message": "{message}"})],
+    },
+    "detail-heavy": {
+        "api_server": [
+            (60, "GET", "/api/workflows/{filename}", None),
+            (30, "GET", "/api/workflows/{filename}/diagram", None),
+            (10, "GET", "/api/workflows?q={query}", None),
+        ],
+        "enhanced_api": [
+            (80, "GET", "/api/v2/workflows/{filename}", None),
+            (20, "GET", "/api/workflows/{filename}/stats", None),
+        ],
+        "analytics_engine": [
+            (70, "GET", "/analytics/overview", None),
+            (30, "GET", "/analytics/trends", None),
+        ],
+        "ai_assistant": [(100, "POST", "/chat", {"message": "{message}"})],
+    },
+    "download-heavy": {
+        "api_server": [
+            (80, "GET", "/api/workflows/{filename}/download", None),
+            (20, "GET", "/api/workflows/{filename}", None),
+        ],
+        "enhanced_api": [
+            (50, "POST", "/api/workflows/{filename}/download", None),
+            (50, "POST", "/api/workflows/{filename}/view", None),
+        ],
+        "analytics_engine": [(100, "GET", "/analytics/overview", None)],
+        "ai_assistant": [(100, "POST", "/chat", {"message": "{message}"})],
+    },
+}
+
+
+def load_app(target: str, db_path: str):
+    """Import a target's ASGI app configured to use db_path."""
+    if target == "api_server":
+        os.environ["WORKFLOW_DB_PATH"] = db_path
+        import api_server
+
+        # Rate limiting would otherwise cap the detail endpoints at 60 req/min
+        api_server.rate_limiter.enabled = False
+        # ASGITransport skips the startup hook that creates the schema
+        api_server.warmup()
+        return api_server.app
+    if target == "enhanced_api":
+        from enhanced_api import EnhancedAPI
+
+        return EnhancedAPI(db_path).app
+    if target == "analytics_engine":
+        import analytics_engine
+
+        analytics_engine.analytics_engine.db_path = db_path
+        return analytics_engine.analytics_app
+    if target == "ai_assistant":
+        import ai_assistant
+
+        ai_assistant.assistant.db_path = db_path
+        return ai_assistant.ai_app
+    raise ValueError(f"Unknown target: {target}")
+
+
+def load_samples(db_path: str) -> Dict[str, List[Any]]:
+    """Sample real filenames and categories to fill path templates."""
+    filenames = []
+    if os.path.exists(db_path):
+        conn = sqlite3.connect(db_path)
+        filenames = [
+            row[0]
+            for row in conn.execute(
+                "SELECT filename FROM workflows ORDER BY RANDOM() LIMIT 500"
+            )
+        ]
+        conn.close()
+    return {
+        "filename": filenames or ["missing.json"],
+        "query": SEARCH_QUERIES,
+        "message": CHAT_MESSAGES,
+        "category": ["messaging", "database", "ai_ml", "email", "development"],
+        "page": [1, 2, 3, 4, 5],
+        "offset": [0, 20, 40, 60],
+    }
+
+
+def _fill(template: Any, rng: random.Random, samples: Dict[str, List[Any]]) -> Any:
+    if isinstance(template, dict):
+        return {k: _fill(v, rng, samples) for k, v in template.items()}
+    if isinstance(template, str) and "{" in template:
+        return template.format(**{k: rng.choice(v) for k, v in samples.items()})
+    return template
+
+
+async def run_load(
+    client: httpx.AsyncClient,
+    operations: List[tuple],
+    samples: Dict[str, List[Any]],
+    concurrency: int,
+    duration: float,
+    max_requests: Optional[int],
+    seed: int,
+) -> Dict[str, Any]:
+    """Run the request mix with `concurrency` workers and collect histograms."""
+    overall = LatencyHistogram()
+    per_operation = {op[2]: LatencyHistogram() for op in operations}
+    statuses = Counter()
+    weights = [op[0] for op in operations]
+    issued = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker(worker_id: int):
+        nonlocal issued
+        rng = random.Random(seed + worker_id)
+        while time.perf_counter() < deadline:
+            if max_requests is not None and issued >= max_requests:
+                return
+            issued += 1
+            _, method, path, body = rng.choices(operations, weights)[0]
+            url = _fill(path, rng, samples)
+            payload = _fill(body, rng, samples) if body else None
+
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, url, json=payload)
+                status = response.status_code
+            except httpx.HTTPError:
+                status = "transport_error"
+            elapsed = time.perf_counter() - start
+
+            overall.record(elapsed)
+            per_operation[path].record(elapsed)
+            statuses[status] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    wall = time.perf_counter() - started
+
+    errors = sum(n for s, n in statuses.items() if s == "transport_error" or s >= 500)
+    return {
+        "requests": overall.count,
+        "seconds": round(wall, 3),
+        "throughput_rps": round(overall.count / wall, 1) if wall else 0,
+        "errors": errors,
+        "error_rate": round(errors / overall.count, 4) if overall.count else 0,
+        "status_codes": {str(k): v for k, v in sorted(statuses.items(), key=str)},
+        "latency": overall.summary(),
+        "operations": {p: h.summary() for p, h in per_operation.items() if h.count},
+    }
+
+
+async def run_target(target: str, args, samples: Dict[str, List[Any]]) -> Dict[str, Any]:
+    operations = MIXES[args.mix][target]
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=30)
+    else:
+        transport = httpx.ASGITransport(app=load_app(target, args.db))
+        client = httpx.AsyncClient(transport=transport, base_url="http://loadtest")
+
+    async with client:
+        if args.warmup:
+            await run_load(client, operations, samples, 1, 60, args.warmup, args.seed)
+        return await run_load(
+            client,
+            operations,
+            samples,
+            args.concurrency,
+            args.duration,
+            args.requests,
+            args.seed,
+        )
+
+
+def compare_to_baseline(
+    results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float
+) -> List[str]:
+    """List regressions: slower p95/p99, lower throughput or more errors."""
+    regressions = []
+    for target, current in results["targets"].items():
+        previous = baseline.get("targets", {}).get(target)
+        if not previous:
+            continue
+        for metric in ("p95_ms", "p99_ms"):
+            before, after = previous["latency"][metric], current["latency"][metric]
+            if before and after > before * (1 + tolerance):
+                regressions.append(f"{target}: {metric} {before} -> {after}")
+        before, after = previous["throughput_rps"], current["throughput_rps"]
+        if before and after < before * (1 - tolerance):
+            regressions.append(f"{target}: throughput_rps {before} -> {after}")
+        if current["error_rate"] > previous["error_rate"] + 0.01:
+            regressions.append(
+                f"{target}: error_rate {previous['error_rate']} -> {current['error_rate']}"
+            )
+    return regressions
+
+
+def print_report(results: Dict[str, Any]):
+    print(f"\n📊 Load test: mix={results['mix']} concurrency={results['concurrency']}")
+    print("=" * 96)
+    print(
+        f"{'target':<18}{'reqs':>8}{'rps':>10}{'err%':>7}"
+        f"{'p50':>9}{'p95':>9}{'p99':>9}{'p999':>9}{'max':>10}  (ms)"
+    )
+    for target, r in results["targets"].items():
+        lat = r["latency"]
+        print(
+            f"{target:<18}{r['requests']:>8}{r['throughput_rps']:>10}"
+            f"{r['error_rate'] * 100:>7.1f}{lat['p50_ms']:>9}{lat['p95_ms']:>9}"
+            f"{lat['p99_ms']:>9}{lat['p999_ms']:>9}{lat['max_ms']:>10}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP load testing harness")
+    parser.add_argument(
+        "--targets",
+        nargs="+",
+        default=["api_server"],
+        choices=["api_server", "enhanced_api", "analytics_engine", "ai_assistant"],
+    )
+    parser.add_argument("--mix", default="search-heavy", choices=sorted(MIXES))
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per target")
+    parser.add_argument("--requests", type=int, help="Stop after this many requests")
+    parser.add_argument("--warmup", type=int, default=20, help="Warmup requests")
+    parser.add_argument("--url", help="Test a running server instead of in-process")
+    parser.add_argument(
+        "--db",
+        default=os.environ.get("WORKFLOW_DB_PATH", "database/workflows.db"),
+        help="Workflow database used in-process and for sample filenames",
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write JSON results to this file")
+    parser.add_argument("--save-baseline", help="Store these results as a baseline")
+    parser.add_argument("--baseline", help="Compare against a saved baseline")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.2, help="Allowed relative regression"
+    )
+    args = parser.parse_args()
+
+    samples = load_samples(args.db)
+    results = {
+        "mix": args.mix,
+        "concurrency": args.concurrency,
+        "mode": "http" if args.url else "in-process",
+        "targets": {},
+    }
+    for target in args.targets:
+        print(f"🚀 Loading {target} ({args.mix})...")
+        results["targets"][target] = asyncio.run(run_target(target, args, samples))
+
+    print_report(results)
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(results, f, indent=2)
+            print(f"✅ Results written to {path}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare_to_baseline(results, json.load(f), args.tolerance)
+        if regressions:
+            print("❌ Regressions against baseline:")
+            for regression in regressions:
+                print(f"  - {regression}")
+            sys.exit(1)
+        print("✅ No regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Startup Benchmark
+Profiles module import time with `python -X importtime` and measures cold
+start to the first served request for api_server and the gateway, failing
+when either exceeds its startup budget.
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+from typing import Dict, List, Any, Tuple
+
+ROOT = Path(__file__).parent.parent
+
+# Budgets in milliseconds; cold start is process spawn to first 200 response
+IMPORT_BUDGET_MS = 1000
+COLD_START_BUDGET_MS = 2500
+
+DEFAULT_MODULES = [
+    "api_server",
+    "gateway",
+    "performance_monitor",
+    "user_management",
+    "integration_hub",
+    "analytics_engine",
+    "ai_assistant",
+]
+
+# (ASGI app, path polled until it answers 200)
+DEFAULT_APPS = [
+    ("api_server:app", "/api/stats"),
+    ("gateway:app", "/api/stats"),
+]
+
+# Optional dependencies that should only be imported by the routes using them
+HEAVY_DEPENDENCIES = ("psutil", "jwt", "httpx", "github", "uvicorn", "numpy", "msgpack")
+
+
+def child_env(db_path: str) -> Dict[str, str]:
+    env = dict(os.environ)
+    paths = [str(ROOT), str(ROOT / "src"), env.get("PYTHONPATH", "")]
+    env["PYTHONPATH"] = os.pathsep.join(p for p in paths if p)
+    env["WORKFLOW_DB_PATH"] = db_path
+    return env
+
+
+def parse_importtime(output: str) -> List[Tuple[str, int, int, int]]:
+    """(module, self us, cumulative us, depth) for every -X importtime line."""
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def profile_import(module: str, runs: int, env: Dict[str, str], top: int) -> Dict[str, Any]:
+    """Best-of-N import time of a module and its most expensive imports."""
+    best = None
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=ROOT,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            return {"error": result.stderr.strip().splitlines()[-1]}
+        rows = parse_importtime(result.stderr)
+        total = next((c for name, _, c, _ in reversed(rows) if name == module), 0)
+        if best is None or total < best[0]:
+            best = (total, rows)
+
+    total, rows = best
+    loaded = {name for name, _, _, _ in rows}
+    return {
+        "total_ms": round(total / 1000, 1),
+        "modules": len(rows),
+        "top_self_ms": [
+            {"module": name, "self_ms": round(s / 1000, 1), "cumulative_ms": round(c / 1000, 1)}
+            for name, s, c, _ in sorted(rows, key=lambda r: r[1], reverse=True)[:top]
+        ],
+        "heavy_imports": sorted(d for d in HEAVY_DEPENDENCIES if d in loaded),
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def cold_start(app: str, path: str, env: Dict[str, str], timeout: float) -> float:
+    """Seconds from spawning a uvicorn process to its first 200 response."""
+    port = free_port()
+    url = f"http://127.0.0.1:{port}{path}"
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app, "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"{app} exited with code {process.returncode}")
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.01)
+        raise TimeoutError(f"{app} did not serve {path} within {timeout}s")
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def measure_cold_start(app: str, path: str, runs: int, env: Dict[str, str]) -> Dict[str, Any]:
+    try:
+        samples = [cold_start(app, path, env, timeout=30) for _ in range(runs)]
+    except (RuntimeError, TimeoutError) as e:
+        return {"error": str(e)}
+    return {
+        "path": path,
+        "runs": runs,
+        "median_ms": round(statistics.median(samples) * 1000, 1),
+        "min_ms": round(min(samples) * 1000, 1),
+        "max_ms": round(max(samples) * 1000, 1),
+    }
+
+
+def check_budgets(results: Dict[str, Any], import_budget: float, start_budget: float) -> List[str]:
+    failures = []
+    for module, r in results["imports"].items():
+        if "error" in r:
+            failures.append(f"import {module}: {r['error']}")
+        elif r["total_ms"] > import_budget:
+            failures.append(f"import {module}: {r['total_ms']}ms > {import_budget}ms")
+    for app, r in results["cold_start"].items():
+        if "error" in r:
+            failures.append(f"cold start {app}: {r['error']}")
+        elif r["median_ms"] > start_budget:
+            failures.append(f"cold start {app}: {r['median_ms']}ms > {start_budget}ms")
+    return failures
+
+
+def print_report(results: Dict[str, Any]):
+    print("\n⏱️  Import time (best of runs)")
+    print("=" * 72)
+    for module, r in results["imports"].items():
+        if "error" in r:
+            print(f"{module:<24} ❌ {r['error']}")
+            continue
+        heavy = ", ".join(r["heavy_imports"]) or "-"
+        print(f"{module:<24}{r['total_ms']:>10}ms  {r['modules']:>5} modules  heavy: {heavy}")
+        for entry in r["top_self_ms"]:
+            print(f"    {entry['module']:<44}{entry['self_ms']:>8}ms self")
+
+    print("\n🚀 Cold start to first request")
+    print("=" * 72)
+    for app, r in results["cold_start"].items():
+        if "error" in r:
+            print(f"{app:<24} ❌ {r['error']}")
+        else:
+            print(
+                f"{app:<24}median {r['median_ms']}ms  "
+                f"(min {r['min_ms']}ms, max {r['max_ms']}ms, {r['path']})"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import time and cold start benchmark")
+    parser.add_argument("--modules", nargs="+", default=DEFAULT_MODULES)
+    parser.add_argument("--runs", type=int, default=3, help="Runs per measurement")
+    parser.add_argument("--top", type=int, default=5, help="Slowest imports listed per module")
+    parser.add_argument("--skip-cold-start", action="store_true")
+    parser.add_argument(
+        "--db",
+        default=os.environ.get("WORKFLOW_DB_PATH", "database/workflows.db"),
+        help="Workflow database the apps are started against",
+    )
+    parser.add_argument("--import-budget-ms", type=float, default=IMPORT_BUDGET_MS)
+    parser.add_argument("--cold-start-budget-ms", type=float, default=COLD_START_BUDGET_MS)
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    env = child_env(os.path.abspath(args.db))
+    results = {"imports": {}, "cold_start": {}}
+    for module in args.modules:
+        print(f"🔍 Profiling import of {module}...")
+        results["imports"][module] = profile_import(module, args.runs, env, args.top)
+    if not args.skip_cold_start:
+        for app, path in DEFAULT_APPS:
+            print(f"🚀 Cold starting {app}...")
+            results["cold_start"][app] = measure_cold_start(app, path, args.runs, env)
+
+    print_report(results)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Results written to {args.output}")
+
+    failures = check_budgets(results, args.import_budget_ms, args.cold_start_budget_ms)
+    if failures:
+        print("❌ Startup budget exceeded:")
+        for failure in failures:
+            print(f"  - {failure}")
+        sys.exit(1)
+    print("✅ Within startup budget")
+
+
+if __name__ == "__main__":
+    main()
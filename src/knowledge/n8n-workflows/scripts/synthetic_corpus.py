@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Synthetic Workflow Corpus Generator
+Generates realistic n8n workflows from the node-type distribution of the real
+corpus so indexing and search can be benchmarked at 10k-1M workflows offline.
+"""
+
+import argparse
+import json
+import random
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+# Used when no real corpus is available to profile
+DEFAULT_PROFILE = {
+    "node_types": {
+        "n8n-nodes-base.stickyNote": 70,
+        "n8n-nodes-base.set": 25,
+        "n8n-nodes-base.httpRequest": 21,
+        "n8n-nodes-base.if": 11,
+        "n8n-nodes-base.code": 10,
+        "n8n-nodes-base.googleSheets": 6,
+        "n8n-nodes-base.merge": 5,
+        "n8n-nodes-base.telegram": 4,
+        "n8n-nodes-base.slack": 3,
+        "@n8n/n8n-nodes-langchain.openAi": 3,
+    },
+    "trigger_types": {
+        "n8n-nodes-base.manualTrigger": 9,
+        "n8n-nodes-base.webhook": 4,
+        "n8n-nodes-base.scheduleTrigger": 3,
+        "n8n-nodes-base.telegramTrigger": 1,
+    },
+    "node_counts": [3, 5, 7, 9, 12, 12, 15, 18, 24, 40],
+    "tags": {"automation": 3, "ai": 2, "sales": 1},
+    "words": [
+        "sync", "notify", "report", "daily", "leads", "invoice", "customer",
+        "data", "backup", "monitor", "summary", "email", "ticket", "order",
+    ],
+    "active_ratio": 0.1,
+}
+
+
+def _is_trigger(node_type: str) -> bool:
+    lowered = node_type.lower()
+    return "trigger" in lowered or lowered.endswith(".webhook") or "cron" in lowered
+
+
+def build_profile(workflows_dir: str = "workflows") -> Dict[str, Any]:
+    """Profile node types, triggers, sizes, tags and name vocabulary of a corpus."""
+    node_types = Counter()
+    trigger_types = Counter()
+    tags = Counter()
+    words = Counter()
+    node_counts = []
+    active = 0
+    total = 0
+
+    for path in Path(workflows_dir).rglob("*.json"):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            continue
+        if not isinstance(data, dict):
+            continue
+
+        total += 1
+        active += 1 if data.get("active") else 0
+        nodes = data.get("nodes") or []
+        node_counts.append(len(nodes))
+
+        for node in nodes:
+            node_type = node.get("type", "")
+            if not node_type:
+                continue
+            if _is_trigger(node_type):
+                trigger_types[node_type] += 1
+            else:
+                node_types[node_type] += 1
+
+        for tag in data.get("tags") or []:
+            name = tag.get("name") if isinstance(tag, dict) else str(tag)
+            if name:
+                tags[name] += 1
+
+        for word in str(data.get("name", "")).lower().split():
+            if word.isascii() and word.isalpha() and len(word) > 2:
+                words[word] += 1
+
+    if total == 0:
+        return dict(DEFAULT_PROFILE)
+
+    return {
+        "node_types": dict(node_types),
+        "trigger_types": dict(trigger_types),
+        "node_counts": node_counts,
+        "tags": dict(tags.most_common(200)),
+        "words": [word for word, _ in words.most_common(500)],
+        "active_ratio": round(active / total, 4),
+    }
+
+
+class WorkflowGenerator:
+    """Deterministic generator of synthetic workflows from a corpus profile."""
+
+    def __init__(self, profile: Dict[str, Any], seed: int = 42):
+        self.rng = random.Random(seed)
+        self.profile = profile
+        self.node_types = list(profile["node_types"])
+        self.node_weights = list(profile["node_types"].values())
+        self.trigger_types = list(profile["trigger_types"]) or [
+            "n8n-nodes-base.manualTrigger"
+        ]
+        self.trigger_weights = list(profile["trigger_types"].values()) or [1]
+        self.tag_names = list(profile["tags"])
+        self.tag_weights = list(profile["tags"].values())
+        self.words = profile["words"] or DEFAULT_PROFILE["words"]
+        self.node_counts = [n for n in profile["node_counts"] if n > 0] or [5]
+        self.base_time = datetime(2024, 1, 1)
+
+    def _node(self, node_type: str, index: int) -> Dict[str, Any]:
+        short_type = node_type.split(".")[-1]
+        return {
+            "id": str(uuid.UUID(int=self.rng.getrandbits(128))),
+            "name": f"{short_type[:1].upper()}{short_type[1:]} {index}",
+            "type": node_type,
+            "typeVersion": 1,
+            "position": [index * 220, 300 + self.rng.randint(-2, 2) * 120],
+            "parameters": {},
+        }
+
+    def generate(self, index: int) -> Dict[str, Any]:
+        """Generate one workflow document."""
+        rng = self.rng
+        node_count = min(rng.choice(self.node_counts), 120)
+        trigger = rng.choices(self.trigger_types, self.trigger_weights)[0]
+        body_types = rng.choices(self.node_types, self.node_weights, k=node_count - 1)
+
+        nodes = [self._node(trigger, 0)]
+        nodes.extend(self._node(t, i + 1) for i, t in enumerate(body_types))
+
+        # Chain the executable nodes, occasionally fanning out to a second branch
+        flow = [n for n in nodes if not n["type"].endswith("stickyNote")]
+        connections = {}
+        for i, node in enumerate(flow[:-1]):
+            targets = [{"node": flow[i + 1]["name"], "type": "main", "index": 0}]
+            if i + 2 < len(flow) and rng.random() < 0.15:
+                targets.append({"node": flow[i + 2]["name"], "type": "main", "index": 0})
+            connections[node["name"]] = {"main": [targets]}
+
+        title = " ".join(rng.sample(self.words, k=min(len(self.words), rng.randint(2, 5))))
+        created = self.base_time + timedelta(minutes=index)
+        tags = []
+        if self.tag_names and rng.random() < 0.4:
+            tags = [
+                {"name": name}
+                for name in set(rng.choices(self.tag_names, self.tag_weights, k=2))
+            ]
+
+        return {
+            "id": str(index),
+            "name": title.title(),
+            "active": rng.random() < self.profile["active_ratio"],
+            "nodes": nodes,
+            "connections": connections,
+            "tags": tags,
+            "settings": {"executionOrder": "v1"},
+            "createdAt": created.isoformat(),
+            "updatedAt": created.isoformat(),
+        }
+
+    @staticmethod
+    def filename(index: int, workflow: Dict[str, Any]) -> str:
+        """Filename in the corpus naming style: <id>_<Words_Joined>.json"""
+        slug = "_".join(word.capitalize() for word in workflow["name"].split()[:4])
+        return f"{index:07d}_{slug or 'Workflow'}.json"
+
+
+def generate_corpus(
+    target_dir: str,
+    size: int,
+    profile: Optional[Dict[str, Any]] = None,
+    seed: int = 42,
+    subdirs: int = 200,
+) -> List[str]:
+    """Write `size` synthetic workflows into subdirectories of target_dir."""
+    generator = WorkflowGenerator(profile or build_profile(), seed=seed)
+    target = Path(target_dir)
+    written = []
+
+    for index in range(size):
+        workflow = generator.generate(index)
+        subdir = target / f"Synthetic{index % subdirs:03d}"
+        if index < subdirs:
+            subdir.mkdir(parents=True, exist_ok=True)
+        path = subdir / generator.filename(index, workflow)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(workflow, f, separators=(",", ":"))
+        written.append(str(path))
+
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic workflow corpus")
+    parser.add_argument("--size", type=int, default=10_000, help="Number of workflows")
+    parser.add_argument("--output", required=True, help="Target directory")
+    parser.add_argument(
+        "--source", default="workflows", help="Real corpus to profile"
+    )
+    parser.add_argument("--profile", help="Load a saved profile instead of --source")
+    parser.add_argument("--save-profile", help="Write the corpus profile to this file")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    if args.profile:
+        with open(args.profile, "r", encoding="utf-8") as f:
+            profile = json.load(f)
+    else:
+        profile = build_profile(args.source)
+
+    if args.save_profile:
+        with open(args.save_profile, "w", encoding="utf-8") as f:
+            json.dump(profile, f)
+        print(f"✅ Profile written to {args.save_profile}")
+
+    print(f"🔄 Generating {args.size} workflows into {args.output}...")
+    generate_corpus(args.output, args.size, profile, seed=args.seed)
+    print("✅ Done")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Semantic Workflow Index
+CPU-only embeddings of workflow names, descriptions, integrations and node
+types (TF-IDF weighted feature hashing over words and character trigrams),
+stored as a memory-mapped float32 matrix next to the database, with top-k
+lookup by vectorized dot products (numpy) or an inverted-list ANN fallback.
+"""
+
+import array
+import hashlib
+import heapq
+import math
+import mmap
+import os
+import re
+import struct
+import threading
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Any, Optional, Tuple
+
+from lazy_imports import LazyModule
+
+np = LazyModule("numpy")
+
+# Embedding width; tokens are hashed into this many signed buckets
+EMBEDDING_DIM = 256
+
+# Relative weight of each field in a workflow's embedding
+FIELD_WEIGHTS = {"name": 2.0, "description": 1.0, "integration": 1.5, "node": 1.0}
+
+# Character trigrams let "email"/"emails" or "sheet"/"sheets" share buckets
+TRIGRAM_WEIGHT = 0.3
+
+# Without numpy, each row is listed under its strongest dimensions (lists
+# sorted by weight) and a query only reranks the top rows of the lists of
+# its own strongest dimensions
+POSTING_DIMS = 12
+QUERY_PROBE_DIMS = 8
+ANN_MAX_CANDIDATES = 4000
+
+# Weight of the vector score in hybrid ranking; BM25 gets the rest
+HYBRID_ALPHA = 0.5
+
+VECTOR_FILE_SUFFIX = ".vectors"
+_MAGIC = b"KOSVEC01"
+_HEADER = struct.Struct("<8sIII")  # magic, dim, rows, postings
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in",
+    "into", "is", "it", "of", "on", "or", "that", "the", "this", "to",
+    "with", "workflow", "workflows", "automated", "automation", "n8n",
+}
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_CAMEL_RE = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+
+
+def words(text: str) -> List[str]:
+    """Lowercased word tokens; camelCase names are split ("googleSheets")."""
+    text = _CAMEL_RE.sub(" ", text or "")
+    return [w for w in _WORD_RE.findall(text.lower()) if w not in STOPWORDS and len(w) > 1]
+
+
+def weighted_tokens(fields: Iterable[Tuple[str, str]]) -> Counter:
+    """Token weights for (field, text) pairs: words plus their trigrams."""
+    weights: Counter = Counter()
+    for field, text in fields:
+        field_weight = FIELD_WEIGHTS.get(field, 1.0)
+        for word in words(text):
+            weights[f"w:{word}"] += field_weight
+            padded = f"#{word}#"
+            for i in range(len(padded) - 2):
+                weights[f"c:{padded[i:i + 3]}"] += field_weight * TRIGRAM_WEIGHT
+    return weights
+
+
+def workflow_fields(
+    name: str, description: str, integrations: Iterable[str], features: Iterable[str]
+) -> List[Tuple[str, str]]:
+    """Embedding inputs of one workflow; node types come from related_index features."""
+    fields = [("name", name or ""), ("description", description or "")]
+    fields.extend(("integration", integration) for integration in integrations)
+    fields.extend(("node", token[2:]) for token in features if token.startswith("n:"))
+    return fields
+
+
+class Embedder:
+    """Signed feature hashing of TF-IDF weighted tokens into unit vectors."""
+
+    def __init__(self, idf: Dict[str, float], dim: int = EMBEDDING_DIM):
+        self.idf = idf
+        self.dim = dim
+        self._buckets: Dict[str, Tuple[int, float]] = {}
+
+    def _bucket(self, token: str) -> Tuple[int, float]:
+        cached = self._buckets.get(token)
+        if cached is None:
+            h = int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), "big")
+            cached = self._buckets[token] = (h % self.dim, -1.0 if h >> 63 else 1.0)
+        return cached
+
+    def embed(self, weights: Counter) -> Dict[int, float]:
+        """Sparse unit vector {dimension: value}; empty when nothing is known."""
+        vector: Dict[int, float] = defaultdict(float)
+        for token, weight in weights.items():
+            dimension, sign = self._bucket(token)
+            # Tokens missing from the corpus cannot match anything: skip them
+            idf = self.idf.get(token, 0.0)
+            # Sublinear term frequency: repeated words add less and less
+            vector[dimension] += sign * math.log1p(weight) * idf
+        norm = math.sqrt(sum(v * v for v in vector.values()))
+        if not norm:
+            return {}
+        return {d: v / norm for d, v in vector.items() if v}
+
+
+def compute_idf(documents: List[Counter]) -> Dict[str, float]:
+    """Smoothed inverse document frequency of every token."""
+    df: Counter = Counter()
+    for weights in documents:
+        df.update(weights.keys())
+    n = len(documents)
+    return {token: math.log((n + 1) / (count + 1)) + 1.0 for token, count in df.items()}
+
+
+def vector_path(db_path: str) -> str:
+    return f"{db_path}{VECTOR_FILE_SUFFIX}"
+
+
+def write_vectors(path: str, ids: List[int], vectors: List[Dict[int, float]], dim: int = EMBEDDING_DIM):
+    """Write the id list, ANN posting lists and the float32 matrix atomically.
+
+    Layout (native byte order): header, int64 ids[rows], uint32 offsets[dim+1],
+    uint32 postings[...], float32 matrix[rows][dim]. Readers that still map
+    the previous file keep a consistent view until they reopen it.
+    """
+    postings: List[List[Tuple[float, int]]] = [[] for _ in range(dim)]
+    matrix = array.array("f", bytes(4 * dim * len(ids)))
+    for row, vector in enumerate(vectors):
+        base = row * dim
+        for d, value in vector.items():
+            matrix[base + d] = value
+        for d in heapq.nlargest(POSTING_DIMS, vector, key=lambda d: abs(vector[d])):
+            postings[d].append((-abs(vector[d]), row))
+
+    offsets = array.array("I", [0])
+    flat = array.array("I")
+    for entries in postings:
+        entries.sort()
+        flat.extend(row for _, row in entries)
+        offsets.append(len(flat))
+
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, dim, len(ids), len(flat)))
+        array.array("q", ids).tofile(f)
+        offsets.tofile(f)
+        flat.tofile(f)
+        matrix.tofile(f)
+    os.replace(tmp, path)
+
+
+class _Mapping:
+    """One opened vectors file. Never mutated or closed: a rebuilt file gets a
+    new mapping, and this one is unmapped once the last search drops it."""
+
+    def __init__(self, path: str, identity: Tuple[int, int]):
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, dim, rows, total_postings = _HEADER.unpack_from(mapped, 0)
+        if magic != _MAGIC:
+            mapped.close()
+            raise ValueError(f"{path} is not a workflow vectors file")
+
+        view = memoryview(mapped)
+        offset = _HEADER.size
+        self.ids = view[offset:offset + 8 * rows].cast("q")
+        offset += 8 * rows
+        self.offsets = view[offset:offset + 4 * (dim + 1)].cast("I")
+        offset += 4 * (dim + 1)
+        self.postings = view[offset:offset + 4 * total_postings].cast("I")
+        offset += 4 * total_postings
+        self.vectors = view[offset:offset + 4 * rows * dim].cast("f")
+        self.matrix = (
+            np.frombuffer(mapped, dtype=np.float32, count=rows * dim, offset=offset).reshape(rows, dim)
+            if np.available
+            else None
+        )
+        self.identity, self.rows, self.dim = identity, rows, dim
+
+    def candidates(self, query: Dict[int, float]) -> List[int]:
+        probes = heapq.nlargest(QUERY_PROBE_DIMS, query, key=lambda d: abs(query[d]))
+        per_probe = ANN_MAX_CANDIDATES // max(1, len(probes))
+        candidates = set()
+        for d in probes:
+            start = self.offsets[d]
+            candidates.update(self.postings[start:min(self.offsets[d + 1], start + per_probe)])
+        return list(candidates)
+
+
+class VectorIndex:
+    """Read-only, memory-mapped view of a vectors file.
+
+    The mapping is shared through the OS page cache, so preforked workers do
+    not each hold a copy. A rebuilt file is picked up on the next search;
+    searches already running finish on the mapping they started with.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._mapping: Optional[_Mapping] = None
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        return os.path.exists(self.path)
+
+    def _open(self) -> _Mapping:
+        stat = os.stat(self.path)
+        identity = (stat.st_ino, stat.st_mtime_ns)
+        with self._lock:
+            if self._mapping is None or self._mapping.identity != identity:
+                self._mapping = _Mapping(self.path, identity)
+            return self._mapping
+
+    def close(self):
+        with self._lock:
+            self._mapping = None
+
+    def search(self, query: Dict[int, float], k: int) -> List[Tuple[float, int]]:
+        """Top-k (cosine, workflow id) for a sparse unit query vector."""
+        mapping = self._open()
+        if not query or not mapping.rows:
+            return []
+
+        if mapping.matrix is not None:
+            dense = np.zeros(mapping.dim, dtype=np.float32)
+            for d, value in query.items():
+                dense[d] = value
+            scores = mapping.matrix @ dense
+            k = min(k, mapping.rows)
+            top = np.argpartition(-scores, k - 1)[:k]
+            ranked = sorted(((float(scores[i]), int(i)) for i in top), reverse=True)
+        else:
+            vectors, dim, items = mapping.vectors, mapping.dim, list(query.items())
+            ranked = heapq.nlargest(
+                k,
+                ((sum(v * vectors[row * dim + d] for d, v in items), row) for row in mapping.candidates(query)),
+            )
+        return [(score, mapping.ids[row]) for score, row in ranked if score > 0]
+
+    def stats(self) -> Dict[str, Any]:
+        mapping = self._mapping
+        return {
+            "rows": mapping.rows if mapping else 0,
+            "dim": mapping.dim if mapping else EMBEDDING_DIM,
+            "bytes": os.path.getsize(self.path) if self.available else 0,
+            "backend": "numpy" if np.available else "inverted-lists",
+        }
+
+
+def normalize_scores(scores: Dict[int, float]) -> Dict[int, float]:
+    """Min-max scale scores to [0, 1] (all 1.0 when they are equal)."""
+    if not scores:
+        return {}
+    lo, hi = min(scores.values()), max(scores.values())
+    if hi == lo:
+        return {key: 1.0 for key in scores}
+    return {key: (value - lo) / (hi - lo) for key, value in scores.items()}
+
+
+def fuse_scores(
+    lexical: Dict[int, float], semantic: Dict[int, float], alpha: float
+) -> List[Tuple[float, int]]:
+    """Hybrid ranking: alpha * semantic + (1 - alpha) * lexical, both normalized.
+
+    Lexical scores are BM25 values where higher is better.
+    """
+    lexical, semantic = normalize_scores(lexical), normalize_scores(semantic)
+    fused = {
+        key: alpha * semantic.get(key, 0.0) + (1 - alpha) * lexical.get(key, 0.0)
+        for key in lexical.keys() | semantic.keys()
+    }
+    return sorted(((score, key) for key, score in fused.items()), key=lambda item: (-item[0], item[1]))
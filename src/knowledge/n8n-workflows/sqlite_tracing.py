@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+SQLite Tracing
+Shared instrumented connection factory: times every statement, groups them
+by normalized SQL fingerprint and keeps a bounded slow-query log with
+EXPLAIN QUERY PLAN output. Optionally hands out connections from a shared
+pool, so apps that open a connection per call reuse them instead.
+"""
+
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Dict, List, Any, Optional, Tuple
+
+# Statements slower than this (ms) are logged with their query plan
+SLOW_QUERY_MS = float(os.environ.get("SQLITE_SLOW_QUERY_MS", "100"))
+
+# Bounds for the fingerprint table, the slow-query log and the SQL cache
+MAX_FINGERPRINTS = 500
+MAX_SLOW_ENTRIES = 200
+MAX_NORMALIZED_CACHE = 2000
+
+# Re-run EXPLAIN QUERY PLAN for a fingerprint at most this often
+PLAN_REFRESH_SECONDS = 300
+
+# Rows fetched per step when a traced cursor is iterated
+ITER_CHUNK_ROWS = 256
+
+# Keys QueryLog.report() can sort fingerprints by
+REPORT_SORT_KEYS = ("total_ms", "max_ms", "mean_ms", "count", "slow_count")
+
+# Idle connections the shared pool keeps per database
+POOL_MAX_IDLE = int(os.environ.get("SQLITE_POOL_MAX_IDLE", "8"))
+
+_COMMENT_RE = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_sql(sql: str) -> str:
+    """Fingerprint SQL: drop comments and literals, collapse lists and whitespace."""
+    normalized = _COMMENT_RE.sub(" ", sql)
+    normalized = _STRING_RE.sub("?", normalized)
+    normalized = _NUMBER_RE.sub("?", normalized)
+    normalized = _IN_LIST_RE.sub("(?+)", normalized)
+    return _WHITESPACE_RE.sub(" ", normalized).strip()
+
+
+class _Fingerprint:
+    __slots__ = ("sql", "count", "total_ms", "max_ms", "slow_count", "plan", "plan_at", "last_seen")
+
+    def __init__(self, sql: str):
+        self.sql = sql
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.slow_count = 0
+        self.plan: Optional[List[str]] = None
+        self.plan_at = 0.0
+        self.last_seen = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "fingerprint": self.sql,
+            "count": self.count,
+            "total_ms": round(self.total_ms, 3),
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "slow_count": self.slow_count,
+            "plan": self.plan,
+            "full_scan": any(line.startswith("SCAN") for line in self.plan or ()),
+        }
+
+
+class QueryLog:
+    """Per-fingerprint statement statistics and a bounded log of slow statements."""
+
+    def __init__(self, slow_ms: float = SLOW_QUERY_MS):
+        self.slow_ms = slow_ms
+        self._lock = threading.Lock()
+        self.fingerprints: "OrderedDict[str, _Fingerprint]" = OrderedDict()
+        self.slow: deque = deque(maxlen=MAX_SLOW_ENTRIES)
+        self.statements = 0
+        self.slow_statements = 0
+        self._normalized: Dict[str, str] = {}
+
+    def _fingerprint(self, sql: str) -> str:
+        key = self._normalized.get(sql)
+        if key is None:
+            if len(self._normalized) >= MAX_NORMALIZED_CACHE:
+                self._normalized.clear()
+            key = self._normalized[sql] = normalize_sql(sql)
+        return key
+
+    def record(self, conn: sqlite3.Connection, sql: str, params: Any, elapsed: float):
+        """Account one statement; explain it when it was slow."""
+        elapsed_ms = elapsed * 1000
+        key = self._fingerprint(sql)
+        now = time.time()
+        with self._lock:
+            self.statements += 1
+            entry = self.fingerprints.get(key)
+            if entry is None:
+                if len(self.fingerprints) >= MAX_FINGERPRINTS:
+                    self.fingerprints.popitem(last=False)
+                entry = self.fingerprints[key] = _Fingerprint(key)
+            else:
+                self.fingerprints.move_to_end(key)
+            entry.count += 1
+            entry.total_ms += elapsed_ms
+            entry.max_ms = max(entry.max_ms, elapsed_ms)
+            entry.last_seen = now
+            if elapsed_ms < self.slow_ms:
+                return
+            entry.slow_count += 1
+            self.slow_statements += 1
+            refresh_plan = now - entry.plan_at > PLAN_REFRESH_SECONDS
+
+        if refresh_plan:
+            plan = explain(conn, sql, params)
+            with self._lock:
+                entry.plan = plan
+                entry.plan_at = now
+        with self._lock:
+            self.slow.append(
+                {
+                    "timestamp": now,
+                    "duration_ms": round(elapsed_ms, 3),
+                    "fingerprint": key,
+                    "sql": sql.strip()[:2000],
+                    "plan": entry.plan,
+                }
+            )
+
+    def report(self, limit: int = 50, sort: str = "total_ms") -> Dict[str, Any]:
+        """Top fingerprints by the given key plus the most recent slow statements."""
+        with self._lock:
+            entries = [entry.to_dict() for entry in self.fingerprints.values()]
+            recent = list(self.slow)[-limit:]
+            totals = {
+                "statements": self.statements,
+                "slow_statements": self.slow_statements,
+                "fingerprints": len(self.fingerprints),
+            }
+        entries.sort(key=lambda e: e.get(sort, 0), reverse=True)
+        return {
+            "slow_query_ms": self.slow_ms,
+            **totals,
+            "top": entries[:limit],
+            "recent_slow": list(reversed(recent)),
+        }
+
+    def reset(self):
+        with self._lock:
+            self.fingerprints.clear()
+            self.slow.clear()
+            self.statements = 0
+            self.slow_statements = 0
+
+
+def explain(conn: sqlite3.Connection, sql: str, params: Any) -> Optional[List[str]]:
+    """EXPLAIN QUERY PLAN details for a read statement, or None."""
+    if not sql.lstrip().upper().startswith(("SELECT", "WITH")):
+        return None
+    try:
+        rows = sqlite3.Connection.execute(conn, f"EXPLAIN QUERY PLAN {sql}", params or ())
+        return [row[-1] for row in rows.fetchall()]
+    except sqlite3.Error as e:
+        return [f"explain failed: {e}"]
+
+
+class TracedCursor(sqlite3.Cursor):
+    """Cursor timing each statement from execute() until its rows are consumed.
+
+    SQLite steps through results lazily, so a scan's cost mostly lands in the
+    fetches; their time is added to the statement, which is recorded once the
+    cursor is exhausted, closed, reused or garbage collected.
+    """
+
+    _pending: Optional[Tuple[str, Any, float]] = None
+
+    def _finish(self):
+        pending, self._pending = self._pending, None
+        if pending is not None:
+            sql, parameters, elapsed = pending
+            query_log.record(self.connection, sql, parameters, elapsed)
+
+    def _fetched(self, start: float, exhausted: bool):
+        if self._pending is not None:
+            sql, parameters, elapsed = self._pending
+            self._pending = (sql, parameters, elapsed + time.perf_counter() - start)
+            if exhausted:
+                self._finish()
+
+    def execute(self, sql, parameters=()):
+        self._finish()
+        start = time.perf_counter()
+        try:
+            result = super().execute(sql, parameters)
+        except BaseException:
+            query_log.record(self.connection, sql, parameters, time.perf_counter() - start)
+            raise
+        self._pending = (sql, parameters, time.perf_counter() - start)
+        if self.description is None:
+            # No result rows: the statement already ran to completion
+            self._finish()
+        return result
+
+    def executemany(self, sql, seq_of_parameters):
+        self._finish()
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            query_log.record(self.connection, sql, None, time.perf_counter() - start)
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(start, row is None)
+        return row
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        size = self.arraysize if size is None else size
+        rows = super().fetchmany(size)
+        self._fetched(start, len(rows) < size)
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(start, True)
+        return rows
+
+    def __iter__(self):
+        # Timed a chunk at a time so rows don't each pay for the tracing;
+        # rows are read ahead, so don't fetch more after breaking out early
+        while True:
+            rows = self.fetchmany(ITER_CHUNK_ROWS)
+            yield from rows
+            if len(rows) < ITER_CHUNK_ROWS:
+                return
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        try:
+            self._finish()
+        except Exception:
+            pass
+
+
+class TracedConnection(sqlite3.Connection):
+    """Connection whose statements are all timed, including cursor() ones."""
+
+    def cursor(self, factory=TracedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+class PooledConnection(TracedConnection):
+    """Traced connection that goes back to its pool on close()."""
+
+    def close(self):
+        self.pool.release(self)
+
+
+class ConnectionPool:
+    """Idle connections per (database, connect options), shared by every app.
+
+    Disabled by default; when enabled, connect() checks out an idle connection
+    and close() rolls back any open transaction and returns it. Connections
+    are used by one caller at a time but may move between threads.
+    """
+
+    def __init__(self, max_idle: int = POOL_MAX_IDLE):
+        self.max_idle = max_idle
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._idle: Dict[Tuple, List[PooledConnection]] = {}
+        self._pid = os.getpid()
+        self.opened = 0
+        self.reused = 0
+        self.closed = 0
+
+    def acquire(self, database: str, **kwargs) -> PooledConnection:
+        key = (database, tuple(sorted(kwargs.items())))
+        with self._lock:
+            if self._pid != os.getpid():
+                # Connections inherited over fork() belong to the parent
+                self._idle.clear()
+                self._pid = os.getpid()
+            idle = self._idle.get(key)
+            if idle:
+                self.reused += 1
+                conn = idle.pop()
+                conn.pooled_idle = False
+                return conn
+            self.opened += 1
+        conn = sqlite3.connect(
+            database, factory=PooledConnection, check_same_thread=False, **kwargs
+        )
+        conn.pool = self
+        conn.pool_key = key
+        conn.pooled_idle = False
+        return conn
+
+    def release(self, conn: PooledConnection):
+        if conn.pooled_idle:
+            return
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            conn.row_factory = None
+        except sqlite3.Error:
+            self._close(conn)
+            return
+        with self._lock:
+            idle = self._idle.setdefault(conn.pool_key, [])
+            if self.enabled and self._pid == os.getpid() and len(idle) < self.max_idle:
+                conn.pooled_idle = True
+                idle.append(conn)
+                return
+        self._close(conn)
+
+    def _close(self, conn: PooledConnection):
+        with self._lock:
+            self.closed += 1
+        sqlite3.Connection.close(conn)
+
+    def close_all(self):
+        """Close every idle connection (e.g. on shutdown)."""
+        with self._lock:
+            idle = [conn for conns in self._idle.values() for conn in conns]
+            self._idle.clear()
+        for conn in idle:
+            self._close(conn)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "opened": self.opened,
+                "reused": self.reused,
+                "closed": self.closed,
+                "idle": sum(len(conns) for conns in self._idle.values()),
+            }
+
+
+def connect(database: str, **kwargs) -> sqlite3.Connection:
+    """sqlite3.connect() returning a traced (and, if enabled, pooled) connection."""
+    if connection_pool.enabled and "factory" not in kwargs:
+        return connection_pool.acquire(database, **kwargs)
+    kwargs.setdefault("factory", TracedConnection)
+    return sqlite3.connect(database, **kwargs)
+
+
+# Process-wide log shared by every traced connection
+query_log = QueryLog()
+
+# Process-wide pool, enabled by the gateway (or SQLITE_POOL=1)
+connection_pool = ConnectionPool()
+connection_pool.enabled = os.environ.get("SQLITE_POOL", "").lower() in ("1", "true", "yes")
@@ -5,16 +5,70 @@ Intelligent chat interface for finding and understanding workflows.
 """
 
 from fastapi import FastAPI, HTTPException
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
-from typing import List, Dict, Optional
+from typing import Any, Iterator, List, Dict, Optional, Tuple
+from collections import deque
+from dataclasses import dataclass, field
 import json
+import os
+import re
 import sqlite3
+import sys
+import uuid
+from pathlib import Path
+
+# Add the parent directory to path for the shared SQLite tracing
+sys.path.append(str(Path(__file__).parent.parent))
+
+import sqlite_tracing
+from shared_cache import TTLCache
+from assistant_lexicon import Lexicon, default_lexicon
+
+# BM25 column weights for filename, name, description, integrations, tags
+FTS_COLUMN_WEIGHTS = (1.0, 10.0, 3.0, 5.0, 2.0)
+
+# Most FTS terms taken from one query
+MAX_QUERY_TERMS = 12
+
+# Idle conversations expire after SESSION_TTL_SECONDS; past MAX_SESSIONS the
+# least recently used ones are evicted
+SESSION_TTL_SECONDS = 30 * 60
+MAX_SESSIONS = 10_000
+
+# Per-session memory cap: turns remembered and result rows kept so that
+# follow-ups refine them in memory
+MAX_SESSION_TURNS = 20
+SESSION_CANDIDATES = 100
+
+# A follow-up ("only the scheduled ones") uses one of these words and
+# nothing but filter words
+REFINEMENT_MARKERS = {"only", "just", "those", "these", "them", "ones", "one", "filter", "narrow", "keep"}
+REFINEMENT_TRIGGERS = {
+    "scheduled": "Scheduled",
+    "schedule": "Scheduled",
+    "cron": "Scheduled",
+    "webhook": "Webhook",
+    "webhooks": "Webhook",
+    "manual": "Manual",
+    "manually": "Manual",
+}
+REFINEMENT_COMPLEXITY = {
+    "simple": "low",
+    "easy": "low",
+    "basic": "low",
+    "medium": "medium",
+    "advanced": "high",
+    "complex": "high",
+}
+REFINEMENT_FILLER = {"active", "triggered", "trigger", "using", "use", "uses", "show", "me", "the", "with", "that", "are", "of", "please"}
 
 
 class ChatMessage(BaseModel):
     message: str
     user_id: Optional[str] = None
+    session_id: Optional[str] = None
 
 
 class AIResponse(BaseModel):
@@ -22,131 +76,181 @@ class AIResponse(BaseModel):
     workflows: List[Dict] = []
     suggestions: List[str] = []
     confidence: float = 0.0
+    session_id: Optional[str] = None
+    refined: bool = False
+
+
+@dataclass
+class ChatSession:
+    """One conversation: recent turns and the last result set, both capped."""
+
+    turns: deque = field(default_factory=lambda: deque(maxlen=MAX_SESSION_TURNS))
+    candidates: List[Dict] = field(default_factory=list)
+
+    def remember(self, message: str, workflows: List[Dict], candidates: Optional[List[Dict]] = None):
+        self.turns.append((message, [w["id"] for w in workflows]))
+        if candidates is not None:
+            self.candidates = candidates[:SESSION_CANDIDATES]
 
 
 class WorkflowAssistant:
-    def __init__(self, db_path: str = "workflows.db"):
+    def __init__(self, db_path: str = None, lexicon: Optional[Lexicon] = None):
+        # Use environment variable if no path provided
+        if db_path is None:
+            db_path = os.environ.get("WORKFLOW_DB_PATH", "workflows.db")
         self.db_path = db_path
-        self.conversation_history = {}
+        self.lexicon = lexicon or default_lexicon()
+        self.sessions = TTLCache(MAX_SESSIONS)
 
     def get_db_connection(self):
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_tracing.connect(self.db_path)
         conn.row_factory = sqlite3.Row
         return conn
 
     def search_workflows_intelligent(self, query: str, limit: int = 5) -> List[Dict]:
-        """Intelligent workflow search based on natural language query."""
-        conn = self.get_db_connection()
-
-        # Extract keywords and intent from query
-        keywords = self.extract_keywords(query)
-        intent = self.detect_intent(query)
-
-        # Build search query
-        search_terms = []
-        for keyword in keywords:
-            search_terms.append(
-                f"name LIKE '%{keyword}%' OR description LIKE '%{keyword}%'"
-            )
+        """Intelligent workflow search based on natural language query.
 
-        where_clause = " OR ".join(search_terms) if search_terms else "1=1"
-
-        # Add intent-based filtering
-        if intent == "automation":
-            where_clause += (
-                " AND (trigger_type = 'Scheduled' OR trigger_type = 'Complex')"
-            )
-        elif intent == "integration":
-            where_clause += " AND trigger_type = ?"
-            params.append('Webhook')
-        elif intent == "manual":
-            where_clause += " AND trigger_type = 'Manual'"
-
-        query_sql = f"""
-            SELECT * FROM workflows 
-            WHERE {where_clause}
-            ORDER BY 
-                CASE WHEN active = 1 THEN 1 ELSE 2 END,
-                node_count DESC
-            LIMIT ?
+        Keywords and query words are matched through the FTS5 index and ranked
+        by BM25; the detected intent narrows trigger types, and is relaxed
+        when it would filter out every match.
         """
+        terms = self.search_terms(query)
+        triggers = self.lexicon.analyze(query).triggers
+
+        conn = self.get_db_connection()
+        try:
+            rows = self._ranked_rows(conn, terms, triggers, limit)
+            if not rows and triggers:
+                rows = self._ranked_rows(conn, terms, (), limit)
+        finally:
+            conn.close()
 
-        cursor = conn.execute(query_sql)
         workflows = []
-        for row in cursor.fetchall():
+        for row in rows:
             workflow = dict(row)
             workflow["integrations"] = json.loads(workflow["integrations"] or "[]")
             workflow["tags"] = json.loads(workflow["tags"] or "[]")
             workflows.append(workflow)
-
-        conn.close()
         return workflows
 
-    def extract_keywords(self, query: str) -> List[str]:
-        """Extract relevant keywords from user query."""
-        # Common automation terms
-        automation_terms = {
-            "email": ["email", "gmail", "mail"],
-            "social": ["twitter", "facebook", "instagram", "linkedin", "social"],
-            "data": ["data", "database", "spreadsheet", "csv", "excel"],
-            "ai": ["ai", "openai", "chatgpt", "artificial", "intelligence"],
-            "notification": ["notification", "alert", "slack", "telegram", "discord"],
-            "automation": ["automation", "workflow", "process", "automate"],
-            "integration": ["integration", "connect", "sync", "api"],
-        }
-
-        query_lower = query.lower()
-        keywords = []
-
-        for category, terms in automation_terms.items():
-            for term in terms:
-                if term in query_lower:
-                    keywords.append(term)
-
-        # Extract specific service names
-        services = [
-            "slack",
-            "telegram",
-            "openai",
-            "google",
-            "microsoft",
-            "shopify",
-            "airtable",
+    def _ranked_rows(
+        self, conn: sqlite3.Connection, terms: List[str], triggers: Tuple[str, ...], limit: int
+    ) -> List[sqlite3.Row]:
+        params: List = []
+        if terms:
+            # Quoted prefix terms: user text never reaches the FTS5 syntax
+            query_sql = """
+                SELECT w.* FROM workflows_fts
+                JOIN workflows w ON w.id = workflows_fts.rowid
+                WHERE workflows_fts MATCH ?
+            """
+            params.append(" OR ".join(f'"{term}"*' for term in terms))
+            order_by = f"bm25(workflows_fts, {', '.join(map(str, FTS_COLUMN_WEIGHTS))}), w.active DESC"
+        else:
+            query_sql = "SELECT w.* FROM workflows w WHERE 1=1"
+            order_by = "w.active DESC, w.node_count DESC"
+
+        if triggers:
+            query_sql += f" AND w.trigger_type IN ({', '.join('?' * len(triggers))})"
+            params.extend(triggers)
+
+        query_sql += f" ORDER BY {order_by} LIMIT ?"
+        params.append(limit)
+        return conn.execute(query_sql, params).fetchall()
+
+    def search_terms(self, query: str) -> List[str]:
+        """Known keywords first, then the remaining meaningful query words."""
+        analysis = self.lexicon.analyze(query)
+        stopwords = self.lexicon.stopwords
+        terms = [keyword for keyword in analysis.keywords if keyword not in stopwords]
+        terms += [word for word in analysis.words if len(word) > 1 and word not in stopwords]
+        return list(dict.fromkeys(terms))[:MAX_QUERY_TERMS]
+
+    def chat(self, message: str, session_id: str, limit: int = 5) -> Tuple[List[Dict], bool]:
+        """Workflows for one chat turn and whether they refined the previous turn.
+
+        A follow-up that only adds filters is answered from the session's
+        cached result set without touching the database.
+        """
+        session = self.sessions.get(session_id) or ChatSession()
+        filters = self.parse_refinement(message, session)
+        if filters is not None:
+            refined = self.refine(session.candidates, filters)
+            if refined:
+                session.remember(message, refined[:limit], refined)
+                self.sessions.set(session_id, session, SESSION_TTL_SECONDS)
+                return refined[:limit], True
+
+        candidates = self.search_workflows_intelligent(message, limit=SESSION_CANDIDATES)
+        session.remember(message, candidates[:limit], candidates)
+        self.sessions.set(session_id, session, SESSION_TTL_SECONDS)
+        return candidates[:limit], False
+
+    def parse_refinement(self, message: str, session: ChatSession) -> Optional[Dict]:
+        """Filters of a follow-up message, or None when it is a new question."""
+        if not session.candidates:
+            return None
+        message_words = self.lexicon.analyze(message).words
+        if not REFINEMENT_MARKERS.intersection(message_words):
+            return None
+
+        integrations = None
+        filters = {"triggers": set(), "complexity": set(), "integrations": set(), "active": False}
+        for word in message_words:
+            if word in REFINEMENT_TRIGGERS:
+                filters["triggers"].add(REFINEMENT_TRIGGERS[word])
+            elif word in REFINEMENT_COMPLEXITY:
+                filters["complexity"].add(REFINEMENT_COMPLEXITY[word])
+            elif word == "active":
+                filters["active"] = True
+            elif (
+                word not in REFINEMENT_MARKERS
+                and word not in REFINEMENT_FILLER
+                and word not in self.lexicon.stopwords
+            ):
+                if integrations is None:
+                    integrations = {
+                        re.sub(r"[^a-z0-9]", "", name.lower()): name
+                        for workflow in session.candidates
+                        for name in workflow["integrations"]
+                    }
+                if word not in integrations:
+                    # A new topic word: search again instead of filtering
+                    return None
+                filters["integrations"].add(integrations[word])
+
+        if not (filters["triggers"] or filters["complexity"] or filters["integrations"] or filters["active"]):
+            return None
+        return filters
+
+    def refine(self, candidates: List[Dict], filters: Dict) -> List[Dict]:
+        """Candidates matching every filter, in their original rank order."""
+        return [
+            w
+            for w in candidates
+            if (not filters["triggers"] or w["trigger_type"] in filters["triggers"])
+            and (not filters["complexity"] or w["complexity"] in filters["complexity"])
+            and filters["integrations"].issubset(w["integrations"])
+            and (not filters["active"] or w["active"])
         ]
-        for service in services:
-            if service in query_lower:
-                keywords.append(service)
 
-        return list(set(keywords))
+    def extract_keywords(self, query: str) -> List[str]:
+        """Extract relevant keywords from user query."""
+        return list(self.lexicon.analyze(query).keywords)
 
     def detect_intent(self, query: str) -> str:
         """Detect user intent from query."""
-        query_lower = query.lower()
-
-        if any(
-            word in query_lower
-            for word in ["automate", "schedule", "recurring", "daily", "weekly"]
-        ):
-            return "automation"
-        elif any(
-            word in query_lower for word in ["connect", "integrate", "sync", "webhook"]
-        ):
-            return "integration"
-        elif any(
-            word in query_lower for word in ["manual", "trigger", "button", "click"]
-        ):
-            return "manual"
-        elif any(
-            word in query_lower for word in ["ai", "chat", "assistant", "intelligent"]
-        ):
-            return "ai"
-        else:
-            return "general"
+        return self.lexicon.analyze(query).intent
 
     def generate_response(self, query: str, workflows: List[Dict]) -> str:
         """Generate natural language response based on query and workflows."""
+        return "\n".join(self.response_parts(query, workflows))
+
+    def response_parts(self, query: str, workflows: List[Dict]) -> Iterator[str]:
+        """Response lines, produced one at a time so they can be streamed."""
         if not workflows:
-            return "I couldn't find any workflows matching your request. Try searching for specific services like 'Slack', 'OpenAI', or 'Email automation'."
+            yield "I couldn't find any workflows matching your request. Try searching for specific services like 'Slack', 'OpenAI', or 'Email automation'."
+            return
 
         # Analyze workflow patterns
         trigger_types = [w["trigger_type"] for w in workflows]
@@ -158,72 +262,25 @@ class WorkflowAssistant:
         most_common_trigger = max(set(trigger_types), key=trigger_types.count)
 
         # Generate contextual response
-        response_parts = []
-
         if len(workflows) == 1:
             workflow = workflows[0]
-            response_parts.append(f"I found a perfect match: **{workflow['name']}**")
-            response_parts.append(
-                f"This is a {workflow['trigger_type'].lower()} workflow that {workflow['description'].lower()}"
-            )
+            yield f"I found a perfect match: **{workflow['name']}**"
+            yield f"This is a {workflow['trigger_type'].lower()} workflow that {workflow['description'].lower()}"
         else:
-            response_parts.append(f"I found {len(workflows)} relevant workflows:")
+            yield f"I found {len(workflows)} relevant workflows:"
 
             for i, workflow in enumerate(workflows[:3], 1):
-                response_parts.append(
-                    f"{i}. **{workflow['name']}** - {workflow['description']}"
-                )
+                yield f"{i}. **{workflow['name']}** - {workflow['description']}"
 
         if common_integrations:
-            response_parts.append(
-                f"\nThese workflows commonly use: {', '.join(common_integrations)}"
-            )
+            yield f"\nThese workflows commonly use: {', '.join(common_integrations)}"
 
         if most_common_trigger != "all":
-            response_parts.append(
-                f"Most are {most_common_trigger.lower()} triggered workflows."
-            )
-
-        return "\n".join(response_parts)
+            yield f"Most are {most_common_trigger.lower()} triggered workflows."
 
     def get_suggestions(self, query: str) -> List[str]:
         """Generate helpful suggestions based on query."""
-        suggestions = []
-
-        if "email" in query.lower():
-            suggestions.extend(
-                [
-                    "Email automation workflows",
-                    "Gmail integration examples",
-                    "Email notification systems",
-                ]
-            )
-        elif "ai" in query.lower() or "openai" in query.lower():
-            suggestions.extend(
-                [
-                    "AI-powered workflows",
-                    "OpenAI integration examples",
-                    "Chatbot automation",
-                ]
-            )
-        elif "social" in query.lower():
-            suggestions.extend(
-                [
-                    "Social media automation",
-                    "Twitter integration workflows",
-                    "LinkedIn automation",
-                ]
-            )
-        else:
-            suggestions.extend(
-                [
-                    "Popular automation patterns",
-                    "Webhook-triggered workflows",
-                    "Scheduled automation examples",
-                ]
-            )
-
-        return suggestions[:3]
+        return list(self.lexicon.analyze(query).suggestions[:3])
 
     def calculate_confidence(self, query: str, workflows: List[Dict]) -> float:
         """Calculate confidence score for the response."""
@@ -234,13 +291,10 @@ class WorkflowAssistant:
         base_confidence = min(len(workflows) / 5.0, 1.0)
 
         # Boost confidence for exact matches
-        query_lower = query.lower()
-        exact_matches = 0
-        for workflow in workflows:
-            if any(word in workflow["name"].lower() for word in query_lower.split()):
-                exact_matches += 1
-
-        if exact_matches > 0:
+        query_words = self.lexicon.analyze(query).words
+        if any(
+            word in workflow["name"].lower() for workflow in workflows for word in query_words
+        ):
             base_confidence += 0.2
 
         return min(base_confidence, 1.0)
@@ -257,8 +311,9 @@ ai_app = FastAPI(title="N8N AI Assistant", version="1.0.0")
 async def chat_with_assistant(message: ChatMessage):
     """Chat with the AI assistant to discover workflows."""
     try:
-        # Search for relevant workflows
-        workflows = assistant.search_workflows_intelligent(message.message, limit=5)
+        # Search for relevant workflows, or refine the previous turn's results
+        session_id = message.session_id or message.user_id or uuid.uuid4().hex
+        workflows, refined = assistant.chat(message.message, session_id, limit=5)
 
         # Generate response
         response_text = assistant.generate_response(message.message, workflows)
@@ -274,12 +329,61 @@ async def chat_with_assistant(message: ChatMessage):
             workflows=workflows,
             suggestions=suggestions,
             confidence=confidence,
+            session_id=session_id,
+            refined=refined,
         )
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Assistant error: {str(e)}")
 
 
+def sse_event(event: str, data: Any) -> str:
+    """One server-sent event frame with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@ai_app.post("/chat/stream")
+async def stream_chat_with_assistant(message: ChatMessage):
+    """Chat over server-sent events.
+
+    Events: "session" right away, "workflows" as soon as retrieval
+    finishes, then one "text" event per response line, "suggestions" (with
+    the confidence) and "done". Failures are reported as an "error" event.
+    """
+    session_id = message.session_id or message.user_id or uuid.uuid4().hex
+
+    async def events():
+        # Flushes the headers and first byte before retrieval starts
+        yield sse_event("session", {"session_id": session_id})
+        try:
+            workflows, refined = await run_in_threadpool(
+                assistant.chat, message.message, session_id, 5
+            )
+            yield sse_event(
+                "workflows",
+                {"session_id": session_id, "refined": refined, "workflows": workflows},
+            )
+            for part in assistant.response_parts(message.message, workflows):
+                yield sse_event("text", {"delta": part})
+            yield sse_event(
+                "suggestions",
+                {
+                    "suggestions": assistant.get_suggestions(message.message),
+                    "confidence": assistant.calculate_confidence(message.message, workflows),
+                },
+            )
+            yield sse_event("done", {})
+        except Exception as e:
+            yield sse_event("error", {"detail": f"Assistant error: {str(e)}"})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Keep proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @ai_app.get("/chat/interface")
 async def chat_interface():
     """Get the chat interface HTML."""
@@ -468,6 +572,8 @@ async def chat_interface():
         </div>
         
         <script>
+            let sessionId = null;
+
             async function sendMessage(message = null) {
                 const input = document.getElementById('messageInput');
                 const messageText = message || input.value.trim();
@@ -480,30 +586,72 @@ async def chat_interface():
                 
                 // Show typing indicator
                 const typingId = addMessage('Thinking...', 'assistant', true);
+                const removeTyping = () => {
+                    const typing = document.getElementById(typingId);
+                    if (typing) typing.remove();
+                };
                 
                 try {
-                    const response = await fetch('/chat', {
+                    const response = await fetch('/chat/stream', {
                         method: 'POST',
                         headers: {
                             'Content-Type': 'application/json',
                         },
-                        body: JSON.stringify({ message: messageText })
+                        body: JSON.stringify({ message: messageText, session_id: sessionId })
                     });
                     
-                    const data = await response.json();
-                    
-                    // Remove typing indicator
-                    document.getElementById(typingId).remove();
-                    
-                    // Add assistant response
-                    addAssistantMessage(data);
+                    // Render workflows as soon as they arrive, then the text
+                    const data = { response: '', workflows: [], suggestions: [] };
+                    let messageDiv = null;
+                    await readEventStream(response, (event, payload) => {
+                        if (event === 'error') throw new Error(payload.detail);
+                        if (event === 'session') {
+                            sessionId = payload.session_id || sessionId;
+                            return;
+                        }
+                        if (event === 'workflows') {
+                            sessionId = payload.session_id || sessionId;
+                            data.workflows = payload.workflows;
+                        } else if (event === 'text') {
+                            data.response += (data.response ? '\\n' : '') + payload.delta;
+                        } else if (event === 'suggestions') {
+                            data.suggestions = payload.suggestions;
+                        } else {
+                            return;
+                        }
+                        removeTyping();
+                        messageDiv = addAssistantMessage(data, messageDiv);
+                    });
                     
                 } catch (error) {
-                    document.getElementById(typingId).remove();
+                    removeTyping();
                     addMessage('Sorry, I encountered an error. Please try again.', 'assistant');
                 }
             }
             
+            async function readEventStream(response, onEvent) {
+                const reader = response.body.getReader();
+                const decoder = new TextDecoder();
+                let buffer = '';
+                while (true) {
+                    const { value, done } = await reader.read();
+                    if (done) break;
+                    buffer += decoder.decode(value, { stream: true });
+                    let boundary;
+                    while ((boundary = buffer.indexOf('\\n\\n')) !== -1) {
+                        const frame = buffer.slice(0, boundary);
+                        buffer = buffer.slice(boundary + 2);
+                        let event = 'message';
+                        let data = '';
+                        frame.split('\\n').forEach(line => {
+                            if (line.startsWith('event: ')) event = line.slice(7);
+                            else if (line.startsWith('data: ')) data += line.slice(6);
+                        });
+                        onEvent(event, data ? JSON.parse(data) : {});
+                    }
+                }
+            }
+            
             function addMessage(text, sender, isTyping = false) {
                 const messagesContainer = document.getElementById('chatMessages');
                 const messageDiv = document.createElement('div');
@@ -525,10 +673,14 @@ async def chat_interface():
                 return messageId;
             }
             
-            function addAssistantMessage(data) {
+            function addAssistantMessage(data, messageDiv = null) {
                 const messagesContainer = document.getElementById('chatMessages');
-                const messageDiv = document.createElement('div');
-                messageDiv.className = 'message assistant';
+                if (!messageDiv) {
+                    messageDiv = document.createElement('div');
+                    messageDiv.className = 'message assistant';
+                    messagesContainer.appendChild(messageDiv);
+                }
+                messageDiv.innerHTML = '';
                 
                 const contentDiv = document.createElement('div');
                 contentDiv.className = 'message-content';
@@ -570,8 +722,8 @@ async def chat_interface():
                 }
                 
                 messageDiv.appendChild(contentDiv);
-                messagesContainer.appendChild(messageDiv);
                 messagesContainer.scrollTop = messagesContainer.scrollHeight;
+                return messageDiv;
             }
             
             function handleKeyPress(event) {
@@ -7,11 +7,37 @@ Provides insights, patterns, and usage analytics.
 from fastapi import FastAPI, HTTPException, Query
 from fastapi.responses import HTMLResponse
 from pydantic import BaseModel
-from typing import List, Dict, Any
-import sqlite3
+from typing import List, Dict, Any, Optional, Tuple
+import asyncio
 import json
-from datetime import datetime
+import sqlite3
+import os
+import sys
+import time
+from datetime import date, datetime
 from collections import Counter, defaultdict
+from pathlib import Path
+
+# Add the parent directory to path for the shared SQLite tracing and workflow database
+sys.path.append(str(Path(__file__).parent.parent))
+
+import sqlite_tracing
+from workflow_db import WorkflowDatabase
+
+# Seconds between background checks for a new index generation
+SNAPSHOT_POLL_SECONDS = 5
+
+# Snapshots older than this are recomputed even if the index is unchanged
+SNAPSHOT_MAX_AGE_SECONDS = 3600
+
+# Trend lists: integrations need this many workflows to be ranked, and a
+# share change below STABLE_SHARE_POINTS (percentage points) counts as stable
+MIN_TREND_SUPPORT = 5
+STABLE_SHARE_POINTS = 0.1
+TREND_LIST_SIZE = 5
+
+# Pairs seen in fewer workflows than this are too rare for a meaningful lift
+MIN_PAIR_SUPPORT = 5
 
 
 class AnalyticsResponse(BaseModel):
@@ -20,19 +46,27 @@ class AnalyticsResponse(BaseModel):
     patterns: Dict[str, Any]
     recommendations: List[str]
     generated_at: str
+    snapshot_age_seconds: float = 0.0
+    stale: bool = False
 
 
 class WorkflowAnalytics:
-    def __init__(self, db_path: str = "workflows.db"):
+    def __init__(self, db_path: str = None):
+        # Use environment variable if no path provided
+        if db_path is None:
+            db_path = os.environ.get("WORKFLOW_DB_PATH", "workflows.db")
         self.db_path = db_path
+        # Owns the integration co-occurrence tables the indexer maintains
+        self.workflow_db = WorkflowDatabase(db_path, initialize=False)
 
     def get_db_connection(self):
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_tracing.connect(self.db_path)
         conn.row_factory = sqlite3.Row
         return conn
 
     def get_workflow_analytics(self) -> Dict[str, Any]:
         """Get comprehensive workflow analytics."""
+        self.workflow_db.ensure_schema()
         conn = self.get_db_connection()
 
         # Basic statistics
@@ -77,20 +111,17 @@ class WorkflowAnalytics:
         """)
         node_stats = dict(cursor.fetchone())
 
-        # Integration analysis
-        cursor = conn.execute(
-            "SELECT integrations FROM workflows WHERE integrations IS NOT NULL"
-        )
-        all_integrations = []
-        for row in cursor.fetchall():
-            integrations = json.loads(row["integrations"] or "[]")
-            all_integrations.extend(integrations)
-
-        integration_counts = Counter(all_integrations)
-        top_integrations = dict(integration_counts.most_common(10))
+        # Integration analysis (per-integration counts kept by the indexer)
+        cursor = conn.execute("""
+            SELECT name, workflow_count FROM integrations
+            WHERE workflow_count > 0
+            ORDER BY workflow_count DESC
+        """)
+        integration_counts = {row["name"]: row["workflow_count"] for row in cursor.fetchall()}
+        top_integrations = dict(Counter(integration_counts).most_common(10))
 
         # Workflow patterns
-        patterns = self.analyze_workflow_patterns(conn)
+        patterns = self.analyze_workflow_patterns(conn, integration_counts)
 
         # Recommendations
         recommendations = self.generate_recommendations(
@@ -124,34 +155,19 @@ class WorkflowAnalytics:
             "generated_at": datetime.now().isoformat(),
         }
 
-    def analyze_workflow_patterns(self, conn) -> Dict[str, Any]:
+    def analyze_workflow_patterns(
+        self, conn, integration_counts: Dict[str, int]
+    ) -> Dict[str, Any]:
         """Analyze common workflow patterns and relationships."""
-        # Integration co-occurrence analysis
-        cursor = conn.execute("""
-            SELECT name, integrations, trigger_type, complexity, node_count
-            FROM workflows 
-            WHERE integrations IS NOT NULL
-        """)
-
-        integration_pairs = defaultdict(int)
         service_categories = defaultdict(int)
+        for integration, count in integration_counts.items():
+            service_categories[self.categorize_service(integration)] += count
 
-        for row in cursor.fetchall():
-            integrations = json.loads(row["integrations"] or "[]")
-
-            # Count service categories
-            for integration in integrations:
-                category = self.categorize_service(integration)
-                service_categories[category] += 1
-
-            # Find integration pairs
-            for i in range(len(integrations)):
-                for j in range(i + 1, len(integrations)):
-                    pair = tuple(sorted([integrations[i], integrations[j]]))
-                    integration_pairs[pair] += 1
-
-        # Most common integration pairs
-        top_pairs = dict(Counter(integration_pairs).most_common(5))
+        # Integration co-occurrence, read from the indexer-maintained matrix
+        top_pairs = self.workflow_db.integration_pairs(limit=5)
+        strongest_pairs = self.workflow_db.integration_pairs(
+            limit=5, order_by="lift", min_count=MIN_PAIR_SUPPORT
+        )
 
         # Workflow complexity patterns
         cursor = conn.execute("""
@@ -178,6 +194,7 @@ class WorkflowAnalytics:
 
         return {
             "integration_pairs": top_pairs,
+            "strongest_pairs": strongest_pairs,
             "service_categories": dict(service_categories),
             "complexity_patterns": complexity_patterns[:10],
         }
@@ -271,24 +288,134 @@ class WorkflowAnalytics:
         return recommendations
 
     def get_trend_analysis(self, days: int = 30) -> Dict[str, Any]:
-        """Analyze trends over time (simulated for demo)."""
-        # In a real implementation, this would analyze historical data
+        """Analyze trends over the last `days` days from the daily index rollups."""
+        conn = self.get_db_connection()
+        try:
+            since, today = conn.execute(
+                "SELECT date('now', ?), date('now')", (f"-{days} days",)
+            ).fetchone()
+            rows = conn.execute(
+                "SELECT * FROM index_daily WHERE day >= ? ORDER BY day", (since,)
+            ).fetchall()
+            # The window starts from the last state before it, if there is one
+            baseline = conn.execute(
+                "SELECT * FROM index_daily WHERE day < ? ORDER BY day DESC LIMIT 1", (since,)
+            ).fetchone()
+            # ...otherwise history began inside it, with its first generation
+            first = conn.execute(
+                """
+                SELECT *, date(finished_at) AS day FROM index_generations
+                WHERE date(finished_at) >= ? ORDER BY generation LIMIT 1
+                """,
+                (since,),
+            ).fetchone()
+            names = dict(conn.execute("SELECT id, name FROM integrations").fetchall())
+        except sqlite3.OperationalError:
+            rows, baseline, first = [], None, None
+        finally:
+            conn.close()
+
+        if not rows and baseline is None:
+            return {
+                "period": {"days": days, "history_available": False},
+                "workflow_growth": {"daily_average": 0, "growth_rate": 0, "trend": "unknown"},
+                "popular_integrations": {"trending_up": [], "trending_down": [], "stable": []},
+                "complexity_trends": {"average_nodes": 0, "complexity_increase": 0},
+            }
+
+        if baseline is not None or first is None:
+            start, covered = baseline or rows[0], days
+        else:
+            # The state before the first generation, rewound by its churn; the
+            # first index run starts from an empty catalog, so its mix is empty
+            opening = first["workflows"] - first["added"] + first["removed"]
+            start = {
+                "day": first["day"],
+                "generation": first["generation"] - 1,
+                "workflows": opening,
+                "avg_nodes": first["avg_nodes"] if opening else 0,
+                "complexity": first["complexity"] if opening else "{}",
+                "integrations": first["integrations"] if opening else "{}",
+            }
+            covered = min(days, (date.fromisoformat(today) - date.fromisoformat(first["day"])).days + 1)
+        end = rows[-1] if rows else baseline
+        added = sum(row["added"] for row in rows)
+        removed = sum(row["removed"] for row in rows)
+        changed = sum(row["changed"] for row in rows)
+        net = end["workflows"] - start["workflows"]
+
         return {
-            "workflow_growth": {
-                "daily_average": 2.3,
-                "growth_rate": 15.2,
-                "trend": "increasing",
+            "period": {
+                "days": days,
+                "history_available": True,
+                "from": start["day"],
+                "to": end["day"],
+                "days_covered": covered,
+                "generations": end["generation"] - start["generation"],
             },
-            "popular_integrations": {
-                "trending_up": ["OpenAI", "Slack", "Google Sheets"],
-                "trending_down": ["Twitter", "Facebook"],
-                "stable": ["Telegram", "Airtable"],
-            },
-            "complexity_trends": {
-                "average_nodes": 12.5,
-                "complexity_increase": 8.3,
-                "automation_maturity": "intermediate",
+            "workflow_growth": {
+                "daily_average": round(added / max(covered, 1), 2),
+                # Undefined when the window opens on an empty catalog
+                "growth_rate": round(net / start["workflows"] * 100, 2) if start["workflows"] else None,
+                "trend": "increasing" if net > 0 else "decreasing" if net < 0 else "stable",
+                "added": added,
+                "changed": changed,
+                "removed": removed,
+                "total": end["workflows"],
             },
+            "popular_integrations": self._integration_trends(start, end, names),
+            "complexity_trends": self._complexity_trends(start, end),
+        }
+
+    def _integration_trends(self, start, end, names: Dict[int, str]) -> Dict[str, Any]:
+        """Integrations whose share of all workflows moved the most."""
+        before = json.loads(start["integrations"])
+        after = json.loads(end["integrations"])
+        shifts, counts = {}, {}
+        for iid in set(before) | set(after):
+            if max(before.get(iid, 0), after.get(iid, 0)) < MIN_TREND_SUPPORT:
+                continue
+            share_before = before.get(iid, 0) / max(start["workflows"], 1)
+            share_after = after.get(iid, 0) / max(end["workflows"], 1)
+            name = names.get(int(iid), iid)
+            shifts[name] = round((share_after - share_before) * 100, 3)
+            counts[name] = after.get(iid, 0)
+
+        ranked = sorted(shifts.items(), key=lambda item: item[1], reverse=True)
+        stable = sorted(
+            (name for name, shift in shifts.items() if abs(shift) < STABLE_SHARE_POINTS),
+            key=lambda name: counts[name],
+            reverse=True,
+        )
+        return {
+            "trending_up": [name for name, shift in ranked[:TREND_LIST_SIZE] if shift >= STABLE_SHARE_POINTS],
+            "trending_down": [
+                name for name, shift in reversed(ranked[-TREND_LIST_SIZE:]) if shift <= -STABLE_SHARE_POINTS
+            ],
+            "stable": stable[:TREND_LIST_SIZE],
+            "share_change_points": dict(ranked[:TREND_LIST_SIZE] + ranked[-TREND_LIST_SIZE:]),
+        }
+
+    def _complexity_trends(self, start, end) -> Dict[str, Any]:
+        """Average node count and complexity mix at the end of the window vs its start."""
+        before = json.loads(start["complexity"])
+        after = json.loads(end["complexity"])
+        drift = {
+            level: round(
+                (after.get(level, 0) / max(end["workflows"], 1)
+                 - before.get(level, 0) / max(start["workflows"], 1)) * 100,
+                3,
+            )
+            for level in sorted(set(before) | set(after))
+        }
+        average = end["avg_nodes"]
+        return {
+            "average_nodes": round(average, 2),
+            "complexity_increase": round((average - start["avg_nodes"]) / start["avg_nodes"] * 100, 2)
+            if start["avg_nodes"]
+            else 0,
+            "complexity_drift_points": drift,
+            "automation_maturity": "beginner" if average < 5 else "intermediate" if average < 15 else "advanced",
         }
 
     def get_usage_insights(self) -> Dict[str, Any]:
@@ -340,32 +467,175 @@ class WorkflowAnalytics:
         }
 
 
+class AnalyticsSnapshots:
+    """Analytics overview computed once per index generation.
+
+    Requests are answered from the last snapshot in memory and only compare
+    in-memory values; the poller reads the latest index generation off the
+    event loop. When the indexer has recorded a new generation since the
+    snapshot was computed or it has aged out, a refresh runs in a worker
+    thread while the stale snapshot keeps being served. Other writes
+    (ratings, view counters) do not trigger a refresh.
+    """
+
+    def __init__(
+        self,
+        engine: WorkflowAnalytics,
+        poll_seconds: float = SNAPSHOT_POLL_SECONDS,
+        max_age: float = SNAPSHOT_MAX_AGE_SECONDS,
+    ):
+        self.engine = engine
+        self.poll_seconds = poll_seconds
+        self.max_age = max_age
+        self.snapshot: Optional[Dict[str, Any]] = None
+        self.generation: Optional[int] = None
+        # Latest generation the poller has seen in the database
+        self.latest_generation: Optional[int] = None
+        self.computed_at = 0.0
+        self.refreshes = 0
+        self.last_refresh_ms: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._refreshing: Optional[asyncio.Task] = None
+        self._poller: Optional[asyncio.Task] = None
+
+    def index_generation(self) -> int:
+        return self.engine.workflow_db.index_generation()
+
+    def age(self) -> float:
+        return time.monotonic() - self.computed_at if self.snapshot is not None else 0.0
+
+    def is_stale(self) -> bool:
+        return (
+            self.snapshot is None
+            or self.age() > self.max_age
+            or (self.latest_generation is not None and self.latest_generation != self.generation)
+        )
+
+    def _compute(self) -> Tuple[int, Dict[str, Any]]:
+        # Older databases get their generation history on first use
+        self.engine.workflow_db.ensure_schema()
+        # Read the generation first: writes landing mid-compute trigger another refresh
+        generation = self.index_generation()
+        return generation, {
+            "analytics": self.engine.get_workflow_analytics(),
+            "trends": self.engine.get_trend_analysis(),
+            "insights": self.engine.get_usage_insights(),
+        }
+
+    async def _refresh(self):
+        started = time.perf_counter()
+        try:
+            generation, snapshot = await asyncio.to_thread(self._compute)
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"❌ Analytics snapshot refresh failed: {e}")
+            return
+        self.snapshot, self.generation = snapshot, generation
+        if self.latest_generation is None or self.latest_generation < generation:
+            self.latest_generation = generation
+        self.computed_at = time.monotonic()
+        self.refreshes += 1
+        self.last_error = None
+        self.last_refresh_ms = round((time.perf_counter() - started) * 1000, 1)
+
+    def refresh(self) -> asyncio.Task:
+        """Start a refresh unless one is running; concurrent callers share it."""
+        if self._refreshing is None or self._refreshing.done():
+            self._refreshing = asyncio.get_running_loop().create_task(self._refresh())
+        return self._refreshing
+
+    async def current(self) -> Dict[str, Any]:
+        """The latest snapshot, waiting only if none has been computed yet."""
+        if self.snapshot is None:
+            await asyncio.shield(self.refresh())
+            if self.snapshot is None:
+                raise RuntimeError(self.last_error or "analytics snapshot unavailable")
+        elif self.is_stale():
+            self.refresh()
+        return self.snapshot
+
+    async def _poll(self):
+        while True:
+            try:
+                self.latest_generation = await asyncio.to_thread(self.index_generation)
+                if self.is_stale():
+                    await self.refresh()
+            except sqlite3.Error as e:
+                self.last_error = str(e)
+            await asyncio.sleep(self.poll_seconds)
+
+    def start(self):
+        """Compute the first snapshot and keep it current in the background."""
+        if self._poller is None:
+            self._poller = asyncio.get_running_loop().create_task(self._poll())
+
+    async def stop(self):
+        for task in (self._poller, self._refreshing):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._poller = self._refreshing = None
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "generation": self.generation,
+            "age_seconds": round(self.age(), 3),
+            "stale": self.snapshot is None or self.is_stale(),
+            "refreshing": self._refreshing is not None and not self._refreshing.done(),
+            "refreshes": self.refreshes,
+            "last_refresh_ms": self.last_refresh_ms,
+            "last_error": self.last_error,
+        }
+
+
 # Initialize analytics engine
 analytics_engine = WorkflowAnalytics()
+snapshots = AnalyticsSnapshots(analytics_engine)
 
 # FastAPI app for Analytics
 analytics_app = FastAPI(title="N8N Analytics Engine", version="1.0.0")
 
 
+@analytics_app.on_event("startup")
+async def start_analytics_snapshots():
+    """Compute the analytics snapshot in the background from startup on."""
+    snapshots.start()
+
+
+@analytics_app.on_event("shutdown")
+async def stop_analytics_snapshots():
+    await snapshots.stop()
+
+
 @analytics_app.get("/analytics/overview", response_model=AnalyticsResponse)
 async def get_analytics_overview():
-    """Get comprehensive analytics overview."""
+    """Get comprehensive analytics overview (served from the current snapshot)."""
     try:
-        analytics_data = analytics_engine.get_workflow_analytics()
-        trends = analytics_engine.get_trend_analysis()
-        insights = analytics_engine.get_usage_insights()
+        snapshot = await snapshots.current()
+        analytics_data = snapshot["analytics"]
 
         return AnalyticsResponse(
             overview=analytics_data["overview"],
-            trends=trends,
+            trends=snapshot["trends"],
             patterns=analytics_data["patterns"],
             recommendations=analytics_data["recommendations"],
             generated_at=analytics_data["generated_at"],
+            snapshot_age_seconds=round(snapshots.age(), 3),
+            stale=snapshots.is_stale(),
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Analytics error: {str(e)}")
 
 
+@analytics_app.get("/analytics/snapshot")
+async def get_snapshot_status():
+    """Age, generation and refresh state of the analytics snapshot."""
+    return snapshots.status()
+
+
 @analytics_app.get("/analytics/trends")
 async def get_trend_analysis(days: int = Query(30, ge=1, le=365)):
     """Get trend analysis for specified period."""
@@ -375,11 +645,45 @@ async def get_trend_analysis(days: int = Query(30, ge=1, le=365)):
         raise HTTPException(status_code=500, detail=f"Trend analysis error: {str(e)}")
 
 
+@analytics_app.get("/analytics/integrations/pairs")
+async def get_integration_pairs(
+    limit: int = Query(10, ge=1, le=100),
+    order_by: str = Query("count", pattern="^(count|lift|pmi)$"),
+    min_count: int = Query(1, ge=1),
+):
+    """Integration pairs by co-occurrence count, lift or PMI."""
+    try:
+        analytics_engine.workflow_db.ensure_schema()
+        return {
+            "pairs": analytics_engine.workflow_db.integration_pairs(limit, order_by, min_count)
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Co-occurrence error: {str(e)}")
+
+
+@analytics_app.get("/analytics/integrations/{integration}/related")
+async def get_frequently_used_with(
+    integration: str,
+    limit: int = Query(10, ge=1, le=100),
+    order_by: str = Query("count", pattern="^(count|lift|pmi)$"),
+    min_count: int = Query(1, ge=1),
+):
+    """Integrations frequently used together with the given one."""
+    try:
+        analytics_engine.workflow_db.ensure_schema()
+        related = analytics_engine.workflow_db.frequently_used_with(
+            integration, limit, order_by, min_count
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Co-occurrence error: {str(e)}")
+    return {"integration": integration, "related": related}
+
+
 @analytics_app.get("/analytics/insights")
 async def get_usage_insights():
     """Get usage insights and patterns."""
     try:
-        return analytics_engine.get_usage_insights()
+        return (await snapshots.current())["insights"]
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Insights error: {str(e)}")
 
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Assistant Lexicon
+Keyword, intent and suggestion vocabulary of the AI assistant, loaded from
+context/assistant_lexicon.json and compiled into one regex so each query is
+tokenized and analyzed in a single pass.
+"""
+
+import json
+import os
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+
+DEFAULT_LEXICON_PATH = Path(__file__).parent.parent / "context" / "assistant_lexicon.json"
+
+# Analyses kept per lexicon; chat turns analyze the same message several times
+ANALYSIS_CACHE_SIZE = 1024
+
+# Inflections a lexicon term still matches ("emails", "scheduled", "syncing")
+TERM_SUFFIXES = ("s", "es", "d", "ed", "ing")
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+@dataclass(frozen=True)
+class QueryAnalysis:
+    """Everything the assistant derives from a query, computed once."""
+
+    words: Tuple[str, ...]
+    keywords: Tuple[str, ...]
+    intent: str
+    triggers: Tuple[str, ...]
+    suggestions: Tuple[str, ...]
+
+
+class Lexicon:
+    """Compiled matcher over every lexicon term.
+
+    Terms match whole words (plus TERM_SUFFIXES), so "ai" no longer matches
+    inside "email" or "airtable".
+    """
+
+    def __init__(self, data: Dict[str, Any]):
+        self.keywords: List[str] = list(
+            dict.fromkeys(term for terms in data["keywords"].values() for term in terms)
+        )
+        self.intents: List[Tuple[str, frozenset, Tuple[str, ...]]] = [
+            (intent["name"], frozenset(intent["terms"]), tuple(intent.get("triggers", ())))
+            for intent in data["intents"]
+        ]
+        self.suggestion_buckets: List[Tuple[frozenset, Tuple[str, ...]]] = [
+            (frozenset(bucket["terms"]), tuple(bucket["suggestions"]))
+            for bucket in data["suggestions"]
+        ]
+        self.default_suggestions = tuple(data["default_suggestions"])
+        self.stopwords = frozenset(data.get("stopwords", ()))
+
+        terms = set(self.keywords)
+        for _, intent_terms, _ in self.intents:
+            terms |= intent_terms
+        for bucket_terms, _ in self.suggestion_buckets:
+            terms |= bucket_terms
+        # Longest first so "openai" wins over a shorter overlapping term
+        alternation = "|".join(re.escape(t) for t in sorted(terms, key=len, reverse=True))
+        suffixes = "|".join(TERM_SUFFIXES)
+        self.pattern = re.compile(rf"\b({alternation})(?:{suffixes})?\b")
+        self.analyze = lru_cache(maxsize=ANALYSIS_CACHE_SIZE)(self._analyze)
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> "Lexicon":
+        with open(path or DEFAULT_LEXICON_PATH, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def _analyze(self, query: str) -> QueryAnalysis:
+        text = query.lower()
+        matched = dict.fromkeys(m.group(1) for m in self.pattern.finditer(text))
+
+        intent, triggers = "general", ()
+        for name, intent_terms, intent_triggers in self.intents:
+            if not intent_terms.isdisjoint(matched):
+                intent, triggers = name, intent_triggers
+                break
+
+        suggestions = self.default_suggestions
+        for bucket_terms, bucket_suggestions in self.suggestion_buckets:
+            if not bucket_terms.isdisjoint(matched):
+                suggestions = bucket_suggestions
+                break
+
+        return QueryAnalysis(
+            words=tuple(_WORD_RE.findall(text)),
+            keywords=tuple(term for term in self.keywords if term in matched),
+            intent=intent,
+            triggers=triggers,
+            suggestions=suggestions,
+        )
+
+
+@lru_cache(maxsize=None)
+def default_lexicon() -> Lexicon:
+    """Process-wide lexicon from ASSISTANT_LEXICON_PATH or the bundled file."""
+    return Lexicon.load(os.environ.get("ASSISTANT_LEXICON_PATH"))
@@ -4,12 +4,40 @@ Community Features Module for n8n Workflows Repository
 Implements rating, review, and social features
 """
 
+import atexit
 import sqlite3
 import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
 from datetime import datetime
-from typing import Dict, List, Optional
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 
+# Add the parent directory to path for the shared SQLite tracing
+sys.path.append(str(Path(__file__).parent.parent))
+
+import sqlite_tracing
+
+# View/download counters are written behind: increments are summed in memory
+# and flushed in one transaction every COUNTER_FLUSH_SECONDS (at most that
+# much is lost on a crash) or as soon as COUNTER_FLUSH_THRESHOLD are pending.
+# COUNTER_FLUSH_SECONDS=0 writes every increment through.
+COUNTER_FLUSH_SECONDS = float(os.environ.get("COMMUNITY_COUNTER_FLUSH_SECONDS", "5"))
+COUNTER_FLUSH_THRESHOLD = int(os.environ.get("COMMUNITY_COUNTER_FLUSH_THRESHOLD", "1000"))
+
+FLUSH_COUNTERS_SQL = """
+    INSERT INTO workflow_stats (workflow_id, total_views, total_downloads, last_updated)
+    VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+    ON CONFLICT(workflow_id) DO UPDATE SET
+        total_views = total_views + excluded.total_views,
+        total_downloads = total_downloads + excluded.total_downloads,
+        last_updated = CURRENT_TIMESTAMP
+"""
+
 
 @dataclass
 class WorkflowRating:
@@ -37,17 +65,138 @@ class WorkflowStats:
     last_updated: datetime
 
 
+class CounterBuffer:
+    """Write-behind aggregator for workflow view and download counters."""
+
+    def __init__(
+        self,
+        db_path: str,
+        flush_seconds: float = COUNTER_FLUSH_SECONDS,
+        flush_threshold: int = COUNTER_FLUSH_THRESHOLD,
+    ):
+        self.db_path = db_path
+        self.flush_seconds = flush_seconds
+        self.flush_threshold = flush_threshold
+        self._pending: Dict[str, List[int]] = defaultdict(lambda: [0, 0])
+        self._pending_increments = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+        self.flushes = 0
+        self.flushed_increments = 0
+        self.failed_flushes = 0
+        self.last_flush_ms: Optional[float] = None
+        atexit.register(self.close)
+
+    def add(self, workflow_id: str, views: int = 0, downloads: int = 0):
+        if self.flush_seconds <= 0 or self._stopped:
+            self._write({workflow_id: [views, downloads]})
+            return
+        with self._lock:
+            counts = self._pending[workflow_id]
+            counts[0] += views
+            counts[1] += downloads
+            self._pending_increments += views + downloads
+            full = self._pending_increments >= self.flush_threshold
+            if self._thread is None:
+                # Started on first use, so a pre-forking server starts one per worker
+                self._thread = threading.Thread(
+                    target=self._run, name="community-counters", daemon=True
+                )
+                self._thread.start()
+        if full:
+            self._wake.set()
+
+    def pending(self, workflow_id: str) -> Tuple[int, int]:
+        """Increments of a workflow not yet written (views, downloads)."""
+        with self._lock:
+            counts = self._pending.get(workflow_id)
+            return (counts[0], counts[1]) if counts else (0, 0)
+
+    def _run(self):
+        while not self._stopped:
+            self._wake.wait(self.flush_seconds)
+            self._wake.clear()
+            self.flush()
+
+    def _write(self, batch: Dict[str, List[int]]):
+        conn = sqlite_tracing.connect(self.db_path)
+        try:
+            conn.executemany(
+                FLUSH_COUNTERS_SQL,
+                [(workflow_id, views, downloads) for workflow_id, (views, downloads) in batch.items()],
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def flush(self) -> int:
+        """Write every pending increment in one transaction; returns how many."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, defaultdict(lambda: [0, 0])
+                increments, self._pending_increments = self._pending_increments, 0
+            if not batch:
+                return 0
+            started = time.perf_counter()
+            try:
+                self._write(batch)
+            except sqlite3.Error as e:
+                # Keep the increments for the next flush instead of dropping them
+                with self._lock:
+                    for workflow_id, (views, downloads) in batch.items():
+                        counts = self._pending[workflow_id]
+                        counts[0] += views
+                        counts[1] += downloads
+                    self._pending_increments += increments
+                self.failed_flushes += 1
+                print(f"⚠️  Counter flush failed, will retry: {e}")
+                return 0
+            self.flushes += 1
+            self.flushed_increments += increments
+            self.last_flush_ms = round((time.perf_counter() - started) * 1000, 2)
+            return increments
+
+    def close(self):
+        """Stop the flusher and write what is pending (on shutdown)."""
+        self._stopped = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.flush()
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            pending = self._pending_increments
+        return {
+            "pending_increments": pending,
+            "flushes": self.flushes,
+            "flushed_increments": self.flushed_increments,
+            "failed_flushes": self.failed_flushes,
+            "last_flush_ms": self.last_flush_ms,
+            "flush_seconds": self.flush_seconds,
+            "flush_threshold": self.flush_threshold,
+        }
+
+
 class CommunityFeatures:
     """Community features manager for workflow repository"""
 
-    def __init__(self, db_path: str = "workflows.db"):
+    def __init__(self, db_path: str = None):
         """Initialize community features with database connection"""
+        # Use environment variable if no path provided
+        if db_path is None:
+            db_path = os.environ.get("WORKFLOW_DB_PATH", "workflows.db")
         self.db_path = db_path
         self.init_community_tables()
+        self.counters = CounterBuffer(db_path)
 
     def init_community_tables(self):
         """Initialize community feature database tables"""
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_tracing.connect(self.db_path)
         cursor = conn.cursor()
 
         # Workflow ratings and reviews
@@ -132,7 +281,7 @@ class CommunityFeatures:
         if not (1 <= rating <= 5):
             raise ValueError("Rating must be between 1 and 5")
 
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_tracing.connect(self.db_path)
         cursor = conn.cursor()
 
         try:
@@ -162,7 +311,7 @@ class CommunityFeatures:
         self, workflow_id: str, limit: int = 10
     ) -> List[WorkflowRating]:
         """Get ratings and reviews for a workflow"""
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_tracing.connect(self.db_path)
         cursor = conn.cursor()
 
         cursor.execute(
@@ -195,7 +344,7 @@ class CommunityFeatures:
 
     def get_workflow_stats(self, workflow_id: str) -> Optional[WorkflowStats]:
         """Get comprehensive statistics for a workflow"""
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_tracing.connect(self.db_path)
         cursor = conn.cursor()
 
         cursor.execute(
@@ -211,71 +360,46 @@ class CommunityFeatures:
         row = cursor.fetchone()
         conn.close()
 
+        # Include increments still waiting to be flushed
+        views, downloads = self.counters.pending(workflow_id)
         if row:
             return WorkflowStats(
                 workflow_id=row[0],
                 total_ratings=row[1],
                 average_rating=row[2],
                 total_reviews=row[3],
-                total_views=row[4],
-                total_downloads=row[5],
+                total_views=row[4] + views,
+                total_downloads=row[5] + downloads,
                 last_updated=datetime.fromisoformat(row[6]) if row[6] else None,
             )
+        if views or downloads:
+            # First views of a workflow, not flushed into a row yet
+            return WorkflowStats(
+                workflow_id=workflow_id,
+                total_ratings=0,
+                average_rating=0.0,
+                total_reviews=0,
+                total_views=views,
+                total_downloads=downloads,
+                last_updated=None,
+            )
         return None
 
     def increment_view(self, workflow_id: str):
-        """Increment view count for a workflow"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        cursor.execute(
-            """
-            INSERT OR IGNORE INTO workflow_stats (workflow_id, total_views)
-            VALUES (?, 1)
-        """,
-            (workflow_id,),
-        )
-
-        cursor.execute(
-            """
-            UPDATE workflow_stats 
-            SET total_views = total_views + 1, last_updated = CURRENT_TIMESTAMP
-            WHERE workflow_id = ?
-        """,
-            (workflow_id,),
-        )
-
-        conn.commit()
-        conn.close()
+        """Increment view count for a workflow (written behind, in batches)"""
+        self.counters.add(workflow_id, views=1)
 
     def increment_download(self, workflow_id: str):
-        """Increment download count for a workflow"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        cursor.execute(
-            """
-            INSERT OR IGNORE INTO workflow_stats (workflow_id, total_downloads)
-            VALUES (?, 1)
-        """,
-            (workflow_id,),
-        )
+        """Increment download count for a workflow (written behind, in batches)"""
+        self.counters.add(workflow_id, downloads=1)
 
-        cursor.execute(
-            """
-            UPDATE workflow_stats 
-            SET total_downloads = total_downloads + 1, last_updated = CURRENT_TIMESTAMP
-            WHERE workflow_id = ?
-        """,
-            (workflow_id,),
-        )
-
-        conn.commit()
-        conn.close()
+    def flush_counters(self) -> int:
+        """Write pending view/download increments now"""
+        return self.counters.flush()
 
     def get_top_rated_workflows(self, limit: int = 10) -> List[Dict]:
         """Get top-rated workflows"""
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_tracing.connect(self.db_path)
         cursor = conn.cursor()
 
         cursor.execute(
@@ -307,7 +431,7 @@ class CommunityFeatures:
 
     def get_most_popular_workflows(self, limit: int = 10) -> List[Dict]:
         """Get most popular workflows by views and downloads"""
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_tracing.connect(self.db_path)
         cursor = conn.cursor()
 
         cursor.execute(
@@ -345,7 +469,7 @@ class CommunityFeatures:
         description: str = None,
     ) -> bool:
         """Create a workflow collection"""
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_tracing.connect(self.db_path)
         cursor = conn.cursor()
 
         try:
@@ -375,7 +499,7 @@ class CommunityFeatures:
 
     def get_user_collections(self, user_id: str) -> List[Dict]:
         """Get collections for a user"""
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_tracing.connect(self.db_path)
         cursor = conn.cursor()
 
         cursor.execute(
@@ -406,7 +530,7 @@ class CommunityFeatures:
 
     def _update_workflow_stats(self, workflow_id: str):
         """Update workflow statistics after rating changes"""
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_tracing.connect(self.db_path)
         cursor = conn.cursor()
 
         # Calculate new statistics
@@ -421,12 +545,17 @@ class CommunityFeatures:
 
         total_ratings, avg_rating, total_reviews = cursor.fetchone()
 
-        # Update or insert statistics
+        # Update or insert statistics, keeping the view/download counters
         cursor.execute(
             """
-            INSERT OR REPLACE INTO workflow_stats 
+            INSERT INTO workflow_stats
             (workflow_id, total_ratings, average_rating, total_reviews, last_updated)
             VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(workflow_id) DO UPDATE SET
+                total_ratings = excluded.total_ratings,
+                average_rating = excluded.average_rating,
+                total_reviews = excluded.total_reviews,
+                last_updated = CURRENT_TIMESTAMP
         """,
             (workflow_id, total_ratings or 0, avg_rating or 0.0, total_reviews or 0),
         )
@@ -436,9 +565,15 @@ class CommunityFeatures:
 
 
 # Example usage and API endpoints
-def create_community_api_endpoints(app):
+def create_community_api_endpoints(app, community: Optional[CommunityFeatures] = None):
     """Add community feature endpoints to FastAPI app"""
-    community = CommunityFeatures()
+    # Sharing the app's instance lets its stats reads see buffered counters
+    community = community or CommunityFeatures()
+
+    @app.on_event("shutdown")
+    async def flush_community_counters():
+        """Write buffered view/download counts before exiting"""
+        community.counters.close()
 
     @app.post("/api/workflows/{workflow_id}/rate")
     async def rate_workflow(workflow_id: str, rating_data: dict):
@@ -4,15 +4,27 @@ Enhanced API Module for n8n Workflows Repository
 Advanced features, analytics, and performance optimizations
 """
 
+import os
 import sqlite3
+import sys
 import time
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
 from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
 import uvicorn
+from pathlib import Path
+
+# Add the parent directory to path for shared request metrics and SQLite tracing
+sys.path.append(str(Path(__file__).parent.parent))
+
+from request_metrics import RequestMetricsMiddleware
+import sqlite_tracing
+from columnar_store import CatalogCache
+from workflow_db import WorkflowDatabase
 
 # Import community features
 from community_features import CommunityFeatures, create_community_api_endpoints
@@ -43,17 +55,26 @@ class WorkflowRecommendationRequest(BaseModel):
 class AnalyticsRequest(BaseModel):
     """Analytics request model"""
 
-    date_range: str  # "7d", "30d", "90d", "1y"
-    metrics: List[str]  # ["views", "downloads", "ratings", "searches"]
+    date_range: Optional[str] = None  # "7d", "30d", "90d", "1y"
+    metrics: List[str] = ["count"]  # "count", "<sum|avg|min|max>:<measure>", "views", ...
+    filters: Dict[str, Any] = {}  # {"trigger_type": ["Webhook"], "node_count": {"min": 5}}
+    group_by: List[str] = []  # ["complexity"], ["integrations"], ...
+    limit: int = 100
 
 
 class EnhancedAPI:
     """Enhanced API with advanced features"""
 
-    def __init__(self, db_path: str = "workflows.db"):
+    def __init__(self, db_path: str = None):
         """Initialize enhanced API"""
+        # Use environment variable if no path provided
+        if db_path is None:
+            db_path = os.environ.get("WORKFLOW_DB_PATH", "workflows.db")
         self.db_path = db_path
         self.community = CommunityFeatures(db_path)
+        self.catalog = CatalogCache(db_path)
+        # Shared read paths (related workflows); the indexer owns the schema
+        self.workflow_db = WorkflowDatabase(db_path, initialize=False)
         self.app = FastAPI(
             title="N8N Workflows Enhanced API",
             description="Advanced API for n8n workflows repository with community features",
@@ -76,6 +97,9 @@ class EnhancedAPI:
         # Gzip compression
         self.app.add_middleware(GZipMiddleware, minimum_size=1000)
 
+        # Per-route request timing (outermost, so it sees compressed bytes)
+        self.app.add_middleware(RequestMetricsMiddleware)
+
     def _setup_routes(self):
         """Setup API routes"""
 
@@ -209,9 +233,12 @@ class EnhancedAPI:
         async def get_custom_analytics(request: AnalyticsRequest):
             """Get custom analytics data"""
             try:
-                analytics = self._get_custom_analytics(request)
+                # Only the first call loads the catalog; reloads run in the background
+                analytics = await run_in_threadpool(self._get_custom_analytics, request)
                 return analytics
 
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
             except Exception as e:
                 raise HTTPException(status_code=500, detail=str(e))
 
@@ -226,12 +253,42 @@ class EnhancedAPI:
             except Exception as e:
                 raise HTTPException(status_code=500, detail=str(e))
 
+        @self.app.get("/api/v2/admin/slow-queries")
+        async def get_slow_queries(
+            limit: int = Query(50, ge=1, le=500),
+            sort: str = Query("total_ms"),
+            admin_token: Optional[str] = Query(None),
+        ):
+            """SQL fingerprint statistics and recent slow queries of this process"""
+            self._require_admin_token(admin_token)
+            if sort not in sqlite_tracing.REPORT_SORT_KEYS:
+                raise HTTPException(status_code=400, detail="Invalid sort key")
+            return sqlite_tracing.query_log.report(limit=limit, sort=sort)
+
+        @self.app.post("/api/v2/admin/slow-queries/reset")
+        async def reset_slow_queries(admin_token: Optional[str] = Query(None)):
+            """Clear this process's slow-query log"""
+            self._require_admin_token(admin_token)
+            sqlite_tracing.query_log.reset()
+            return {"message": "Slow-query log cleared"}
+
         # Add community endpoints
-        create_community_api_endpoints(self.app)
+        create_community_api_endpoints(self.app, self.community)
+
+    def _require_admin_token(self, admin_token: Optional[str]):
+        """Reject admin requests unless they carry ADMIN_TOKEN"""
+        expected_token = os.environ.get("ADMIN_TOKEN")
+        if not expected_token:
+            raise HTTPException(
+                status_code=503,
+                detail="Admin endpoints are disabled. Set ADMIN_TOKEN environment variable to enable.",
+            )
+        if admin_token != expected_token:
+            raise HTTPException(status_code=401, detail="Invalid authentication token")
 
     def _search_workflows_enhanced(self, **kwargs) -> List[Dict]:
         """Enhanced workflow search with multiple filters"""
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_tracing.connect(self.db_path)
         cursor = conn.cursor()
 
         # Build dynamic query
@@ -337,7 +394,7 @@ class EnhancedAPI:
         include_related: bool,
     ) -> Dict:
         """Get detailed workflow information"""
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_tracing.connect(self.db_path)
         cursor = conn.cursor()
 
         # Get basic workflow data
@@ -390,7 +447,7 @@ class EnhancedAPI:
         """Get personalized workflow recommendations"""
         # Implementation for recommendation algorithm
         # This would use collaborative filtering, content-based filtering, etc.
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_tracing.connect(self.db_path)
         cursor = conn.cursor()
 
         # Simple recommendation based on user interests
@@ -424,7 +481,7 @@ class EnhancedAPI:
 
     def _get_analytics_overview(self) -> Dict:
         """Get analytics overview"""
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_tracing.connect(self.db_path)
         cursor = conn.cursor()
 
         # Total workflows
@@ -454,18 +511,25 @@ class EnhancedAPI:
         }
 
     def _get_custom_analytics(self, request: AnalyticsRequest) -> Dict:
-        """Get custom analytics data"""
-        # Implementation for custom analytics
+        """Get custom analytics data from the columnar catalog"""
+        catalog = self.catalog.get()
+        data = catalog.query(
+            filters=request.filters,
+            group_by=request.group_by,
+            metrics=request.metrics,
+            limit=request.limit,
+        )
         return {
             "date_range": request.date_range,
             "metrics": request.metrics,
-            "data": {},  # Placeholder for actual analytics data
+            "data": data,
+            "catalog": {"rows": catalog.rows, "load_ms": self.catalog.load_ms},
             "timestamp": datetime.now().isoformat(),
         }
 
     def _get_health_status(self) -> Dict:
         """Get health status and performance metrics"""
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_tracing.connect(self.db_path)
         cursor = conn.cursor()
 
         # Database health
@@ -496,41 +560,21 @@ class EnhancedAPI:
         }
 
     def _get_related_workflows(self, workflow_id: str, limit: int = 5) -> List[Dict]:
-        """Get related workflows based on similar integrations or categories"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        # Get current workflow details
-        cursor.execute(
-            "SELECT integrations, category FROM workflows WHERE filename = ?",
-            (workflow_id,),
-        )
-        current_workflow = cursor.fetchone()
-
-        if not current_workflow:
-            conn.close()
+        """Get related workflows from the precomputed similarity index"""
+        try:
+            related = self.workflow_db.get_related(workflow_id, limit)
+        except sqlite3.OperationalError:
+            # Database indexed before the related index existed
             return []
-
-        current_integrations = current_workflow[0] or ""
-        current_category = current_workflow[1] or ""
-
-        # Find related workflows
-        cursor.execute(
-            """
-            SELECT filename, name, description FROM workflows 
-            WHERE filename != ? 
-            AND (integrations LIKE ? OR category = ?)
-            LIMIT ?
-        """,
-            (workflow_id, f"%{current_integrations[:50]}%", current_category, limit),
-        )
-
-        related = []
-        for row in cursor.fetchall():
-            related.append({"filename": row[0], "name": row[1], "description": row[2]})
-
-        conn.close()
-        return related
+        return [
+            {
+                "filename": row["filename"],
+                "name": row["name"],
+                "description": row["description"],
+                "similarity": row["score"],
+            }
+            for row in related
+        ]
 
     def run(self, host: str = "127.0.0.1", port: int = 8000, debug: bool = False):
         """Run the enhanced API server"""
@@ -8,8 +8,17 @@ from fastapi import FastAPI, HTTPException, Request
 from fastapi.responses import HTMLResponse
 from pydantic import BaseModel, Field
 from typing import List, Dict, Any
-import httpx
 from datetime import datetime
+import sys
+from pathlib import Path
+
+# Add the parent directory to path for the shared lazy importer
+sys.path.append(str(Path(__file__).parent.parent))
+
+from lazy_imports import LazyModule
+
+# Only the sync/notify routes need an HTTP client
+httpx = LazyModule("httpx")
 
 
 class IntegrationConfig(BaseModel):
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Metrics Stream
+Delta-encoded websocket streaming for the performance monitor: one snapshot
+per client, then only changed fields, with group subscriptions, per-client
+coalescing and optional msgpack encoding.
+"""
+
+import asyncio
+import json
+from collections import deque
+from typing import Dict, List, Any, Optional, Tuple
+
+from fastapi import WebSocket
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Metric groups clients can subscribe to
+METRIC_GROUPS = {
+    "system": (
+        "cpu_usage",
+        "memory_usage",
+        "disk_usage",
+        "active_connections",
+        "database_size",
+    ),
+    "network": ("network_io",),
+    "api": (
+        "api_response_times",
+        "api_p99_response_times",
+        "in_flight_requests",
+        "request_count",
+        "workflow_executions",
+        "error_rate",
+    ),
+}
+
+# Alerts waiting to be sent before a client is dropped as too slow
+ALERT_BACKLOG_SIZE = 32
+
+# Seconds a single websocket send may take before the client is dropped
+SEND_TIMEOUT_SECONDS = 10
+
+
+def group_state(metrics: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Split a flat metrics dict into subscribable groups."""
+    return {
+        group: {field: metrics.get(field) for field in fields}
+        for group, fields in METRIC_GROUPS.items()
+    }
+
+
+def diff_state(old: Dict[str, Dict], new: Dict[str, Dict]) -> Dict[str, Dict]:
+    """Changed fields per group; nested dicts diff by key, removed keys become None."""
+    delta = {}
+    for group, fields in new.items():
+        previous = old.get(group, {})
+        changes = {}
+        for field, value in fields.items():
+            before = previous.get(field)
+            if isinstance(value, dict) and isinstance(before, dict):
+                nested = {k: v for k, v in value.items() if before.get(k) != v}
+                nested.update({k: None for k in before if k not in value})
+                if nested:
+                    changes[field] = nested
+            elif value != before or field not in previous:
+                changes[field] = value
+        if changes:
+            delta[group] = changes
+    return delta
+
+
+def merge_delta(pending: Dict[str, Dict], delta: Dict[str, Dict]):
+    """Fold a newer delta into a pending one so a lagging client gets one update."""
+    for group, changes in delta.items():
+        target = pending.setdefault(group, {})
+        for field, value in changes.items():
+            if isinstance(value, dict) and isinstance(target.get(field), dict):
+                target[field].update(value)
+            else:
+                target[field] = dict(value) if isinstance(value, dict) else value
+
+
+def encode(message: Dict[str, Any], fmt: str):
+    """Encode a message as JSON text or msgpack bytes."""
+    if fmt == "msgpack":
+        return msgpack.packb(message, use_bin_type=True)
+    return json.dumps(message, separators=(",", ":"))
+
+
+class StreamClient:
+    """Per-connection subscription, coalesced pending delta and sender task."""
+
+    def __init__(self, websocket: WebSocket, groups: Tuple[str, ...], fmt: str):
+        self.websocket = websocket
+        self.groups = groups
+        self.fmt = fmt
+        self.pending: Dict[str, Dict] = {}
+        # Sequence number when pending holds exactly one broadcast delta
+        self.single_seq: Optional[int] = None
+        self.needs_snapshot = True
+        self.alerts: deque = deque()
+        self.wake = asyncio.Event()
+        self.sender: Optional[asyncio.Task] = None
+        self.coalesced = 0
+
+    def offer(self, seq: int, delta: Dict[str, Dict]) -> bool:
+        """Queue a delta; returns False if nothing in it concerns this client."""
+        if self.needs_snapshot:
+            self.wake.set()
+            return True
+        relevant = {g: delta[g] for g in self.groups if g in delta}
+        if not relevant:
+            return False
+        if self.pending:
+            self.coalesced += 1
+            self.single_seq = None
+        else:
+            self.single_seq = seq
+        merge_delta(self.pending, relevant)
+        self.wake.set()
+        return True
+
+    def subscribe(self, groups: Tuple[str, ...]):
+        self.groups = groups
+        self.pending = {}
+        self.single_seq = None
+        self.needs_snapshot = True
+        self.wake.set()
+
+
+class MetricsStream:
+    """Fan-out of delta-encoded metric updates to websocket clients."""
+
+    def __init__(self):
+        self.clients: Dict[WebSocket, StreamClient] = {}
+        self.state: Dict[str, Dict] = {}
+        self.seq = 0
+        self._encoded: Dict[Tuple, Any] = {}
+
+    @staticmethod
+    def parse_groups(value: Optional[Any]) -> Tuple[str, ...]:
+        """Validated group names from a comma-separated string or list."""
+        if not value:
+            return tuple(METRIC_GROUPS)
+        names = value.split(",") if isinstance(value, str) else value
+        groups = tuple(g.strip() for g in names if g.strip() in METRIC_GROUPS)
+        return groups or tuple(METRIC_GROUPS)
+
+    @staticmethod
+    def resolve_format(fmt: Optional[str]) -> str:
+        return "msgpack" if fmt == "msgpack" and msgpack is not None else "json"
+
+    def add(self, websocket: WebSocket, groups: Tuple[str, ...], fmt: str) -> StreamClient:
+        """Register a client; it receives a snapshot as its first message."""
+        client = StreamClient(websocket, groups, fmt)
+        client.sender = asyncio.get_running_loop().create_task(self._run_sender(client))
+        self.clients[websocket] = client
+        if self.state:
+            client.wake.set()
+        return client
+
+    def remove(self, websocket: WebSocket):
+        client = self.clients.pop(websocket, None)
+        if client and client.sender and client.sender is not asyncio.current_task():
+            client.sender.cancel()
+
+    def handle_message(self, websocket: WebSocket, text: str):
+        """Apply a client control message, e.g. {"type": "subscribe", "groups": [...]}."""
+        client = self.clients.get(websocket)
+        try:
+            message = json.loads(text)
+        except ValueError:
+            return
+        if client and isinstance(message, dict) and message.get("type") == "subscribe":
+            client.subscribe(self.parse_groups(message.get("groups")))
+
+    def publish(self, metrics: Dict[str, Any]):
+        """Diff a new metrics sample against the last one and offer it to clients."""
+        new_state = group_state(metrics)
+        delta = diff_state(self.state, new_state)
+        self.state = new_state
+        self.seq += 1
+        self._encoded.clear()
+        if not delta:
+            return
+        for client in self.clients.values():
+            client.offer(self.seq, delta)
+
+    def publish_alert(self, alert: Dict[str, Any]):
+        """Queue an alert for every client, dropping clients that fell too far behind."""
+        for client in list(self.clients.values()):
+            if len(client.alerts) >= ALERT_BACKLOG_SIZE:
+                self._drop(client)
+                continue
+            client.alerts.append(alert)
+            client.wake.set()
+
+    def _drop(self, client: StreamClient):
+        print("Monitor: dropping slow websocket client")
+        self.remove(client.websocket)
+        asyncio.get_running_loop().create_task(client.websocket.close(code=1013))
+
+    def _shared_delta(self, client: StreamClient):
+        """Encoded delta shared by every up-to-date client with the same subscription."""
+        key = (self.seq, client.groups, client.fmt)
+        if key not in self._encoded:
+            self._encoded[key] = encode(self._delta_message(client.pending), client.fmt)
+        return self._encoded[key]
+
+    def _delta_message(self, data: Dict[str, Dict]) -> Dict[str, Any]:
+        return {"type": "delta", "seq": self.seq, "data": data}
+
+    def _next_message(self, client: StreamClient):
+        if client.alerts:
+            return encode({"type": "alert", "data": client.alerts.popleft()}, client.fmt)
+        if client.needs_snapshot and self.state:
+            client.needs_snapshot = False
+            client.pending = {}
+            client.single_seq = None
+            return encode(
+                {
+                    "type": "snapshot",
+                    "seq": self.seq,
+                    "format": client.fmt,
+                    "groups": list(client.groups),
+                    "data": {g: self.state[g] for g in client.groups},
+                },
+                client.fmt,
+            )
+        if client.pending:
+            if client.single_seq == self.seq:
+                payload = self._shared_delta(client)
+            else:
+                payload = encode(self._delta_message(client.pending), client.fmt)
+            client.pending = {}
+            client.single_seq = None
+            return payload
+        return None
+
+    async def _run_sender(self, client: StreamClient):
+        websocket = client.websocket
+        try:
+            while True:
+                await client.wake.wait()
+                client.wake.clear()
+                while True:
+                    payload = self._next_message(client)
+                    if payload is None:
+                        break
+                    if isinstance(payload, bytes):
+                        send = websocket.send_bytes(payload)
+                    else:
+                        send = websocket.send_text(payload)
+                    await asyncio.wait_for(send, SEND_TIMEOUT_SECONDS)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Timed out or disconnected: stop streaming to this client
+            self.remove(websocket)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return [
+            {
+                "groups": list(c.groups),
+                "format": c.fmt,
+                "pending_alerts": len(c.alerts),
+                "coalesced_updates": c.coalesced,
+            }
+            for c in self.clients.values()
+        ]
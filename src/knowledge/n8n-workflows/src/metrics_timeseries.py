@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Metrics Time Series Store
+Fixed-memory ring buffers with array-backed columns and 5s/1m/1h rollups
+for performance monitor history, with optional SQLite persistence.
+"""
+
+import queue
+import sqlite3
+import threading
+import time
+from array import array
+from typing import Dict, List, Any, Optional, Tuple
+
+# Numeric columns kept for every sample
+SERIES_FIELDS = (
+    "cpu_usage",
+    "memory_usage",
+    "disk_usage",
+    "bytes_sent",
+    "bytes_recv",
+    "active_connections",
+    "in_flight_requests",
+    "request_count",
+    "database_size",
+    "workflow_executions",
+    "error_rate",
+    "api_p95_max_ms",
+    "api_p99_max_ms",
+)
+
+# (name, bucket seconds, retention seconds): 24h of raw samples, 7d of
+# one-minute averages and 30d of hourly averages
+RESOLUTIONS = (
+    ("raw", 5, 24 * 3600),
+    ("1m", 60, 7 * 24 * 3600),
+    ("1h", 3600, 30 * 24 * 3600),
+)
+
+# Raw samples buffered before being written to the persistence file
+PERSIST_BATCH_SIZE = 12
+
+
+class RingSeries:
+    """Preallocated ring buffer of timestamped rows with one array per column."""
+
+    def __init__(self, capacity: int, fields: Tuple[str, ...] = SERIES_FIELDS):
+        self.capacity = capacity
+        self.fields = fields
+        self.timestamps = array("d", bytes(8 * capacity))
+        self.columns = {name: array("d", bytes(8 * capacity)) for name in fields}
+        self.start = 0
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _physical(self, logical: int) -> int:
+        return (self.start + logical) % self.capacity
+
+    def append(self, timestamp: float, values: Dict[str, float]):
+        """Append a row, overwriting the oldest one when full."""
+        if self.size < self.capacity:
+            index = self._physical(self.size)
+            self.size += 1
+        else:
+            index = self.start
+            self.start = (self.start + 1) % self.capacity
+        self.timestamps[index] = timestamp
+        for name in self.fields:
+            self.columns[name][index] = values.get(name, 0.0)
+
+    def timestamp_at(self, logical: int) -> float:
+        return self.timestamps[self._physical(logical)]
+
+    def bisect_left(self, timestamp: float) -> int:
+        """First logical index whose timestamp is >= timestamp."""
+        low, high = 0, self.size
+        while low < high:
+            mid = (low + high) // 2
+            if self.timestamp_at(mid) < timestamp:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+    def row(self, logical: int) -> Dict[str, float]:
+        index = self._physical(logical)
+        row = {"timestamp": self.timestamps[index]}
+        for name in self.fields:
+            row[name] = self.columns[name][index]
+        return row
+
+    def range(self, start: float, end: float) -> List[Dict[str, float]]:
+        """Rows with start <= timestamp <= end, oldest first."""
+        first = self.bisect_left(start)
+        last = self.bisect_left(end)
+        while last < self.size and self.timestamp_at(last) <= end:
+            last += 1
+        return [self.row(i) for i in range(first, last)]
+
+    def tail(self, count: int) -> List[Dict[str, float]]:
+        return [self.row(i) for i in range(max(0, self.size - count), self.size)]
+
+    def oldest(self) -> Optional[float]:
+        return self.timestamp_at(0) if self.size else None
+
+
+class _RollupAccumulator:
+    """Running sums for the rollup bucket currently being filled."""
+
+    def __init__(self, bucket_seconds: int, fields: Tuple[str, ...]):
+        self.bucket_seconds = bucket_seconds
+        self.fields = fields
+        self.bucket = None
+        self.count = 0
+        self.sums = dict.fromkeys(fields, 0.0)
+
+    def add(self, timestamp: float, values: Dict[str, float]) -> Optional[Tuple[float, Dict]]:
+        """Add a sample; return the finished (timestamp, averages) when a bucket closes."""
+        bucket = int(timestamp // self.bucket_seconds)
+        finished = None
+        if self.bucket is not None and bucket != self.bucket and self.count:
+            finished = (
+                self.bucket * self.bucket_seconds,
+                {name: self.sums[name] / self.count for name in self.fields},
+            )
+            self.count = 0
+            self.sums = dict.fromkeys(self.fields, 0.0)
+        self.bucket = bucket
+        self.count += 1
+        for name in self.fields:
+            self.sums[name] += values.get(name, 0.0)
+        return finished
+
+
+class MetricsHistory:
+    """Multi-resolution metrics history in fixed memory."""
+
+    def __init__(self, persist_path: Optional[str] = None, sample_seconds: int = 5):
+        self._lock = threading.Lock()
+        self.levels: Dict[str, RingSeries] = {}
+        self.accumulators: Dict[str, _RollupAccumulator] = {}
+        self.retention: Dict[str, int] = {}
+        for name, bucket_seconds, retention in RESOLUTIONS:
+            step = sample_seconds if name == "raw" else bucket_seconds
+            self.levels[name] = RingSeries(retention // step)
+            self.retention[name] = retention
+            if name != "raw":
+                self.accumulators[name] = _RollupAccumulator(bucket_seconds, SERIES_FIELDS)
+
+        self.persist_path = persist_path
+        self._pending: List[Tuple[str, float, Dict[str, float]]] = []
+        # Full batches go to a writer thread so append() never waits on SQLite
+        self._writes: "queue.Queue[List[Tuple[str, float, Dict[str, float]]]]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        if persist_path:
+            self._init_persistence()
+            self._load()
+
+    def append(self, timestamp: float, values: Dict[str, float]):
+        """Record one raw sample and update the rollups."""
+        batch = None
+        with self._lock:
+            self._append_locked(timestamp, values)
+            if self.persist_path and len(self._pending) >= PERSIST_BATCH_SIZE:
+                batch, self._pending = self._pending, []
+        if batch:
+            self._submit(batch)
+
+    def _append_locked(self, timestamp: float, values: Dict[str, float]):
+        self.levels["raw"].append(timestamp, values)
+        if self.persist_path:
+            self._pending.append(("raw", timestamp, values))
+        for name, accumulator in self.accumulators.items():
+            finished = accumulator.add(timestamp, values)
+            if finished:
+                self.levels[name].append(*finished)
+                if self.persist_path:
+                    self._pending.append((name, *finished))
+
+    def latest(self) -> Optional[Dict[str, float]]:
+        with self._lock:
+            rows = self.levels["raw"].tail(1)
+        return rows[0] if rows else None
+
+    def tail(self, count: int) -> List[Dict[str, float]]:
+        with self._lock:
+            return self.levels["raw"].tail(count)
+
+    def resolution_for(self, start: float, now: Optional[float] = None) -> str:
+        """Finest resolution whose retention covers the requested start time."""
+        now = now if now is not None else time.time()
+        for name, _, retention in RESOLUTIONS:
+            if start >= now - retention:
+                return name
+        return RESOLUTIONS[-1][0]
+
+    def query(
+        self, start: float, end: Optional[float] = None, resolution: Optional[str] = None
+    ) -> List[Dict[str, float]]:
+        """Rows between start and end at the given (or best fitting) resolution."""
+        end = end if end is not None else time.time()
+        resolution = resolution or self.resolution_for(start)
+        with self._lock:
+            return self.levels[resolution].range(start, end)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                name: {"points": len(series), "capacity": series.capacity, "oldest": series.oldest()}
+                for name, series in self.levels.items()
+            }
+
+    # Persistence
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.persist_path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def _init_persistence(self):
+        columns = ", ".join(f"{name} REAL" for name in SERIES_FIELDS)
+        conn = self._connect()
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS metrics_history "
+            f"(resolution TEXT NOT NULL, timestamp REAL NOT NULL, {columns})"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_metrics_history "
+            "ON metrics_history(resolution, timestamp)"
+        )
+        conn.commit()
+        conn.close()
+
+    def _load(self):
+        """Refill the rings from the persistence file."""
+        now = time.time()
+        conn = self._connect()
+        try:
+            for name, series in self.levels.items():
+                cursor = conn.execute(
+                    f"SELECT timestamp, {', '.join(SERIES_FIELDS)} FROM metrics_history "
+                    "WHERE resolution = ? AND timestamp >= ? ORDER BY timestamp",
+                    (name, now - self.retention[name]),
+                )
+                for row in cursor:
+                    series.append(row[0], dict(zip(SERIES_FIELDS, row[1:])))
+        finally:
+            conn.close()
+
+    def _submit(self, batch: List[Tuple[str, float, Dict[str, float]]]):
+        with self._lock:
+            if self._writer is None:
+                # Started on first use, so a pre-forking server starts one per worker
+                self._writer = threading.Thread(
+                    target=self._run_writer, name="metrics-history", daemon=True
+                )
+                self._writer.start()
+        self._writes.put(batch)
+
+    def _run_writer(self):
+        while True:
+            batch = self._writes.get()
+            try:
+                self._write(batch)
+            finally:
+                self._writes.task_done()
+
+    def _write(self, batch: List[Tuple[str, float, Dict[str, float]]]):
+        rows = [
+            (name, timestamp, *(values.get(field, 0.0) for field in SERIES_FIELDS))
+            for name, timestamp, values in batch
+        ]
+        placeholders = ", ".join("?" * (len(SERIES_FIELDS) + 2))
+        now = time.time()
+        try:
+            conn = self._connect()
+            conn.executemany(f"INSERT INTO metrics_history VALUES ({placeholders})", rows)
+            for name, retention in self.retention.items():
+                conn.execute(
+                    "DELETE FROM metrics_history WHERE resolution = ? AND timestamp < ?",
+                    (name, now - retention),
+                )
+            conn.commit()
+            conn.close()
+        except sqlite3.Error as e:
+            print(f"Metrics history persistence error: {e}")
+
+    def flush(self):
+        """Write buffered samples to the persistence file; blocks until written."""
+        if not self.persist_path:
+            return
+        with self._lock:
+            batch, self._pending = self._pending, []
+        if batch:
+            self._submit(batch)
+        self._writes.join()
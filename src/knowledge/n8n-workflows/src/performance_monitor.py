@@ -4,18 +4,219 @@ Performance Monitoring System for N8N Workflows
 Real-time metrics, monitoring, and alerting.
 """
 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
-from fastapi.responses import HTMLResponse
+from fastapi import FastAPI, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import HTMLResponse, PlainTextResponse
 from pydantic import BaseModel
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import asyncio
 import time
-import psutil
-from datetime import datetime, timedelta
-import json
-import threading
-import queue
+from collections import Counter, deque
+from datetime import datetime
 import os
+import sys
+import threading
+from pathlib import Path
+
+# Add the parent directory to path for the shared request metrics registry
+sys.path.append(str(Path(__file__).parent.parent))
+
+from request_metrics import RequestMetrics, RequestMetricsMiddleware, request_metrics
+from metrics_timeseries import MetricsHistory
+from metrics_stream import MetricsStream
+from lazy_imports import LazyModule
+
+# Imported when collection starts, not when the app is imported
+psutil = LazyModule("psutil")
+
+# Alert thresholds, evaluated over a sliding window of real request metrics
+ALERT_WINDOW_SECONDS = 60
+SLOW_API_P95_MS = 1000
+SLOW_API_P99_MS = 2500
+HIGH_ERROR_RATE_PERCENT = 10
+MIN_REQUESTS_FOR_ERROR_RATE = 20
+
+# Seconds between refreshes of each metric group; the loop ticks at the smallest
+COLLECTION_INTERVALS = {
+    "cpu": 5,
+    "memory": 5,
+    "network": 5,
+    "requests": 5,
+    "connections": 15,
+    "disk": 60,
+    "database": 60,
+}
+
+# TCP state code for ESTABLISHED in /proc/net/tcp*
+TCP_ESTABLISHED = "01"
+
+# Sampling profiler (opt-in): MONITOR_PROFILER=1 enables on-demand and automatic
+# captures, MONITOR_PROFILER_CONTINUOUS=1 keeps sampling into a rolling buffer
+PROFILER_ENABLED = os.environ.get("MONITOR_PROFILER", "0") == "1"
+PROFILER_CONTINUOUS = os.environ.get("MONITOR_PROFILER_CONTINUOUS", "0") == "1"
+PROFILER_HZ = int(os.environ.get("MONITOR_PROFILER_HZ", "100"))
+PROFILER_RETENTION_SECONDS = 300
+PROFILER_MAX_STACKS_PER_SECOND = 1000
+PROFILER_MAX_DEPTH = 64
+PROFILE_MAX_CAPTURE_SECONDS = 60
+AUTO_PROFILE_SECONDS = 10
+AUTO_PROFILE_COOLDOWN_SECONDS = 600
+
+
+def count_established_connections() -> int:
+    """Count established TCP connections, reading /proc/net directly on Linux."""
+    total = 0
+    found = False
+    for table in ("/proc/net/tcp", "/proc/net/tcp6"):
+        try:
+            with open(table, "r") as f:
+                next(f, None)  # header
+                found = True
+                for line in f:
+                    # Fields: sl local_address rem_address st ...
+                    if line.split(None, 4)[3] == TCP_ESTABLISHED:
+                        total += 1
+        except (OSError, IndexError):
+            continue
+    if found:
+        return total
+    try:
+        return sum(1 for c in psutil.net_connections() if c.status == psutil.CONN_ESTABLISHED)
+    except (psutil.AccessDenied, OSError):
+        return 0
+
+
+class SamplingProfiler:
+    """Samples every thread's stack with sys._current_frames() into folded stacks."""
+
+    def __init__(self, hz: int = PROFILER_HZ, retention: int = PROFILER_RETENTION_SECONDS):
+        self.interval = 1.0 / max(1, hz)
+        self.buckets: deque = deque(maxlen=retention)  # (second, Counter)
+        self.samples = 0
+        self.dropped = 0
+        self._users = 0
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._names: Dict[Any, str] = {}
+
+    @property
+    def running(self) -> bool:
+        return self._users > 0
+
+    def acquire(self):
+        """Start sampling (reference counted across captures)."""
+        with self._lock:
+            self._users += 1
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="sampling-profiler", daemon=True
+                )
+                self._thread.start()
+
+    def release(self):
+        with self._lock:
+            self._users = max(0, self._users - 1)
+
+    def _frame_name(self, code) -> str:
+        name = self._names.get(code)
+        if name is None:
+            name = f"{os.path.basename(code.co_filename)}:{code.co_name}"
+            self._names[code] = name
+        return name
+
+    def _fold(self, frame, thread_name: str) -> str:
+        names = []
+        while frame is not None and len(names) < PROFILER_MAX_DEPTH:
+            names.append(self._frame_name(frame.f_code))
+            frame = frame.f_back
+        names.append(thread_name)
+        return ";".join(reversed(names))
+
+    def _run(self):
+        own_id = threading.get_ident()
+        thread_names: Dict[int, str] = {}
+        names_refreshed = 0.0
+        while self._users > 0:
+            now = time.time()
+            if now - names_refreshed > 1:
+                thread_names = {t.ident: t.name for t in threading.enumerate()}
+                names_refreshed = now
+            second = int(now)
+            if not self.buckets or self.buckets[-1][0] != second:
+                self.buckets.append((second, Counter()))
+            counts = self.buckets[-1][1]
+
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = self._fold(frame, thread_names.get(thread_id, str(thread_id)))
+                if stack in counts or len(counts) < PROFILER_MAX_STACKS_PER_SECOND:
+                    counts[stack] += 1
+                else:
+                    self.dropped += 1
+                self.samples += 1
+            time.sleep(self.interval)
+
+    def folded_since(self, since: float) -> Counter:
+        """Merge the folded stacks sampled since a unix timestamp (one-second granularity)."""
+        merged = Counter()
+        for second, counts in list(self.buckets):
+            if second >= int(since):
+                merged.update(counts)
+        return merged
+
+    async def capture(self, seconds: float) -> Counter:
+        """Sample for `seconds` (or reuse the rolling buffer when sampling continuously)."""
+        if self.running and PROFILER_CONTINUOUS and self.buckets:
+            oldest = self.buckets[0][0]
+            if time.time() - seconds >= oldest:
+                return self.folded_since(time.time() - seconds)
+        started = time.time()
+        self.acquire()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            self.release()
+        return self.folded_since(started)
+
+
+def to_collapsed(stacks: Counter) -> str:
+    """Brendan Gregg's collapsed-stack format, one 'frame;frame count' per line."""
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+def to_speedscope(stacks: Counter, interval: float, name: str) -> Dict[str, Any]:
+    """Speedscope sampled-profile JSON document."""
+    frames: List[Dict[str, str]] = []
+    frame_index: Dict[str, int] = {}
+    samples = []
+    weights = []
+    for stack, count in stacks.most_common():
+        indexes = []
+        for frame in stack.split(";"):
+            if frame not in frame_index:
+                frame_index[frame] = len(frames)
+                file, _, function = frame.rpartition(":")
+                frames.append({"name": function or frame, "file": file})
+            indexes.append(frame_index[frame])
+        samples.append(indexes)
+        weights.append(round(count * interval, 6))
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "shared": {"frames": frames},
+        "profiles": [
+            {
+                "type": "sampled",
+                "name": name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": round(sum(weights), 6),
+                "samples": samples,
+                "weights": weights,
+            }
+        ],
+        "name": name,
+        "exporter": "n8n-workflows performance monitor",
+    }
 
 
 class PerformanceMetrics(BaseModel):
@@ -25,7 +226,10 @@ class PerformanceMetrics(BaseModel):
     disk_usage: float
     network_io: Dict[str, int]
     api_response_times: Dict[str, float]
+    api_p99_response_times: Dict[str, float] = {}
     active_connections: int
+    in_flight_requests: int = 0
+    request_count: int = 0
     database_size: int
     workflow_executions: int
     error_rate: float
@@ -41,31 +245,58 @@ class Alert(BaseModel):
 
 
 class PerformanceMonitor:
-    def __init__(self, db_path: str = "workflows.db"):
+    def __init__(
+        self,
+        db_path: str = "workflows.db",
+        metrics: Optional[RequestMetrics] = None,
+        intervals: Optional[Dict[str, float]] = None,
+    ):
         self.db_path = db_path
-        self.metrics_history = []
+        self.request_metrics = metrics or request_metrics
+        self.latest_metrics: Optional[PerformanceMetrics] = None
+        self.history = MetricsHistory(persist_path=os.environ.get("MONITOR_HISTORY_DB"))
         self.alerts = []
-        self.websocket_connections = []
+        self.stream = MetricsStream()
         self.monitoring_active = False
-        self.metrics_queue = queue.Queue()
+        self.intervals = {**COLLECTION_INTERVALS, **(intervals or {})}
+        self._next_due: Dict[str, float] = {}
+        self._values: Dict[str, Any] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.profiler = SamplingProfiler()
+        self.auto_profiles: deque = deque(maxlen=5)
+        self._last_auto_profile = 0.0
 
     def start_monitoring(self):
-        """Start performance monitoring in background thread."""
+        """Start the collection loop on the running event loop."""
         if not self.monitoring_active:
             self.monitoring_active = True
-            monitor_thread = threading.Thread(target=self._monitor_loop, daemon=True)
-            monitor_thread.start()
+            # Prime the non-blocking CPU sampler; its first reading is meaningless
+            psutil.cpu_percent(interval=None)
+            if PROFILER_ENABLED and PROFILER_CONTINUOUS:
+                self.profiler.acquire()
+            self._task = asyncio.get_running_loop().create_task(self._monitor_loop())
+
+    async def stop_monitoring(self):
+        """Stop the collection loop and flush persisted history."""
+        self.monitoring_active = False
+        if PROFILER_ENABLED and PROFILER_CONTINUOUS:
+            self.profiler.release()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await asyncio.to_thread(self.history.flush)
 
-    def _monitor_loop(self):
+    async def _monitor_loop(self):
         """Main monitoring loop."""
+        tick = min(self.intervals.values())
         while self.monitoring_active:
             try:
-                metrics = self._collect_metrics()
-                self.metrics_history.append(metrics)
-
-                # Keep only last 1000 metrics
-                if len(self.metrics_history) > 1000:
-                    self.metrics_history = self.metrics_history[-1000:]
+                metrics = await self._collect_metrics()
+                self._record_metrics(metrics)
 
                 # Check for alerts
                 self._check_alerts(metrics)
@@ -73,89 +304,131 @@ class PerformanceMonitor:
                 # Send to websocket connections
                 self._broadcast_metrics(metrics)
 
-                time.sleep(5)  # Collect metrics every 5 seconds
+                await asyncio.sleep(tick)
 
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
                 print(f"Monitoring error: {e}")
-                time.sleep(10)
-
-    def _collect_metrics(self) -> PerformanceMetrics:
-        """Collect current system metrics."""
-        # CPU and Memory
-        cpu_usage = psutil.cpu_percent(interval=1)
-        memory = psutil.virtual_memory()
-        memory_usage = memory.percent
-
-        # Disk usage
-        disk = psutil.disk_usage("/")
-        disk_usage = (disk.used / disk.total) * 100
-
-        # Network I/O
-        network = psutil.net_io_counters()
-        network_io = {
-            "bytes_sent": network.bytes_sent,
-            "bytes_recv": network.bytes_recv,
-            "packets_sent": network.packets_sent,
-            "packets_recv": network.packets_recv,
-        }
-
-        # API response times (simulated)
-        api_response_times = {
-            "/api/stats": self._measure_api_time("/api/stats"),
-            "/api/workflows": self._measure_api_time("/api/workflows"),
-            "/api/search": self._measure_api_time("/api/workflows?q=test"),
-        }
-
-        # Active connections
-        active_connections = len(psutil.net_connections())
-
-        # Database size
-        try:
-            db_size = (
-                os.path.getsize(self.db_path) if os.path.exists(self.db_path) else 0
+                await asyncio.sleep(tick * 2)
+
+    def _due(self, group: str, now: float) -> bool:
+        """True when a metric group's interval has elapsed since it last ran."""
+        if now < self._next_due.get(group, 0):
+            return False
+        self._next_due[group] = now + self.intervals[group]
+        return True
+
+    def _collect_requests(self):
+        """API response times (p95/p99 per route) and totals over the alert window."""
+        api_response_times = {}
+        api_p99_response_times = {}
+        for route in self.request_metrics.route_names():
+            histogram = self.request_metrics.window_histogram(
+                route, ALERT_WINDOW_SECONDS
             )
-        except:
-            db_size = 0
+            if histogram.count:
+                api_response_times[route] = histogram.percentile_ms(95)
+                api_p99_response_times[route] = histogram.percentile_ms(99)
+        window = self.request_metrics.window_totals(ALERT_WINDOW_SECONDS)
+        self._values.update(
+            api_response_times=api_response_times,
+            api_p99_response_times=api_p99_response_times,
+            request_count=window["requests"],
+            error_rate=window["error_rate"],
+            workflow_executions=self._get_workflow_executions(),
+        )
 
-        # Workflow executions (simulated)
-        workflow_executions = self._get_workflow_executions()
+    def _database_size(self) -> int:
+        try:
+            return os.path.getsize(self.db_path) if os.path.exists(self.db_path) else 0
+        except OSError:
+            return 0
+
+    async def _collect_metrics(self) -> PerformanceMetrics:
+        """Refresh the metric groups that are due and build a snapshot."""
+        now = time.monotonic()
+        values = self._values
+
+        # CPU since the previous call, without blocking
+        if self._due("cpu", now):
+            values["cpu_usage"] = psutil.cpu_percent(interval=None)
+        if self._due("memory", now):
+            values["memory_usage"] = psutil.virtual_memory().percent
+        if self._due("network", now):
+            network = psutil.net_io_counters()
+            values["network_io"] = {
+                "bytes_sent": network.bytes_sent,
+                "bytes_recv": network.bytes_recv,
+                "packets_sent": network.packets_sent,
+                "packets_recv": network.packets_recv,
+            }
+        if self._due("requests", now):
+            self._collect_requests()
 
-        # Error rate (simulated)
-        error_rate = self._calculate_error_rate()
+        # File system reads run off the event loop
+        if self._due("connections", now):
+            values["active_connections"] = await asyncio.to_thread(
+                count_established_connections
+            )
+        if self._due("disk", now):
+            disk = await asyncio.to_thread(psutil.disk_usage, "/")
+            values["disk_usage"] = (disk.used / disk.total) * 100
+        if self._due("database", now):
+            values["database_size"] = await asyncio.to_thread(self._database_size)
 
         return PerformanceMetrics(
             timestamp=datetime.now().isoformat(),
-            cpu_usage=cpu_usage,
-            memory_usage=memory_usage,
-            disk_usage=disk_usage,
-            network_io=network_io,
-            api_response_times=api_response_times,
-            active_connections=active_connections,
-            database_size=db_size,
-            workflow_executions=workflow_executions,
-            error_rate=error_rate,
+            cpu_usage=values["cpu_usage"],
+            memory_usage=values["memory_usage"],
+            disk_usage=values["disk_usage"],
+            network_io=values["network_io"],
+            api_response_times=values["api_response_times"],
+            api_p99_response_times=values["api_p99_response_times"],
+            active_connections=values["active_connections"],
+            in_flight_requests=self.request_metrics.in_flight,
+            request_count=values["request_count"],
+            database_size=values["database_size"],
+            workflow_executions=values["workflow_executions"],
+            error_rate=values["error_rate"],
         )
 
-    def _measure_api_time(self, endpoint: str) -> float:
-        """Measure API response time (simulated)."""
-        # In a real implementation, this would make actual HTTP requests
-        import random
+    def _record_metrics(self, metrics: PerformanceMetrics):
+        """Keep the latest sample and append its numeric fields to the history."""
+        self.latest_metrics = metrics
+        self.history.append(
+            time.time(),
+            {
+                "cpu_usage": metrics.cpu_usage,
+                "memory_usage": metrics.memory_usage,
+                "disk_usage": metrics.disk_usage,
+                "bytes_sent": metrics.network_io.get("bytes_sent", 0),
+                "bytes_recv": metrics.network_io.get("bytes_recv", 0),
+                "active_connections": metrics.active_connections,
+                "in_flight_requests": metrics.in_flight_requests,
+                "request_count": metrics.request_count,
+                "database_size": metrics.database_size,
+                "workflow_executions": metrics.workflow_executions,
+                "error_rate": metrics.error_rate,
+                "api_p95_max_ms": max(metrics.api_response_times.values(), default=0),
+                "api_p99_max_ms": max(metrics.api_p99_response_times.values(), default=0),
+            },
+        )
 
-        return round(random.uniform(10, 100), 2)
+    def _measure_api_time(self, route: str, percentile: float = 95) -> float:
+        """Observed response time percentile (ms) of a route over the alert window."""
+        histogram = self.request_metrics.window_histogram(route, ALERT_WINDOW_SECONDS)
+        return histogram.percentile_ms(percentile)
 
     def _get_workflow_executions(self) -> int:
-        """Get number of workflow executions (simulated)."""
-        # In a real implementation, this would query execution logs
-        import random
-
-        return random.randint(0, 50)
+        """Number of workflow requests served over the alert window."""
+        return self.request_metrics.window_totals(
+            ALERT_WINDOW_SECONDS, prefix="/workflows"
+        )["requests"]
 
     def _calculate_error_rate(self) -> float:
-        """Calculate error rate (simulated)."""
-        # In a real implementation, this would analyze error logs
-        import random
-
-        return round(random.uniform(0, 5), 2)
+        """Percentage of 5xx responses over the alert window."""
+        return self.request_metrics.window_totals(ALERT_WINDOW_SECONDS)["error_rate"]
 
     def _check_alerts(self, metrics: PerformanceMetrics):
         """Check metrics against alert thresholds."""
@@ -177,21 +450,47 @@ class PerformanceMonitor:
                 "high_disk", "critical", f"High disk usage: {metrics.disk_usage}%"
             )
 
-        # API response time alert
+        # API response time alerts on observed tail latency
         for endpoint, response_time in metrics.api_response_times.items():
-            if response_time > 1000:  # 1 second
+            p99 = metrics.api_p99_response_times.get(endpoint, 0)
+            if response_time > SLOW_API_P95_MS or p99 > SLOW_API_P99_MS:
                 self._create_alert(
                     "slow_api",
                     "warning",
-                    f"Slow API response: {endpoint} ({response_time}ms)",
+                    f"Slow API response: {endpoint} (p95 {response_time}ms, p99 {p99}ms)",
                 )
-
-        # Error rate alert
-        if metrics.error_rate > 10:
+            if p99 > SLOW_API_P99_MS:
+                self._auto_profile(f"p99 {p99}ms on {endpoint}")
+
+        # Error rate alert, ignoring windows with too few requests to be meaningful
+        if (
+            metrics.request_count >= MIN_REQUESTS_FOR_ERROR_RATE
+            and metrics.error_rate > HIGH_ERROR_RATE_PERCENT
+        ):
             self._create_alert(
                 "high_error_rate", "critical", f"High error rate: {metrics.error_rate}%"
             )
 
+    def _auto_profile(self, reason: str):
+        """Capture a profile in the background when p99 breaches its threshold."""
+        now = time.time()
+        if not PROFILER_ENABLED or now - self._last_auto_profile < AUTO_PROFILE_COOLDOWN_SECONDS:
+            return
+        self._last_auto_profile = now
+
+        async def capture():
+            stacks = await self.profiler.capture(AUTO_PROFILE_SECONDS)
+            self.auto_profiles.append(
+                {
+                    "reason": reason,
+                    "timestamp": datetime.fromtimestamp(now).isoformat(),
+                    "seconds": AUTO_PROFILE_SECONDS,
+                    "stacks": stacks,
+                }
+            )
+
+        asyncio.get_running_loop().create_task(capture())
+
     def _create_alert(self, alert_type: str, severity: str, message: str):
         """Create a new alert."""
         alert = Alert(
@@ -211,41 +510,22 @@ class PerformanceMonitor:
             self._broadcast_alert(alert)
 
     def _broadcast_metrics(self, metrics: PerformanceMetrics):
-        """Broadcast metrics to all websocket connections."""
-        if self.websocket_connections:
-            message = {"type": "metrics", "data": metrics.dict()}
-            self._broadcast_to_websockets(message)
+        """Stream changed metric fields to websocket subscribers."""
+        self.stream.publish(metrics.dict())
 
     def _broadcast_alert(self, alert: Alert):
         """Broadcast alert to all websocket connections."""
-        message = {"type": "alert", "data": alert.dict()}
-        self._broadcast_to_websockets(message)
-
-    def _broadcast_to_websockets(self, message: dict):
-        """Broadcast message to all websocket connections."""
-        disconnected = []
-        for websocket in self.websocket_connections:
-            try:
-                asyncio.create_task(websocket.send_text(json.dumps(message)))
-            except:
-                disconnected.append(websocket)
-
-        # Remove disconnected connections
-        for ws in disconnected:
-            self.websocket_connections.remove(ws)
+        self.stream.publish_alert(alert.dict())
 
     def get_metrics_summary(self) -> Dict[str, Any]:
         """Get performance metrics summary."""
-        if not self.metrics_history:
+        latest = self.latest_metrics
+        recent = self.history.tail(10)
+        if latest is None or not recent:
             return {"message": "No metrics available"}
 
-        latest = self.metrics_history[-1]
-        avg_cpu = sum(m.cpu_usage for m in self.metrics_history[-10:]) / min(
-            10, len(self.metrics_history)
-        )
-        avg_memory = sum(m.memory_usage for m in self.metrics_history[-10:]) / min(
-            10, len(self.metrics_history)
-        )
+        avg_cpu = sum(row["cpu_usage"] for row in recent) / len(recent)
+        avg_memory = sum(row["memory_usage"] for row in recent) / len(recent)
 
         return {
             "current": latest.dict(),
@@ -259,16 +539,15 @@ class PerformanceMonitor:
             else "warning",
         }
 
-    def get_historical_metrics(self, hours: int = 24) -> List[Dict]:
-        """Get historical metrics for specified hours."""
-        cutoff_time = datetime.now() - timedelta(hours=hours)
-        cutoff_timestamp = cutoff_time.isoformat()
-
-        return [
-            metrics.dict()
-            for metrics in self.metrics_history
-            if metrics.timestamp >= cutoff_timestamp
-        ]
+    def get_historical_metrics(
+        self, hours: float = 24, resolution: Optional[str] = None
+    ) -> List[Dict]:
+        """Get historical metrics for specified hours, downsampled for long ranges."""
+        start = time.time() - hours * 3600
+        rows = self.history.query(start, resolution=resolution)
+        for row in rows:
+            row["timestamp"] = datetime.fromtimestamp(row["timestamp"]).isoformat()
+        return rows
 
     def resolve_alert(self, alert_id: str) -> bool:
         """Resolve an alert."""
@@ -281,10 +560,22 @@ class PerformanceMonitor:
 
 # Initialize performance monitor
 performance_monitor = PerformanceMonitor()
-performance_monitor.start_monitoring()
 
 # FastAPI app for Performance Monitoring
 monitor_app = FastAPI(title="N8N Performance Monitor", version="1.0.0")
+monitor_app.add_middleware(RequestMetricsMiddleware)
+
+
+@monitor_app.on_event("startup")
+async def start_performance_monitor():
+    """Start metrics collection on the server's event loop."""
+    performance_monitor.start_monitoring()
+
+
+@monitor_app.on_event("shutdown")
+async def stop_performance_monitor():
+    """Stop metrics collection."""
+    await performance_monitor.stop_monitoring()
 
 
 @monitor_app.get("/monitor/metrics")
@@ -293,10 +584,18 @@ async def get_current_metrics():
     return performance_monitor.get_metrics_summary()
 
 
+@monitor_app.get("/monitor/requests")
+async def get_request_metrics(window: int = ALERT_WINDOW_SECONDS):
+    """Get per-route request latency, status code and byte counters."""
+    return request_metrics.snapshot(window_seconds=window)
+
+
 @monitor_app.get("/monitor/history")
-async def get_historical_metrics(hours: int = 24):
+async def get_historical_metrics(
+    hours: float = 24, resolution: Optional[str] = Query(None, pattern="^(raw|1m|1h)$")
+):
     """Get historical performance metrics."""
-    return performance_monitor.get_historical_metrics(hours)
+    return performance_monitor.get_historical_metrics(hours, resolution)
 
 
 @monitor_app.get("/monitor/alerts")
@@ -315,18 +614,70 @@ async def resolve_alert(alert_id: str):
         return {"message": "Alert not found"}
 
 
+def _profile_response(stacks: Counter, fmt: str, name: str):
+    if fmt == "speedscope":
+        return to_speedscope(stacks, performance_monitor.profiler.interval, name)
+    return PlainTextResponse(to_collapsed(stacks))
+
+
+@monitor_app.get("/monitor/profile")
+async def get_profile(
+    seconds: float = Query(10, gt=0, le=PROFILE_MAX_CAPTURE_SECONDS),
+    format: str = Query("collapsed", pattern="^(collapsed|speedscope)$"),
+):
+    """Sample stacks for N seconds and return them as collapsed stacks or speedscope JSON."""
+    if not PROFILER_ENABLED:
+        raise HTTPException(
+            status_code=404, detail="Profiler disabled; set MONITOR_PROFILER=1"
+        )
+    stacks = await performance_monitor.profiler.capture(seconds)
+    return _profile_response(stacks, format, f"profile {seconds}s")
+
+
+@monitor_app.get("/monitor/profile/auto")
+async def get_auto_profiles(
+    index: Optional[int] = None,
+    format: str = Query("collapsed", pattern="^(collapsed|speedscope)$"),
+):
+    """List captures triggered by p99 breaches, or return one of them."""
+    profiles = list(performance_monitor.auto_profiles)
+    if index is None:
+        return [
+            {
+                "index": i,
+                "reason": p["reason"],
+                "timestamp": p["timestamp"],
+                "seconds": p["seconds"],
+                "samples": sum(p["stacks"].values()),
+            }
+            for i, p in enumerate(profiles)
+        ]
+    if not 0 <= index < len(profiles):
+        raise HTTPException(status_code=404, detail="Profile not found")
+    profile = profiles[index]
+    return _profile_response(profile["stacks"], format, profile["reason"])
+
+
 @monitor_app.websocket("/monitor/ws")
-async def websocket_endpoint(websocket: WebSocket):
-    """WebSocket endpoint for real-time metrics."""
+async def websocket_endpoint(
+    websocket: WebSocket, groups: Optional[str] = None, format: str = "json"
+):
+    """WebSocket endpoint streaming a metrics snapshot followed by deltas.
+
+    Query parameters: groups=system,network,api and format=json|msgpack.
+    Clients may send {"type": "subscribe", "groups": [...]} to resubscribe.
+    """
+    stream = performance_monitor.stream
     await websocket.accept()
-    performance_monitor.websocket_connections.append(websocket)
+    stream.add(websocket, stream.parse_groups(groups), stream.resolve_format(format))
 
     try:
         while True:
-            # Keep connection alive
-            await websocket.receive_text()
+            stream.handle_message(websocket, await websocket.receive_text())
     except WebSocketDisconnect:
-        performance_monitor.websocket_connections.remove(websocket)
+        pass
+    finally:
+        stream.remove(websocket)
 
 
 @monitor_app.get("/monitor/dashboard")
@@ -520,6 +871,29 @@ async def get_monitoring_dashboard():
             let performanceChart = null;
             let apiChart = null;
             let metricsData = [];
+            let liveState = {};
+            
+            // Merge grouped snapshot/delta fields into the flat live state
+            function applyDelta(groups) {
+                for (const fields of Object.values(groups)) {
+                    for (const [field, value] of Object.entries(fields)) {
+                        const current = liveState[field];
+                        if (value && typeof value === 'object' && current && typeof current === 'object') {
+                            const merged = { ...current };
+                            for (const [key, nested] of Object.entries(value)) {
+                                if (nested === null) {
+                                    delete merged[key];
+                                } else {
+                                    merged[key] = nested;
+                                }
+                            }
+                            liveState[field] = merged;
+                        } else {
+                            liveState[field] = value;
+                        }
+                    }
+                }
+            }
             
             function connectWebSocket() {
                 const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
@@ -535,9 +909,14 @@ async def get_monitoring_dashboard():
                 ws.onmessage = function(event) {
                     const data = JSON.parse(event.data);
                     
-                    if (data.type === 'metrics') {
-                        updateMetrics(data.data);
-                        updateCharts(data.data);
+                    if (data.type === 'snapshot' || data.type === 'delta') {
+                        if (data.type === 'snapshot') {
+                            liveState = {};
+                        }
+                        applyDelta(data.data);
+                        const metrics = { ...liveState };
+                        updateMetrics(metrics);
+                        updateCharts(metrics);
                     } else if (data.type === 'alert') {
                         addAlert(data.data);
                     }
@@ -9,12 +9,21 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.responses import HTMLResponse
 from pydantic import BaseModel, EmailStr
 from typing import List, Optional
-import sqlite3
 import hashlib
 import secrets
-import jwt
 from datetime import datetime, timedelta
 import os
+import sys
+from pathlib import Path
+
+# Add the parent directory to path for the shared SQLite tracing
+sys.path.append(str(Path(__file__).parent.parent))
+
+import sqlite_tracing
+from lazy_imports import LazyModule
+
+# Imported on the first login or token check
+jwt = LazyModule("jwt")
 
 # Configuration - Use environment variables for security
 SECRET_KEY = os.environ.get("JWT_SECRET_KEY", secrets.token_urlsafe(32))
@@ -62,13 +71,14 @@ class Token(BaseModel):
 
 
 class UserManager:
-    def __init__(self, db_path: str = "users.db"):
+    def __init__(self, db_path: str = "users.db", initialize: bool = True):
         self.db_path = db_path
-        self.init_database()
+        if initialize:
+            self.init_database()
 
     def init_database(self):
         """Initialize user database."""
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_tracing.connect(self.db_path)
         cursor = conn.cursor()
 
         cursor.execute("""
@@ -115,7 +125,7 @@ class UserManager:
 
     def create_default_admin(self):
         """Create default admin user if none exists."""
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_tracing.connect(self.db_path)
         cursor = conn.cursor()
 
         cursor.execute("SELECT COUNT(*) FROM users WHERE role = 'admin'")
@@ -162,7 +172,7 @@ class UserManager:
 
     def create_user(self, user_data: UserCreate) -> User:
         """Create a new user."""
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_tracing.connect(self.db_path)
         cursor = conn.cursor()
 
         try:
@@ -211,7 +221,7 @@ class UserManager:
 
     def authenticate_user(self, username: str, password: str) -> Optional[User]:
         """Authenticate user and return user data."""
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_tracing.connect(self.db_path)
         cursor = conn.cursor()
 
         cursor.execute(
@@ -265,7 +275,7 @@ class UserManager:
 
     def get_user_by_id(self, user_id: int) -> Optional[User]:
         """Get user by ID."""
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_tracing.connect(self.db_path)
         cursor = conn.cursor()
 
         cursor.execute(
@@ -294,7 +304,7 @@ class UserManager:
 
     def get_all_users(self) -> List[User]:
         """Get all users."""
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_tracing.connect(self.db_path)
         cursor = conn.cursor()
 
         cursor.execute("""
@@ -321,7 +331,7 @@ class UserManager:
 
     def update_user(self, user_id: int, update_data: UserUpdate) -> Optional[User]:
         """Update user data."""
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_tracing.connect(self.db_path)
         cursor = conn.cursor()
 
         try:
@@ -364,7 +374,7 @@ class UserManager:
 
     def delete_user(self, user_id: int) -> bool:
         """Delete user (soft delete by setting active=False)."""
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_tracing.connect(self.db_path)
         cursor = conn.cursor()
 
         try:
@@ -378,13 +388,19 @@ class UserManager:
             conn.close()
 
 
-# Initialize user manager
-user_manager = UserManager()
+# Initialize user manager (tables are created in the startup hook)
+user_manager = UserManager(initialize=False)
 
 # FastAPI app for User Management
 user_app = FastAPI(title="N8N User Management", version="1.0.0")
 
 
+@user_app.on_event("startup")
+async def init_user_database():
+    """Create the user tables and default admin before serving requests."""
+    user_manager.init_database()
+
+
 def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
 ) -> User:
@@ -456,6 +472,23 @@ async def get_all_users(admin: User = Depends(require_admin)):
     return user_manager.get_all_users()
 
 
+@user_app.get("/admin/slow-queries")
+async def get_slow_queries(
+    limit: int = 50, sort: str = "total_ms", admin: User = Depends(require_admin)
+):
+    """SQL fingerprint statistics and recent slow queries with plans (admin only)."""
+    if sort not in sqlite_tracing.REPORT_SORT_KEYS:
+        raise HTTPException(status_code=400, detail="Invalid sort key")
+    return sqlite_tracing.query_log.report(limit=limit, sort=sort)
+
+
+@user_app.post("/admin/slow-queries/reset")
+async def reset_slow_queries(admin: User = Depends(require_admin)):
+    """Clear the slow-query log (admin only)."""
+    sqlite_tracing.query_log.reset()
+    return {"message": "Slow-query log cleared"}
+
+
 @user_app.get("/users/{user_id}", response_model=User)
 async def get_user(user_id: int, current_user: User = Depends(get_current_user)):
     """Get user by ID."""
@@ -9,24 +9,199 @@ import json
 import os
 import datetime
 import hashlib
-from typing import Dict, List, Any, Optional, Tuple
+import math
+import time
+import urllib.parse
+from typing import Dict, Iterable, List, Any, Optional, Tuple
 from pathlib import Path
 
+from metrics_exporter import connection_counters, indexer_counters, query_timings
+from related_index import build_related, workflow_features
+from semantic_index import (
+    HYBRID_ALPHA,
+    Embedder,
+    VectorIndex,
+    compute_idf,
+    fuse_scores,
+    vector_path,
+    weighted_tokens,
+    words,
+    workflow_fields,
+    write_vectors,
+)
+import sqlite_tracing
+
+# Number of staged rows written per executemany() call in bulk mode
+BULK_BATCH_SIZE = 5000
+
+# Memory-mapped I/O for read-only workers: pages of the database file are
+# shared between processes through the OS page cache instead of being copied
+# into every worker's private SQLite cache
+READ_ONLY_MMAP_SIZE = 256 * 1024 * 1024
+
+# Chunk size used when pre-reading the database file during warmup
+WARM_READ_CHUNK = 1024 * 1024
+
+# UPSERT keeps the row id of an existing workflow stable (INSERT OR REPLACE
+# deletes and reinserts it), so FTS rowids and external references stay valid.
+UPSERT_WORKFLOW_SQL = """
+    INSERT INTO workflows (
+        filename, name, workflow_id, active, description, trigger_type,
+        complexity, node_count, integrations, tags, created_at, updated_at,
+        file_hash, file_size, analyzed_at
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+    ON CONFLICT(filename) DO UPDATE SET
+        name = excluded.name,
+        workflow_id = excluded.workflow_id,
+        active = excluded.active,
+        description = excluded.description,
+        trigger_type = excluded.trigger_type,
+        complexity = excluded.complexity,
+        node_count = excluded.node_count,
+        integrations = excluded.integrations,
+        tags = excluded.tags,
+        created_at = excluded.created_at,
+        updated_at = excluded.updated_at,
+        file_hash = excluded.file_hash,
+        file_size = excluded.file_size,
+        analyzed_at = CURRENT_TIMESTAMP
+"""
+
+# Derived indexes (related workflows, embeddings) are rebuilt by the indexer
+# once this share of the workflows changed since their last build
+DERIVED_REBUILD_RATIO = 0.05
+
+# Candidates ranked by semantic and hybrid search before filters and paging;
+# the pool widens (up to the max) until enough of them pass the filters
+SEMANTIC_CANDIDATES = 200
+SEMANTIC_MAX_CANDIDATES = 5000
+
+# Rolls one index generation into the day it finished on: the end-of-day
+# state is the latest generation's, churn is summed over the day
+UPSERT_DAILY_SQL = """
+    INSERT INTO index_daily (
+        day, generation, workflows, added, changed, removed,
+        avg_nodes, complexity, integrations
+    ) SELECT date(finished_at), generation, workflows, added, changed, removed,
+             avg_nodes, complexity, integrations
+    FROM index_generations WHERE generation = ?
+    ON CONFLICT(day) DO UPDATE SET
+        generation = excluded.generation,
+        workflows = excluded.workflows,
+        added = added + excluded.added,
+        changed = changed + excluded.changed,
+        removed = removed + excluded.removed,
+        avg_nodes = excluded.avg_nodes,
+        complexity = excluded.complexity,
+        integrations = excluded.integrations
+"""
+
+# Integration co-occurrence: ids of the integrations in a workflow row
+# ("new" or "old" inside a trigger)
+def _integration_ids(row: str) -> str:
+    return (
+        "(SELECT id FROM integrations WHERE name IN "
+        f"(SELECT value FROM json_each(COALESCE({row}.integrations, '[]'))))"
+    )
+
+
+COOCCURRENCE_ADD_SQL = f"""
+    INSERT INTO integrations(name)
+        SELECT DISTINCT value FROM json_each(COALESCE(new.integrations, '[]')) WHERE true
+        ON CONFLICT(name) DO NOTHING;
+    UPDATE integrations SET workflow_count = workflow_count + 1
+        WHERE id IN {_integration_ids("new")};
+    INSERT INTO integration_pairs(a, b, count)
+        SELECT x.id, y.id, 1 FROM integrations x JOIN integrations y ON x.id < y.id
+        WHERE x.id IN {_integration_ids("new")} AND y.id IN {_integration_ids("new")}
+        ON CONFLICT(a, b) DO UPDATE SET count = count + 1;
+"""
+
+COOCCURRENCE_REMOVE_SQL = f"""
+    UPDATE integrations SET workflow_count = workflow_count - 1
+        WHERE id IN {_integration_ids("old")};
+    UPDATE integration_pairs SET count = count - 1
+        WHERE a IN {_integration_ids("old")} AND b IN {_integration_ids("old")};
+    DELETE FROM integration_pairs
+        WHERE count <= 0 AND a IN {_integration_ids("old")} AND b IN {_integration_ids("old")};
+"""
+
+UPSERT_FEATURES_SQL = "INSERT OR REPLACE INTO workflow_features VALUES (?, ?)"
+
+
+def index_generation(conn: sqlite3.Connection) -> int:
+    """Latest index generation (0 before the first).
+
+    Only indexer runs that change the catalog move it, unlike PRAGMA
+    data_version, which also moves for ratings and counter flushes.
+    """
+    try:
+        return conn.execute("SELECT MAX(generation) FROM index_generations").fetchone()[0] or 0
+    except sqlite3.OperationalError:
+        return 0
+
 
 class WorkflowDatabase:
     """High-performance SQLite database for workflow metadata and search."""
 
-    def __init__(self, db_path: str = None):
+    def __init__(
+        self,
+        db_path: str = None,
+        read_only: Optional[bool] = None,
+        initialize: bool = True,
+    ):
         # Use environment variable if no path provided
         if db_path is None:
             db_path = os.environ.get("WORKFLOW_DB_PATH", "workflows.db")
+        if read_only is None:
+            read_only = os.environ.get("WORKFLOW_DB_READONLY", "").lower() in ("1", "true", "yes")
         self.db_path = db_path
+        self.read_only = read_only
         self.workflows_dir = "workflows"
-        self.init_database()
+        self.last_related_build: Optional[Dict[str, Any]] = None
+        self.vector_index = VectorIndex(vector_path(db_path))
+        self._schema_ready = False
+        # initialize=False defers DDL to ensure_schema(), e.g. a startup hook
+        if initialize:
+            self.ensure_schema()
+
+    def ensure_schema(self):
+        """Create the schema once; read-only workers use the indexer's schema."""
+        if not self.read_only and not self._schema_ready:
+            self.init_database()
+            self._schema_ready = True
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection to the workflow database."""
+        connection_counters.inc("opened")
+        if not self.read_only:
+            return sqlite_tracing.connect(self.db_path)
+        uri = f"file:{urllib.parse.quote(os.path.abspath(self.db_path))}?mode=ro"
+        conn = sqlite_tracing.connect(uri, uri=True)
+        conn.execute(f"PRAGMA mmap_size={READ_ONLY_MMAP_SIZE}")
+        return conn
+
+    def warm(self) -> int:
+        """Pull the database file into the OS page cache; returns bytes read.
+
+        Run in the server master before forking so every worker starts with
+        hot, shared pages instead of faulting the index in on first requests.
+        """
+        total = 0
+        for path in (self.db_path, f"{self.db_path}-wal", self.vector_index.path):
+            if not os.path.exists(path):
+                continue
+            with open(path, "rb") as f:
+                while True:
+                    chunk = f.read(WARM_READ_CHUNK)
+                    if not chunk:
+                        break
+                    total += len(chunk)
+        return total
 
     def init_database(self):
         """Initialize SQLite database with optimized schema and indexes."""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         conn.execute("PRAGMA journal_mode=WAL")  # Write-ahead logging for performance
         conn.execute("PRAGMA synchronous=NORMAL")
         conn.execute("PRAGMA cache_size=10000")
@@ -80,7 +255,113 @@ class WorkflowDatabase:
         )
         conn.execute("CREATE INDEX IF NOT EXISTS idx_filename ON workflows(filename)")
 
+        # Feature tokens per workflow and the precomputed related lists
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS workflow_features (
+                filename TEXT PRIMARY KEY,
+                features TEXT NOT NULL  -- JSON array of feature tokens
+            ) WITHOUT ROWID
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS workflow_related (
+                workflow_id INTEGER NOT NULL,
+                rank INTEGER NOT NULL,
+                related_id INTEGER NOT NULL,
+                score REAL NOT NULL,
+                PRIMARY KEY (workflow_id, rank)
+            ) WITHOUT ROWID
+        """)
+
+        # When each derived index was last rebuilt from the workflows table
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS derived_indexes (
+                name TEXT PRIMARY KEY,
+                built_at TIMESTAMP NOT NULL,
+                workflows INTEGER NOT NULL
+            ) WITHOUT ROWID
+        """)
+
+        # Append-only history of index runs that changed the catalog, and its
+        # daily rollup for trend queries. Integration counts are JSON objects
+        # keyed by integrations.id.
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS index_generations (
+                generation INTEGER PRIMARY KEY,
+                finished_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                workflows INTEGER NOT NULL,
+                added INTEGER NOT NULL,
+                changed INTEGER NOT NULL,
+                removed INTEGER NOT NULL,
+                avg_nodes REAL NOT NULL,
+                complexity TEXT NOT NULL,
+                integrations TEXT NOT NULL
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS index_daily (
+                day TEXT PRIMARY KEY,
+                generation INTEGER NOT NULL,
+                workflows INTEGER NOT NULL,
+                added INTEGER NOT NULL,
+                changed INTEGER NOT NULL,
+                removed INTEGER NOT NULL,
+                avg_nodes REAL NOT NULL,
+                complexity TEXT NOT NULL,
+                integrations TEXT NOT NULL
+            ) WITHOUT ROWID
+        """)
+
+        # Integration co-occurrence, kept current by triggers on workflows:
+        # per-integration workflow counts and per-pair counts (a < b)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS integrations (
+                id INTEGER PRIMARY KEY,
+                name TEXT UNIQUE NOT NULL,
+                workflow_count INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS integration_pairs (
+                a INTEGER NOT NULL,
+                b INTEGER NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (a, b)
+            ) WITHOUT ROWID
+        """)
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_integration_pairs_b ON integration_pairs(b)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_integration_pairs_count ON integration_pairs(count DESC)"
+        )
+
+        # IDF of every token seen by the semantic index, for query embedding
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS semantic_vocabulary (
+                token TEXT PRIMARY KEY,
+                idf REAL NOT NULL
+            ) WITHOUT ROWID
+        """)
+
         # Create triggers to keep FTS table in sync
+        self._create_fts_triggers(conn)
+
+        # Databases indexed before co-occurrence existed are backfilled once
+        if conn.execute("SELECT 1 FROM integrations LIMIT 1").fetchone() is None:
+            self._rebuild_cooccurrence(conn)
+        self._create_cooccurrence_triggers(conn)
+
+        # ...and start their history from the current catalog
+        if conn.execute("SELECT 1 FROM index_generations LIMIT 1").fetchone() is None:
+            total = conn.execute("SELECT COUNT(*) FROM workflows").fetchone()[0]
+            if total:
+                self._record_generation(conn, added=total, changed=0, removed=0)
+
+        conn.commit()
+        conn.close()
+
+    def _create_fts_triggers(self, conn: sqlite3.Connection):
+        """Create the triggers that keep the FTS table in sync with workflows."""
         conn.execute("""
             CREATE TRIGGER IF NOT EXISTS workflows_ai AFTER INSERT ON workflows BEGIN
                 INSERT INTO workflows_fts(rowid, filename, name, description, integrations, tags)
@@ -104,8 +385,84 @@ class WorkflowDatabase:
             END
         """)
 
-        conn.commit()
-        conn.close()
+    def _drop_fts_triggers(self, conn: sqlite3.Connection):
+        """Drop the per-row FTS triggers (used while bulk loading)."""
+        for trigger in ("workflows_ai", "workflows_ad", "workflows_au"):
+            conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+
+    def _create_cooccurrence_triggers(self, conn: sqlite3.Connection):
+        """Create the triggers that keep integration co-occurrence counts current."""
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS workflows_cooc_ai AFTER INSERT ON workflows BEGIN
+                {COOCCURRENCE_ADD_SQL}
+            END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS workflows_cooc_ad AFTER DELETE ON workflows BEGIN
+                {COOCCURRENCE_REMOVE_SQL}
+            END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS workflows_cooc_au AFTER UPDATE OF integrations ON workflows
+            WHEN old.integrations IS NOT new.integrations BEGIN
+                {COOCCURRENCE_REMOVE_SQL}
+                {COOCCURRENCE_ADD_SQL}
+            END
+        """)
+
+    def _drop_cooccurrence_triggers(self, conn: sqlite3.Connection):
+        """Drop the per-row co-occurrence triggers (used while bulk loading)."""
+        for trigger in ("workflows_cooc_ai", "workflows_cooc_ad", "workflows_cooc_au"):
+            conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+
+    @staticmethod
+    def _record_generation(conn: sqlite3.Connection, added: int, changed: int, removed: int) -> int:
+        """Append the catalog's current state as a new generation and roll it up."""
+        workflows, avg_nodes = conn.execute(
+            "SELECT COUNT(*), COALESCE(AVG(node_count), 0) FROM workflows"
+        ).fetchone()
+        complexity = dict(
+            conn.execute("SELECT complexity, COUNT(*) FROM workflows GROUP BY complexity").fetchall()
+        )
+        integrations = {
+            str(iid): count
+            for iid, count in conn.execute(
+                "SELECT id, workflow_count FROM integrations WHERE workflow_count > 0"
+            )
+        }
+        generation = conn.execute(
+            """
+            INSERT INTO index_generations (
+                workflows, added, changed, removed, avg_nodes, complexity, integrations
+            ) VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                workflows, added, changed, removed, round(avg_nodes, 3),
+                json.dumps(complexity), json.dumps(integrations, separators=(",", ":")),
+            ),
+        ).lastrowid
+        conn.execute(UPSERT_DAILY_SQL, (generation,))
+        return generation
+
+    def _rebuild_cooccurrence(self, conn: sqlite3.Connection):
+        """Recount integrations and pairs from the workflows table in one pass."""
+        conn.execute("DELETE FROM integration_pairs")
+        conn.execute("UPDATE integrations SET workflow_count = 0")
+        conn.execute("""
+            INSERT INTO integrations(name, workflow_count)
+                SELECT j.value, COUNT(*) FROM workflows w, json_each(w.integrations) j
+                WHERE true GROUP BY j.value
+                ON CONFLICT(name) DO UPDATE SET workflow_count = excluded.workflow_count
+        """)
+        conn.execute("""
+            INSERT INTO integration_pairs(a, b, count)
+                SELECT x.id, y.id, COUNT(*)
+                FROM workflows w, json_each(w.integrations) jx, json_each(w.integrations) jy
+                JOIN integrations x ON x.name = jx.value
+                JOIN integrations y ON y.name = jy.value
+                WHERE x.id < y.id
+                GROUP BY x.id, y.id
+        """)
 
     def get_file_hash(self, file_path: str) -> str:
         """Get MD5 hash of file for change detection."""
@@ -113,6 +470,7 @@ class WorkflowDatabase:
         with open(file_path, "rb") as f:
             for chunk in iter(lambda: f.read(4096), b""):
                 hash_md5.update(chunk)
+        indexer_counters.inc("files_hashed")
         return hash_md5.hexdigest()
 
     def format_workflow_name(self, filename: str) -> str:
@@ -208,6 +566,9 @@ class WorkflowDatabase:
         trigger_type, integrations = self.analyze_nodes(workflow["nodes"])
         workflow["trigger_type"] = trigger_type
         workflow["integrations"] = list(integrations)
+        workflow["features"] = workflow_features(
+            integrations, workflow["nodes"], workflow["connections"]
+        )
 
         # Use JSON description if available, otherwise generate one
         json_description = data.get("description", "").strip()
@@ -452,8 +813,39 @@ class WorkflowDatabase:
 
         return desc + "."
 
-    def index_all_workflows(self, force_reindex: bool = False) -> Dict[str, int]:
-        """Index all workflow files. Only reprocesses changed files unless force_reindex=True."""
+    def _workflow_row(self, workflow_data: Dict[str, Any]) -> Tuple:
+        """Build the parameter tuple for UPSERT_WORKFLOW_SQL."""
+        return (
+            workflow_data["filename"],
+            workflow_data["name"],
+            workflow_data["workflow_id"],
+            workflow_data["active"],
+            workflow_data["description"],
+            workflow_data["trigger_type"],
+            workflow_data["complexity"],
+            workflow_data["node_count"],
+            json.dumps(workflow_data["integrations"]),
+            json.dumps(workflow_data["tags"]),
+            workflow_data["created_at"],
+            workflow_data["updated_at"],
+            workflow_data["file_hash"],
+            workflow_data["file_size"],
+        )
+
+    def index_all_workflows(
+        self, force_reindex: bool = False, bulk: Optional[bool] = None
+    ) -> Dict[str, int]:
+        """Index all workflow files. Only reprocesses changed files unless force_reindex=True.
+
+        In bulk mode (the default for a forced reindex) rows are staged and
+        written with executemany() inside a single transaction, the per-row FTS
+        triggers are suspended and the FTS index is rebuilt in one pass at the end.
+        """
+        if self.read_only:
+            raise PermissionError(
+                "Workflow database is open read-only; reindex with a writable instance"
+            )
+
         if not os.path.exists(self.workflows_dir):
             print(f"Warning: Workflows directory '{self.workflows_dir}' not found.")
             return {"processed": 0, "skipped": 0, "errors": 0}
@@ -465,76 +857,398 @@ class WorkflowDatabase:
             print(f"Warning: No JSON files found in '{self.workflows_dir}' directory.")
             return {"processed": 0, "skipped": 0, "errors": 0}
 
+        if bulk is None:
+            bulk = force_reindex
+
         print(f"Indexing {len(json_files)} workflow files...")
+        started = time.perf_counter()
 
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         conn.row_factory = sqlite3.Row
 
-        stats = {"processed": 0, "skipped": 0, "errors": 0}
+        stats = {"processed": 0, "skipped": 0, "errors": 0, "added": 0, "changed": 0, "removed": 0}
 
-        for file_path in json_files:
-            filename = os.path.basename(file_path)
+        # Indexed files and their hashes, to tell added from changed workflows
+        # and to prune rows whose file is gone
+        indexed = {
+            row["filename"]: row["file_hash"]
+            for row in conn.execute("SELECT filename, file_hash FROM workflows")
+        }
 
-            try:
-                # Check if file needs to be reprocessed
-                if not force_reindex:
-                    current_hash = self.get_file_hash(file_path)
-                    cursor = conn.execute(
-                        "SELECT file_hash FROM workflows WHERE filename = ?",
-                        (filename,),
-                    )
-                    row = cursor.fetchone()
-                    if row and row["file_hash"] == current_hash:
-                        stats["skipped"] += 1
+        # Load known hashes once instead of one lookup per file. Rows without
+        # features (indexed before they existed) are treated as changed.
+        known_hashes = {}
+        if not force_reindex:
+            cursor = conn.execute(
+                "SELECT w.filename, w.file_hash FROM workflows w "
+                "JOIN workflow_features f ON f.filename = w.filename"
+            )
+            known_hashes = {row["filename"]: row["file_hash"] for row in cursor}
+
+        if bulk:
+            conn.execute("BEGIN IMMEDIATE")
+            self._drop_fts_triggers(conn)
+            self._drop_cooccurrence_triggers(conn)
+
+        pending = []
+        pending_features = []
+        try:
+            for file_path in json_files:
+                filename = os.path.basename(file_path)
+
+                try:
+                    # Check if file needs to be reprocessed
+                    if not force_reindex and filename in known_hashes:
+                        current_hash = self.get_file_hash(file_path)
+                        if known_hashes[filename] == current_hash:
+                            stats["skipped"] += 1
+                            continue
+
+                    # Analyze workflow
+                    workflow_data = self.analyze_workflow_file(file_path)
+                    if not workflow_data:
+                        stats["errors"] += 1
                         continue
 
-                # Analyze workflow
-                workflow_data = self.analyze_workflow_file(file_path)
-                if not workflow_data:
+                    row = self._workflow_row(workflow_data)
+                    features = (filename, json.dumps(workflow_data["features"]))
+                    if filename not in indexed:
+                        stats["added"] += 1
+                    elif indexed[filename] != workflow_data["file_hash"]:
+                        stats["changed"] += 1
+                    if bulk:
+                        pending.append(row)
+                        pending_features.append(features)
+                        if len(pending) >= BULK_BATCH_SIZE:
+                            conn.executemany(UPSERT_WORKFLOW_SQL, pending)
+                            conn.executemany(UPSERT_FEATURES_SQL, pending_features)
+                            pending.clear()
+                            pending_features.clear()
+                    else:
+                        conn.execute(UPSERT_WORKFLOW_SQL, row)
+                        conn.execute(UPSERT_FEATURES_SQL, features)
+
+                    stats["processed"] += 1
+
+                except Exception as e:
+                    print(f"Error processing {file_path}: {str(e)}")
                     stats["errors"] += 1
                     continue
 
-                # Insert or update in database
-                conn.execute(
-                    """
-                    INSERT OR REPLACE INTO workflows (
-                        filename, name, workflow_id, active, description, trigger_type,
-                        complexity, node_count, integrations, tags, created_at, updated_at,
-                        file_hash, file_size, analyzed_at
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-                """,
-                    (
-                        workflow_data["filename"],
-                        workflow_data["name"],
-                        workflow_data["workflow_id"],
-                        workflow_data["active"],
-                        workflow_data["description"],
-                        workflow_data["trigger_type"],
-                        workflow_data["complexity"],
-                        workflow_data["node_count"],
-                        json.dumps(workflow_data["integrations"]),
-                        json.dumps(workflow_data["tags"]),
-                        workflow_data["created_at"],
-                        workflow_data["updated_at"],
-                        workflow_data["file_hash"],
-                        workflow_data["file_size"],
-                    ),
-                )
+            removed = set(indexed).difference(os.path.basename(p) for p in json_files)
+            if removed:
+                self._remove_workflows(conn, removed)
+                stats["removed"] = len(removed)
+
+            if bulk:
+                if pending:
+                    conn.executemany(UPSERT_WORKFLOW_SQL, pending)
+                    conn.executemany(UPSERT_FEATURES_SQL, pending_features)
+                # Rebuild the whole FTS index from the content table in one pass
+                conn.execute("INSERT INTO workflows_fts(workflows_fts) VALUES('rebuild')")
+                self._create_fts_triggers(conn)
+                self._rebuild_cooccurrence(conn)
+                self._create_cooccurrence_triggers(conn)
+
+            if stats["added"] or stats["changed"] or stats["removed"]:
+                self._record_generation(conn, stats["added"], stats["changed"], stats["removed"])
+
+            conn.commit()
+        except Exception:
+            # Rolls back the staged rows and restores the dropped triggers
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+            elapsed = time.perf_counter() - started
+            indexer_counters.inc("runs")
+            indexer_counters.inc("duration_seconds", elapsed)
+            indexer_counters.set("last_duration_seconds", elapsed)
+            for key, value in stats.items():
+                indexer_counters.inc(key, value)
 
-                stats["processed"] += 1
+        print(
+            f"✅ Indexing complete: {stats['processed']} processed, {stats['skipped']} skipped, {stats['errors']} errors "
+            f"({stats['added']} added, {stats['changed']} changed, {stats['removed']} removed)"
+        )
 
-            except Exception as e:
-                print(f"Error processing {file_path}: {str(e)}")
-                stats["errors"] += 1
-                continue
+        self.rebuild_derived_indexes()
+        return stats
 
-        conn.commit()
-        conn.close()
+    @staticmethod
+    def _remove_workflows(conn: sqlite3.Connection, filenames: Iterable[str]):
+        """Delete workflows whose file no longer exists, with their features."""
+        params = [(filename,) for filename in filenames]
+        conn.executemany(
+            "DELETE FROM workflow_related WHERE workflow_id = "
+            "(SELECT id FROM workflows WHERE filename = ?)",
+            params,
+        )
+        conn.executemany("DELETE FROM workflow_features WHERE filename = ?", params)
+        conn.executemany("DELETE FROM workflows WHERE filename = ?", params)
+
+    def index_generation(self) -> int:
+        """Latest index generation; caches of catalog-derived data key on it."""
+        conn = self._connect()
+        try:
+            return index_generation(conn)
+        finally:
+            conn.close()
+
+    def stale_derived_indexes(self) -> List[str]:
+        """Derived indexes that are missing or behind by DERIVED_REBUILD_RATIO."""
+        conn = self._connect()
+        try:
+            total = conn.execute("SELECT COUNT(*) FROM workflows").fetchone()[0]
+            built = dict(conn.execute("SELECT name, built_at FROM derived_indexes").fetchall())
+            stale = []
+            for name in ("related", "semantic"):
+                if name not in built or (name == "semantic" and not self.vector_index.available):
+                    stale.append(name)
+                    continue
+                changed = conn.execute(
+                    "SELECT COUNT(*) FROM workflows WHERE analyzed_at > ?", (built[name],)
+                ).fetchone()[0]
+                if changed and changed >= DERIVED_REBUILD_RATIO * total:
+                    stale.append(name)
+            return stale
+        finally:
+            conn.close()
+
+    def rebuild_derived_indexes(self, force: bool = False) -> List[str]:
+        """Rebuild stale derived indexes (all of them with force); returns their names.
+
+        Small incremental updates are batched: a full rebuild costs a pass
+        over every workflow, so it waits until enough workflows changed.
+        """
+        stale = ["related", "semantic"] if force else self.stale_derived_indexes()
+        if "related" in stale:
+            self.build_related_index()
+        if "semantic" in stale:
+            self.build_semantic_index()
+        return stale
+
+    @staticmethod
+    def _record_build(conn: sqlite3.Connection, name: str, built_at: str, workflows: int):
+        conn.execute(
+            "INSERT OR REPLACE INTO derived_indexes VALUES (?, ?, ?)", (name, built_at, workflows)
+        )
+
+    def build_related_index(self) -> Dict[str, Any]:
+        """Recompute the top-k related workflows of every workflow.
 
+        MinHash/LSH keeps candidate generation near-linear in the corpus size;
+        only candidate pairs are scored with exact Jaccard.
+        """
+        started = time.perf_counter()
+        conn = self._connect()
+        try:
+            built_at = conn.execute("SELECT CURRENT_TIMESTAMP").fetchone()[0]
+            rows = conn.execute(
+                "SELECT w.id, f.features FROM workflows w "
+                "JOIN workflow_features f ON f.filename = w.filename"
+            ).fetchall()
+            related, counters = build_related(
+                {workflow_id: json.loads(features) for workflow_id, features in rows}
+            )
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM workflow_related")
+            conn.executemany(
+                "INSERT INTO workflow_related VALUES (?, ?, ?, ?)",
+                (
+                    (workflow_id, rank, related_id, score)
+                    for workflow_id, entries in related.items()
+                    for rank, (score, related_id) in enumerate(entries)
+                ),
+            )
+            self._record_build(conn, "related", built_at, len(rows))
+            conn.commit()
+        finally:
+            conn.close()
+
+        counters["seconds"] = round(time.perf_counter() - started, 3)
+        self.last_related_build = counters
         print(
-            f"✅ Indexing complete: {stats['processed']} processed, {stats['skipped']} skipped, {stats['errors']} errors"
+            f"🔗 Related index: {counters['workflows']} workflows, "
+            f"{counters['candidate_pairs']} candidate pairs in {counters['seconds']}s"
         )
-        return stats
+        return counters
+
+    def build_semantic_index(self) -> Dict[str, Any]:
+        """Embed every workflow and rewrite the vectors file and vocabulary."""
+        started = time.perf_counter()
+        conn = self._connect()
+        try:
+            built_at = conn.execute("SELECT CURRENT_TIMESTAMP").fetchone()[0]
+            rows = conn.execute(
+                "SELECT w.id, w.name, w.description, w.integrations, f.features "
+                "FROM workflows w JOIN workflow_features f ON f.filename = w.filename "
+                "ORDER BY w.id"
+            ).fetchall()
+            documents = [
+                weighted_tokens(
+                    workflow_fields(name, description, json.loads(integrations or "[]"), json.loads(features))
+                )
+                for _, name, description, integrations, features in rows
+            ]
+            idf = compute_idf(documents)
+            embedder = Embedder(idf)
+            write_vectors(
+                self.vector_index.path,
+                [row[0] for row in rows],
+                [embedder.embed(document) for document in documents],
+            )
+
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM semantic_vocabulary")
+            conn.executemany("INSERT INTO semantic_vocabulary VALUES (?, ?)", idf.items())
+            self._record_build(conn, "semantic", built_at, len(rows))
+            conn.commit()
+        finally:
+            conn.close()
+
+        counters = {
+            "workflows": len(rows),
+            "vocabulary": len(idf),
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+        print(
+            f"🧭 Semantic index: {counters['workflows']} workflows, "
+            f"{counters['vocabulary']} tokens in {counters['seconds']}s"
+        )
+        return counters
+
+    def _embed_query(self, conn: sqlite3.Connection, query: str) -> Dict[int, float]:
+        weights = weighted_tokens([("query", query)])
+        if not weights:
+            return {}
+        tokens = list(weights)
+        idf = {}
+        # Stay under SQLite's bound-parameter limit for long queries
+        for i in range(0, len(tokens), 500):
+            chunk = tokens[i:i + 500]
+            idf.update(
+                conn.execute(
+                    f"SELECT token, idf FROM semantic_vocabulary WHERE token IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchall()
+            )
+        return Embedder(idf).embed(weights)
+
+    def _bm25_scores(self, conn: sqlite3.Connection, query: str, limit: int) -> Dict[int, float]:
+        # Quoted terms OR-ed together: free text never trips the FTS5 syntax
+        terms = " OR ".join(f'"{word}"' for word in dict.fromkeys(words(query)))
+        if not terms:
+            return {}
+        rows = conn.execute(
+            "SELECT rowid, bm25(workflows_fts) FROM workflows_fts "
+            "WHERE workflows_fts MATCH ? ORDER BY rank LIMIT ?",
+            (terms, limit),
+        ).fetchall()
+        # bm25() is lower-is-better
+        return {rowid: -score for rowid, score in rows}
+
+    def semantic_search(
+        self, query: str, limit: int = 20, mode: str = "hybrid", alpha: float = HYBRID_ALPHA
+    ) -> List[Tuple[float, int]]:
+        """Ranked (score, workflow id) by embedding similarity, fused with BM25 in hybrid mode.
+
+        Ranks by BM25 alone while there is no vectors file (see search_mode()).
+        """
+        conn = self._connect()
+        try:
+            if not self.vector_index.available:
+                lexical = self._bm25_scores(conn, query, limit)
+                return sorted(((score, wid) for wid, score in lexical.items()), reverse=True)
+            vector = self._embed_query(conn, query)
+            semantic = {wid: score for score, wid in self.vector_index.search(vector, limit)}
+            if mode != "hybrid":
+                return sorted(((score, wid) for wid, score in semantic.items()), reverse=True)
+            lexical = self._bm25_scores(conn, query, limit)
+        finally:
+            conn.close()
+        return fuse_scores(lexical, semantic, alpha)[:limit]
+
+    def integration_pairs(
+        self, limit: int = 10, order_by: str = "count", min_count: int = 1
+    ) -> List[Dict[str, Any]]:
+        """Most frequent (or most associated, by lift/PMI) integration pairs."""
+        return self._cooccurrence_query(None, limit, order_by, min_count)
+
+    def frequently_used_with(
+        self, integration: str, limit: int = 10, order_by: str = "count", min_count: int = 1
+    ) -> List[Dict[str, Any]]:
+        """Integrations that appear in workflows together with `integration`."""
+        return self._cooccurrence_query(integration, limit, order_by, min_count)
+
+    def _cooccurrence_query(
+        self, integration: Optional[str], limit: int, order_by: str, min_count: int
+    ) -> List[Dict[str, Any]]:
+        if order_by not in ("count", "lift", "pmi"):
+            raise ValueError(f"Unknown co-occurrence ordering: {order_by}")
+        started = time.perf_counter()
+        conn = self._connect()
+        try:
+            total = conn.execute("SELECT COUNT(*) FROM workflows").fetchone()[0]
+            # lift = P(a, b) / (P(a) P(b)); PMI is its log, so both sort alike
+            select = """
+                SELECT x.name AS a, y.name AS b, p.count,
+                       CAST(p.count AS REAL) * ? / (x.workflow_count * y.workflow_count) AS lift
+                FROM integration_pairs p
+                JOIN integrations x ON x.id = p.a
+                JOIN integrations y ON y.id = p.b
+                WHERE p.count >= ?
+            """
+            order = "p.count DESC" if order_by == "count" else "lift DESC, p.count DESC"
+            params: List[Any] = [total, min_count]
+            if integration is None:
+                sql = f"{select} ORDER BY {order} LIMIT ?"
+            else:
+                # Both index lookups: the integration may be either side of a pair
+                sql = f"""
+                    SELECT * FROM (
+                        {select} AND p.a = (SELECT id FROM integrations WHERE name = ?)
+                        UNION ALL
+                        {select} AND p.b = (SELECT id FROM integrations WHERE name = ?)
+                    ) p ORDER BY {order.replace("p.count", "count")} LIMIT ?
+                """
+                params = [total, min_count, integration, total, min_count, integration]
+            rows = conn.execute(sql, params + [limit]).fetchall()
+        finally:
+            conn.close()
+        query_timings.record("cooccurrence", time.perf_counter() - started)
+
+        results = []
+        for a, b, count, lift in rows:
+            entry = {"count": count, "lift": round(lift, 3), "pmi": round(math.log2(lift), 3)}
+            if integration is None:
+                entry["integrations"] = [a, b]
+            else:
+                entry["integration"] = b if a == integration else a
+            results.append(entry)
+        return results
+
+    def get_related(self, filename: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """Precomputed related workflows of a workflow, most similar first."""
+        started = time.perf_counter()
+        conn = self._connect()
+        conn.row_factory = sqlite3.Row
+        try:
+            rows = conn.execute(
+                """
+                SELECT w.filename, w.name, w.description, r.score
+                FROM workflow_related r
+                JOIN workflows w ON w.id = r.related_id
+                WHERE r.workflow_id = (SELECT id FROM workflows WHERE filename = ?)
+                ORDER BY r.rank
+                LIMIT ?
+                """,
+                (filename, limit),
+            ).fetchall()
+        finally:
+            conn.close()
+        query_timings.record("related", time.perf_counter() - started)
+        return [dict(row) for row in rows]
 
     def search_workflows(
         self,
@@ -544,9 +1258,22 @@ class WorkflowDatabase:
         active_only: bool = False,
         limit: int = 50,
         offset: int = 0,
+        mode: str = "lexical",
     ) -> Tuple[List[Dict], int]:
-        """Fast search with filters and pagination."""
-        conn = sqlite3.connect(self.db_path)
+        """Fast search with filters and pagination.
+
+        mode is "lexical" (FTS5), "semantic" (embeddings) or "hybrid" (both).
+        """
+        started = time.perf_counter()
+        mode = self.search_mode(mode)
+        if mode != "lexical" and query.strip() and not query.startswith('filename:"'):
+            results, total = self._ranked_search(
+                query, trigger_filter, complexity_filter, active_only, limit, offset, mode
+            )
+            query_timings.record(mode, time.perf_counter() - started)
+            return results, total
+
+        conn = self._connect()
         conn.row_factory = sqlite3.Row
 
         # Build WHERE clause
@@ -601,31 +1328,114 @@ class WorkflowDatabase:
         cursor = conn.execute(base_query, params)
         rows = cursor.fetchall()
 
-        # Convert to dictionaries and parse JSON fields
-        results = []
-        for row in rows:
-            workflow = dict(row)
-            workflow["integrations"] = json.loads(workflow["integrations"] or "[]")
-
-            # Parse tags and convert dict tags to strings
-            raw_tags = json.loads(workflow["tags"] or "[]")
-            clean_tags = []
-            for tag in raw_tags:
-                if isinstance(tag, dict):
-                    # Extract name from tag dict if available
-                    clean_tags.append(tag.get("name", str(tag.get("id", "tag"))))
-                else:
-                    clean_tags.append(str(tag))
-            workflow["tags"] = clean_tags
-
-            results.append(workflow)
+        results = [self._row_to_workflow(row) for row in rows]
 
         conn.close()
+        if query.startswith('filename:"'):
+            kind = "detail"
+        else:
+            kind = "fts" if query.strip() else "list"
+        query_timings.record(kind, time.perf_counter() - started)
         return results, total
 
+    @staticmethod
+    def _row_to_workflow(row: sqlite3.Row) -> Dict[str, Any]:
+        """Convert a workflows row to a dictionary and parse its JSON fields."""
+        workflow = dict(row)
+        workflow["integrations"] = json.loads(workflow["integrations"] or "[]")
+
+        # Parse tags and convert dict tags to strings
+        raw_tags = json.loads(workflow["tags"] or "[]")
+        clean_tags = []
+        for tag in raw_tags:
+            if isinstance(tag, dict):
+                # Extract name from tag dict if available
+                clean_tags.append(tag.get("name", str(tag.get("id", "tag"))))
+            else:
+                clean_tags.append(str(tag))
+        workflow["tags"] = clean_tags
+        return workflow
+
+    def search_mode(self, mode: str) -> str:
+        """The ranking a search in `mode` actually runs.
+
+        Semantic and hybrid need the vectors file; a database indexed before
+        it existed, or copied without it, is searched lexically until the
+        indexer builds one.
+        """
+        if mode != "lexical" and not self.vector_index.available:
+            return "lexical"
+        return mode
+
+    def _ranked_search(
+        self,
+        query: str,
+        trigger_filter: str,
+        complexity_filter: str,
+        active_only: bool,
+        limit: int,
+        offset: int,
+        mode: str,
+    ) -> Tuple[List[Dict], int]:
+        """Semantic/hybrid search: rank candidates, then filter and page them.
+
+        The candidate pool widens until the filters leave SEMANTIC_CANDIDATES
+        matches (or enough for the requested page); `total` counts the
+        matches in that pool.
+        """
+        where_conditions = []
+        params: List[Any] = []
+        if active_only:
+            where_conditions.append("active = 1")
+        if trigger_filter != "all":
+            where_conditions.append("trigger_type = ?")
+            params.append(trigger_filter)
+        if complexity_filter != "all":
+            where_conditions.append("complexity = ?")
+            params.append(complexity_filter)
+
+        wanted = max(SEMANTIC_CANDIDATES, offset + limit)
+        pool = wanted
+        conn = self._connect()
+        conn.row_factory = sqlite3.Row
+        try:
+            allowed = None
+            if where_conditions:
+                allowed = {
+                    row[0]
+                    for row in conn.execute(
+                        f"SELECT id FROM workflows WHERE {' AND '.join(where_conditions)}", params
+                    )
+                }
+            while True:
+                ranked = self.semantic_search(query, pool, mode)
+                matches = [(score, wid) for score, wid in ranked if allowed is None or wid in allowed]
+                # Enough matches, every candidate ranked, or at the cap
+                if len(matches) >= wanted or len(ranked) < pool or pool >= SEMANTIC_MAX_CANDIDATES:
+                    break
+                pool = min(pool * 4, SEMANTIC_MAX_CANDIDATES)
+
+            page = matches[offset:offset + limit]
+            rows = conn.execute(
+                f"SELECT * FROM workflows WHERE id IN ({','.join('?' * len(page))})",
+                [wid for _, wid in page],
+            ).fetchall() if page else []
+        finally:
+            conn.close()
+
+        by_id = {row["id"]: row for row in rows}
+        results = []
+        for score, wid in page:
+            if wid in by_id:
+                workflow = self._row_to_workflow(by_id[wid])
+                workflow["score"] = round(score, 4)
+                results.append(workflow)
+        return results, len(matches)
+
     def get_stats(self) -> Dict[str, Any]:
         """Get database statistics."""
-        conn = sqlite3.connect(self.db_path)
+        started = time.perf_counter()
+        conn = self._connect()
         conn.row_factory = sqlite3.Row
 
         # Basic counts
@@ -667,6 +1477,7 @@ class WorkflowDatabase:
             all_integrations.update(integrations)
 
         conn.close()
+        query_timings.record("stats", time.perf_counter() - started)
 
         return {
             "total": total,
@@ -745,7 +1556,8 @@ class WorkflowDatabase:
             return [], 0
 
         services = categories[category]
-        conn = sqlite3.connect(self.db_path)
+        started = time.perf_counter()
+        conn = self._connect()
         conn.row_factory = sqlite3.Row
 
         # Build OR conditions for all services in category
@@ -789,6 +1601,7 @@ class WorkflowDatabase:
             results.append(workflow)
 
         conn.close()
+        query_timings.record("category", time.perf_counter() - started)
         return results, total
 
 
@@ -799,6 +1612,11 @@ def main():
     parser = argparse.ArgumentParser(description="N8N Workflow Database")
     parser.add_argument("--index", action="store_true", help="Index all workflows")
     parser.add_argument("--force", action="store_true", help="Force reindex all files")
+    parser.add_argument(
+        "--bulk",
+        action="store_true",
+        help="Use the batched bulk-load path (default when --force is given)",
+    )
     parser.add_argument("--search", help="Search workflows")
     parser.add_argument("--stats", action="store_true", help="Show database statistics")
 
@@ -807,7 +1625,9 @@ def main():
     db = WorkflowDatabase()
 
     if args.index:
-        stats = db.index_all_workflows(force_reindex=args.force)
+        stats = db.index_all_workflows(
+            force_reindex=args.force, bulk=True if args.bulk else None
+        )
         print(f"Indexed {stats['processed']} workflows")
 
     elif args.search: